@@ -1,14 +1,15 @@
 # Copyright 2016-2018 Dirk Thomas
 # Licensed under the Apache License, Version 2.0
 
-from collections import defaultdict
+from collections.abc import Mapping
 import os
 from pathlib import Path
+import sys
+from types import MappingProxyType
 
 from colcon_core.environment_variable import EnvironmentVariable
 from colcon_core.location import get_config_path
 from colcon_core.logging import colcon_logger
-import yaml
 
 logger = colcon_logger.getChild(__name__)
 
@@ -20,6 +21,107 @@ COLCON_MIXIN_PATH = EnvironmentVariable(
     'Provide additional directories to look for mixin files. '
     'Separate individual directories with colons.')
 
+"""Environment variable to read shared read-only mixins from"""
+COLCON_MIXIN_SHARED_PATH = EnvironmentVariable(
+    'COLCON_MIXIN_SHARED_PATH',
+    'Provide read-only directories with mixin files shared between users. '
+    'A precompiled index in these directories is being used instead of '
+    'parsing the mixin files. '
+    'Separate individual directories with colons.')
+
+"""Environment variable to prune obsolete mixin files after an update"""
+COLCON_MIXIN_GC_THRESHOLD = EnvironmentVariable(
+    'COLCON_MIXIN_GC_THRESHOLD',
+    'Remove all obsolete mixin files at the end of an update if there are '
+    'more than this number of them')
+
+"""Environment variable to start the mixin index server on demand"""
+COLCON_MIXIN_INDEX_SERVER = EnvironmentVariable(
+    'COLCON_MIXIN_INDEX_SERVER',
+    'Start a resident process serving the mixin index for shell completion '
+    "and 'colcon mixin show' on demand if set to 1")
+
+
+class MixinLocations:
+    """
+    The resolved locations where mixins are being read from.
+
+    The paths are only being resolved once per process and the results of
+    checking if a directory exists are being cached.
+    Code modifying the directories must call :meth:`invalidate` or
+    :func:`invalidate_mixin_locations`.
+    """
+
+    __slots__ = (
+        'mixin_path', 'mixin_path_absolute', 'additional_paths',
+        'shared_paths', '_is_dir')
+
+    def __init__(self):  # noqa: D107
+        self.mixin_path = get_config_path() / 'mixin'
+        self.mixin_path_absolute = self.mixin_path.absolute()
+        self.additional_paths = _get_paths_from_env(COLCON_MIXIN_PATH)
+        self.shared_paths = _get_paths_from_env(COLCON_MIXIN_SHARED_PATH)
+        self._is_dir = {}
+
+    def is_dir(self, path):
+        """
+        Check if a path is an existing directory.
+
+        :param Path path: The path
+        :rtype: bool
+        """
+        key = str(path)
+        is_dir = self._is_dir.get(key)
+        if is_dir is None:
+            is_dir = self._is_dir[key] = os.path.isdir(key)
+        return is_dir
+
+    def invalidate(self, path=None):
+        """
+        Forget the cached results for a path.
+
+        :param Path path: The path, if None all cached results are being
+          forgotten
+        """
+        if path is None:
+            self._is_dir.clear()
+        else:
+            self._is_dir.pop(str(path), None)
+
+
+_mixin_locations = None
+
+
+def get_mixin_locations():
+    """
+    Get the resolved mixin locations.
+
+    The result is being cached and returned on repeated calls until
+    :func:`invalidate_mixin_locations` is being called.
+
+    :rtype: MixinLocations
+    """
+    global _mixin_locations
+    if _mixin_locations is None:
+        _mixin_locations = MixinLocations()
+    return _mixin_locations
+
+
+def invalidate_mixin_locations():
+    """
+    Resolve the mixin locations again on the next use.
+
+    This is necessary after changing the configuration path or the
+    environment variables.
+    """
+    global _mixin_locations
+    _mixin_locations = None
+
+
+def _get_paths_from_env(env_var):
+    value = os.environ.get(env_var.name, '')
+    return tuple(Path(x) for x in value.split(os.pathsep) if x)
+
 
 def get_mixin_path():
     """
@@ -27,7 +129,7 @@ def get_mixin_path():
 
     :rtype: Path
     """
-    return get_config_path() / 'mixin'
+    return get_mixin_locations().mixin_path
 
 
 def get_additional_mixin_paths():
@@ -37,8 +139,16 @@ def get_additional_mixin_paths():
     :rtype: list
     """
     # Read additional paths from the environment variable.
-    env_var = os.environ.get(COLCON_MIXIN_PATH.name, '')
-    return [Path(x) for x in env_var.split(os.pathsep) if x]
+    return list(get_mixin_locations().additional_paths)
+
+
+def get_shared_mixin_paths():
+    """
+    Get the paths where shared read-only mixins may be found.
+
+    :rtype: list
+    """
+    return list(get_mixin_locations().shared_paths)
 
 
 def get_mixin_files(path=None):
@@ -51,7 +161,7 @@ def get_mixin_files(path=None):
     :rtype: list
     """
     mixin_path = path or get_mixin_path()
-    if not mixin_path.is_dir():
+    if not get_mixin_locations().is_dir(mixin_path):
         return []
 
     files = []
@@ -70,19 +180,283 @@ def get_mixin_files(path=None):
     return files
 
 
+class Mixin(Mapping):
+    """
+    The read-only arguments of a single mixin.
+
+    The argument keys and values are stored in tuples shared between mixins
+    with identical content.
+    Accessing a value returns a copy using the mutable types, e.g. a list.
+    """
+
+    __slots__ = ('_keys', '_values')
+
+    def __init__(self, keys, values):  # noqa: D107
+        self._keys = keys
+        self._values = values
+
+    def __getitem__(self, key):  # noqa: D105
+        for k, v in zip(self._keys, self._values):
+            if k == key:
+                return _thaw(v)
+        raise KeyError(key)
+
+    def __iter__(self):  # noqa: D105
+        return iter(self._keys)
+
+    def __len__(self):  # noqa: D105
+        return len(self._keys)
+
+    def __repr__(self):  # noqa: D105
+        return repr(dict(self.items()))
+
+
+class MixinOrigin:
+    """
+    The origin of a mixin.
+
+    The `overridden` attribute references the origin of the mixin with the
+    same name which has been overwritten by this one, forming a chain back to
+    the first definition.
+    """
+
+    __slots__ = ('path', 'repository', 'line', 'overridden')
+
+    def __init__(  # noqa: D107
+        self, path, *, repository=None, line=None, overridden=None
+    ):
+        self.path = path
+        self.repository = repository
+        self.line = line
+        self.overridden = overridden
+
+    def get_chain(self):
+        """
+        Get this origin followed by all overridden origins.
+
+        :rtype: list
+        """
+        chain = []
+        origin = self
+        while origin is not None:
+            chain.append(origin)
+            origin = origin.overridden
+        return chain
+
+    def __str__(self):  # noqa: D105
+        location = self.path
+        if self.line is not None:
+            location += ':{self.line}'.format_map(locals())
+        if self.repository is not None:
+            location += " (repository '{self.repository}')".format_map(
+                locals())
+        return location
+
+
+class MixinIndex(Mapping):
+    """
+    The read-only mixins grouped by the verb.
+
+    The index maps the verb tuple to a read-only mapping of mixin names to
+    :class:`Mixin` instances.
+    Identical strings and values are only being stored once.
+
+    The `fingerprint` attribute identifies the content of all mixin files which
+    have been added.
+
+    The index also maps each argument key to the mixins setting it, see
+    :meth:`get_mixins_by_arg`, and records the origin of each mixin, see
+    :meth:`get_origin`.
+    The arguments of each mixin are only being validated once, see
+    :meth:`get_valid_args`.
+    """
+
+    __slots__ = (
+        '_mixins_by_verb', '_views', '_values', '_mixins_by_arg', '_origins',
+        '_valid_args', 'fingerprint')
+
+    def __init__(self):  # noqa: D107
+        self._mixins_by_verb = {}
+        self._views = {}
+        self._values = {}
+        # mapping of argument keys to verbs to mixin names to the source
+        self._mixins_by_arg = {}
+        # mapping of verb and mixin name tuples to the origin
+        self._origins = {}
+        # mapping of verb and mixin name tuples to the schema fingerprint and
+        # the valid arguments
+        self._valid_args = {}
+        self.fingerprint = ''
+
+    def __getitem__(self, verb):  # noqa: D105
+        # like the previously used defaultdict an unknown verb has no mixins
+        return self._views.get(verb, _NO_MIXINS)
+
+    def __contains__(self, verb):  # noqa: D105
+        return verb in self._views
+
+    def get(self, verb, default=None):  # noqa: D102
+        return self._views.get(verb, default)
+
+    def __iter__(self):  # noqa: D105
+        return iter(self._views)
+
+    def __len__(self):  # noqa: D105
+        return len(self._views)
+
+    def set_mixin(self, verb, name, args, *, origin=None):
+        """
+        Add or replace a mixin.
+
+        :param tuple verb: The verb
+        :param str name: The name of the mixin
+        :param dict args: The arguments of the mixin
+        :param MixinOrigin origin: The origin of the mixin, the origin of a
+          replaced mixin is being linked as the overridden one
+        """
+        verb = self._share(tuple(sys.intern(v) for v in verb))
+        if verb not in self._mixins_by_verb:
+            self._mixins_by_verb[verb] = {}
+            self._views[verb] = MappingProxyType(self._mixins_by_verb[verb])
+        name = sys.intern(name)
+        keys = self._share(tuple(sys.intern(str(k)) for k in args.keys()))
+        values = tuple(self._freeze(v) for v in args.values())
+        try:
+            values = self._share(values)
+        except TypeError:
+            # values containing unhashable types are not shared
+            pass
+
+        # remove the keys of a replaced mixin from the reverse mapping
+        previous = self._mixins_by_verb[verb].get(name)
+        for key in (previous or ()):
+            mixins = self._mixins_by_arg[key][verb]
+            del mixins[name]
+            if not mixins:
+                del self._mixins_by_arg[key][verb]
+        source = origin.path if origin is not None else None
+        for key in keys:
+            self._mixins_by_arg.setdefault(key, {}).setdefault(
+                verb, {})[name] = source
+
+        if origin is not None:
+            origin.overridden = self._origins.get((verb, name))
+            self._origins[(verb, name)] = origin
+        else:
+            self._origins.pop((verb, name), None)
+        self._valid_args.pop((verb, name), None)
+        self._mixins_by_verb[verb][name] = Mixin(keys, values)
+
+    def get_origin(self, verb, name):
+        """
+        Get the origin of a mixin.
+
+        :param tuple verb: The verb
+        :param str name: The name of the mixin
+        :returns: The origin or None if it is unknown
+        :rtype: MixinOrigin
+        """
+        return self._origins.get((verb, name))
+
+    def get_valid_args(self, verb, name, schema, schema_fingerprint):
+        """
+        Get the arguments of a mixin which are valid for the verb.
+
+        The mixin is only being validated once for the same arguments of the
+        verb, invalid keys and values are being reported at that time.
+
+        :param tuple verb: The verb
+        :param str name: The name of the mixin
+        :param dict schema: The mapping of argument keys to argparse actions
+        :param str schema_fingerprint: The fingerprint of the schema
+        :returns: The ordered dictionary of valid arguments
+        :rtype: OrderedDict
+        """
+        valid = self._valid_args.get((verb, name))
+        if valid is None or valid[0] != schema_fingerprint:
+            from colcon_mixin.mixin.schema import format_mixin_error
+            from colcon_mixin.mixin.schema import normalize_mixin_args
+            args, errors = normalize_mixin_args(self[verb][name], schema)
+            for mixin_key, reason in errors:
+                logger.warning(format_mixin_error(
+                    '.'.join(verb), name, mixin_key, reason))
+            valid = self._valid_args[(verb, name)] = (
+                schema_fingerprint, args)
+        return valid[1]
+
+    def get_mixins_by_arg(self, key, verb=None):
+        """
+        Get the mixins setting a specific argument.
+
+        :param str key: The argument key, the option string without leading
+          dashes
+        :param tuple verb: Only consider mixins for a specific verb
+        :returns: The mapping of verbs to mappings of mixin names to the path
+          of the file defining the mixin
+        :rtype: dict
+        """
+        mixins_by_verb = self._mixins_by_arg.get(key, {})
+        if verb is not None:
+            mixins_by_verb = {verb: mixins_by_verb[verb]} \
+                if verb in mixins_by_verb else {}
+        return {v: dict(mixins) for v, mixins in mixins_by_verb.items()}
+
+    def _freeze(self, value):
+        if isinstance(value, str):
+            return self._share(value)
+        if isinstance(value, list):
+            value = tuple(self._freeze(v) for v in value)
+            if all(isinstance(v, str) for v in value):
+                value = self._share(value)
+            return value
+        if isinstance(value, dict):
+            return MappingProxyType(
+                {k: self._freeze(v) for k, v in value.items()})
+        return value
+
+    def _share(self, value):
+        # the key contains the types since e.g. True == 1 and 1 == 1.0
+        return self._values.setdefault(_get_share_key(value), value)
+
+
+_NO_MIXINS = MappingProxyType({})
+
+
+def _get_share_key(value):
+    if isinstance(value, tuple):
+        return (tuple, tuple(_get_share_key(v) for v in value))
+    return (type(value), value)
+
+
+def _thaw(value):
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    return value
+
+
 def get_mixins():
     """
     Get the mixins from all files.
 
+    The shared mixins are being loaded first, the mixins of the user and the
+    additional mixins are overlaid on top of them.
     The result is being cached and return on repeated calls.
 
-    :rtype: dict
+    :rtype: MixinIndex
     """
     global mixins_by_verb
-    mixin_locations = [get_mixin_path()] + get_additional_mixin_paths()
     if mixins_by_verb is None:
-        mixins_by_verb = defaultdict(dict)
-        for location in mixin_locations:
+        locations = get_mixin_locations()
+        mixins_by_verb = MixinIndex()
+        if locations.shared_paths:
+            # avoid a circular import as well as importing the module if no
+            # shared paths are being used
+            from colcon_mixin.mixin.shared_index import add_shared_mixins
+        for location in locations.shared_paths:
+            add_shared_mixins(location, mixins_by_verb)
+        for location in (locations.mixin_path, ) + locations.additional_paths:
             for path in get_mixin_files(location):
                 add_mixins(Path(path), mixins_by_verb)
     return mixins_by_verb
@@ -93,18 +467,83 @@ def add_mixins(mixin_path, mixins_by_verb):
     Add the mixins from the file to the collection.
 
     :param Path mixin_path: The path of the mixin file
-    :param dict mixins_by_verb: The nested dictionary of mixins grouped by the
-      verb
+    :param mixins_by_verb: The mixin index or a nested dictionary of mixins
+      grouped by the verb
     """
+    import yaml
+
     content = mixin_path.read_text()
     try:
-        data = yaml.safe_load(content)
+        data, lines = load_mixin_content(content)
     except yaml.YAMLError as e:
         logger.warning(
             "Skipping mixin file '%s' since it failed to parse: %s" %
             (mixin_path.absolute(), e))
         return
+    add_mixin_data(
+        mixin_path, data, mixins_by_verb,
+        digest=get_content_digest(content), lines=lines)
+
+
+def load_mixin_content(content):
+    """
+    Parse the content of a mixin file.
+
+    Beside the data the line numbers of the mixin names are being determined
+    within the same pass.
+
+    :param str content: The content
+    :returns: The parsed data and a dictionary mapping tuples of the verb and
+      the mixin name (both as strings) to the line number
+    :rtype: tuple
+    :raises yaml.YAMLError: if the content fails to parse
+    """
+    import yaml
+
+    loader = yaml.SafeLoader(content)
+    try:
+        node = loader.get_single_node()
+        data = loader.construct_document(node) if node is not None else None
+    finally:
+        loader.dispose()
+
+    lines = {}
+    if isinstance(node, yaml.MappingNode):
+        for verb_node, mixins_node in node.value:
+            if not isinstance(mixins_node, yaml.MappingNode):
+                continue
+            for name_node, _ in mixins_node.value:
+                lines[(str(verb_node.value), str(name_node.value))] = \
+                    name_node.start_mark.line + 1
+    return data, lines
+
 
+def get_content_digest(content):
+    """
+    Get the digest of the content of a mixin file.
+
+    :param str content: The content
+    :rtype: str
+    """
+    import hashlib
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def add_mixin_data(
+    mixin_path, data, mixins_by_verb, *, digest=None, lines=None
+):
+    """
+    Add the already parsed mixins of a file to the collection.
+
+    :param Path mixin_path: The path of the mixin file
+    :param data: The parsed content of the mixin file
+    :param mixins_by_verb: The mixin index or a nested dictionary of mixins
+      grouped by the verb
+    :param str digest: The digest of the content of the mixin file, only
+      necessary to update the fingerprint of a mixin index
+    :param dict lines: The line numbers of the mixins as returned by
+      :func:`load_mixin_content`
+    """
     if data is None:
         logger.info("Empty mixin file '%s'" % mixin_path.absolute())
         return
@@ -116,12 +555,43 @@ def add_mixins(mixin_path, mixins_by_verb):
 
     logger.info(
         "Using mixins from '%s'" % mixin_path.absolute())
+    if isinstance(mixins_by_verb, MixinIndex):
+        import hashlib
+        h = hashlib.sha256(mixins_by_verb.fingerprint.encode('utf-8'))
+        h.update(str(mixin_path.absolute()).encode('utf-8'))
+        h.update((digest or '').encode('utf-8'))
+        mixins_by_verb.fingerprint = h.hexdigest()
+        repository = _get_repository_name(mixin_path)
     for verb, mixins in data.items():
         verb_key = tuple(verb.split('.'))
         for name, args in mixins.items():
-            if name in mixins_by_verb[verb_key]:
+            if args is None:
+                args = {}
+            if not isinstance(args, dict):
+                logger.warning(
+                    "Skipping mixin '%s' from file '%s' since it doesn't "
+                    'contain a dict' % (name, mixin_path.absolute()))
+                continue
+            if name in mixins_by_verb.get(verb_key, {}):
                 logger.warning(
                     "Mixin '%s' from file '%s' is overwriting another mixin "
                     'with the same name' %
                     (name, mixin_path.absolute()))
-            mixins_by_verb[verb_key][name] = args
+            if isinstance(mixins_by_verb, MixinIndex):
+                origin = MixinOrigin(
+                    str(mixin_path.absolute()), repository=repository,
+                    line=(lines or {}).get((str(verb), str(name))))
+                mixins_by_verb.set_mixin(verb_key, name, args, origin=origin)
+            else:
+                mixins_by_verb[verb_key][name] = args
+
+
+def _get_repository_name(mixin_path):
+    # mixin files of a repository are stored in a subdirectory of the mixin
+    # path named after the repository
+    try:
+        parts = mixin_path.absolute().relative_to(
+            get_mixin_locations().mixin_path_absolute).parts
+    except ValueError:
+        return None
+    return parts[0] if len(parts) > 1 else None
@@ -0,0 +1,40 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+# The completers are plain functions following the interface of argcomplete
+# so that argcomplete doesn't need to be imported unless it is completing.
+
+import os
+
+
+def get_choices_completer(get_choices):
+    """
+    Get a completer offering a set of choices.
+
+    :param get_choices: The callable returning the choices, it is only being
+      invoked when completing
+    :returns: The completer
+    """
+    def choices_completer(prefix, **kwargs):
+        """Callable returning the choices."""
+        return [str(choice) for choice in get_choices()]
+    return choices_completer
+
+
+def mixin_files_completer(prefix, **kwargs):
+    """Callable returning the directories and mixin files for a prefix."""
+    dirname = os.path.dirname(prefix)
+    try:
+        names = os.listdir(os.path.expanduser(dirname) or '.')
+    except OSError:
+        return []
+    completions = []
+    for name in sorted(names):
+        path = os.path.join(dirname, name)
+        if not path.startswith(prefix):
+            continue
+        if os.path.isdir(os.path.expanduser(path)):
+            completions.append(path + os.sep)
+        elif name.endswith('.mixin'):
+            completions.append(path)
+    return completions
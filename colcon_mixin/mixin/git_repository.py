@@ -0,0 +1,169 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+import shutil
+import subprocess
+
+from colcon_mixin.mixin import get_mixin_path
+
+"""The prefix of repository URLs referring to git repositories."""
+GIT_URL_PREFIX = 'git+'
+
+
+def is_git_url(url):
+    """
+    Check if a repository URL refers to a git repository.
+
+    :param str url: The repository URL, e.g. `git+https://host/repo.git`
+    :rtype: bool
+    """
+    return url.startswith(GIT_URL_PREFIX)
+
+
+def parse_git_url(url):
+    """
+    Split a git repository URL into the remote URL and the reference.
+
+    :param str url: The repository URL with an optional reference as the
+      fragment, e.g. `git+file:///path/to/repo.git#main`
+    :returns: The remote URL and the reference, `HEAD` if not specified
+    :rtype: tuple
+    :raises ValueError: if the URL doesn't refer to a git repository or the
+      remote URL or the reference start with a dash and would be interpreted
+      as an option by git
+    """
+    if not is_git_url(url):
+        raise ValueError(
+            "The URL '{url}' doesn't start with '{GIT_URL_PREFIX}'"
+            .format(url=url, GIT_URL_PREFIX=GIT_URL_PREFIX))
+    remote_url, _, ref = url[len(GIT_URL_PREFIX):].partition('#')
+    for value in (remote_url, ref):
+        if value.startswith('-'):
+            raise ValueError(
+                "The URL '{url}' contains '{value}' which must not start "
+                "with a dash".format_map(locals()))
+    return remote_url, ref or 'HEAD'
+
+
+def get_git_clone_path(*, repository_name):
+    """
+    Get the path of the clone of a git repository.
+
+    The clone is a bare repository in a directory starting with a dot and
+    is therefore ignored when crawling the mixin path.
+    The checked out mixin files are being stored in the repository directory
+    like the mixin files of any other repository.
+
+    :param str repository_name: The repository name
+    :rtype: Path
+    """
+    return get_mixin_path() / '.{repository_name}.git'.format_map(locals())
+
+
+def fetch_git_repository(*, repository_name, url, timeout=300):
+    """
+    Fetch the latest commit of a git repository.
+
+    Only the commit of the reference is being fetched without any history.
+    Subsequent fetches reuse the objects of the previous fetch and only
+    transfer a single pack with the changes.
+
+    :param str repository_name: The repository name
+    :param str url: The repository URL
+    :param int timeout: The timeout for each git command
+    :returns: The hash of the fetched commit
+    :rtype: str
+    :raises RuntimeError: if git isn't available or a git command fails
+    """
+    remote_url, ref = parse_git_url(url)
+    clone_path = get_git_clone_path(repository_name=repository_name)
+    if not (clone_path / 'HEAD').exists():
+        os.makedirs(str(clone_path), exist_ok=True)
+        _git(clone_path, 'init', '--bare', '--quiet', timeout=timeout)
+    _git(
+        clone_path, 'fetch', '--depth=1', '--no-tags', '--quiet', '--',
+        remote_url, ref, timeout=timeout)
+    commit = _git(
+        clone_path, 'rev-parse', '--verify', 'FETCH_HEAD^{commit}',
+        timeout=timeout).decode().strip()
+    # keep the objects of the fetched commit and drop unreferenced ones
+    _git(
+        clone_path, 'update-ref', 'refs/heads/mixin', commit,
+        timeout=timeout)
+    _git(clone_path, 'gc', '--auto', '--quiet', timeout=timeout)
+    return commit
+
+
+def get_git_mixin_files(*, repository_name, commit, timeout=300):
+    """
+    Get the mixin files of a fetched commit.
+
+    Files in directories starting with a dot are being ignored like when
+    crawling the mixin path.
+
+    :param str repository_name: The repository name
+    :param str commit: The hash of the commit
+    :param int timeout: The timeout for each git command
+    :returns: The list of tuples with the relative path and the content of
+      each mixin file
+    :rtype: list
+    :raises RuntimeError: if git isn't available or a git command fails
+    """
+    clone_path = get_git_clone_path(repository_name=repository_name)
+    output = _git(
+        clone_path, 'ls-tree', '-r', '-z', commit, timeout=timeout)
+    paths = []
+    objects = []
+    for line in output.decode().split('\0'):
+        if not line:
+            continue
+        info, path = line.split('\t', 1)
+        _, object_type, object_name = info.split(' ')
+        if object_type != 'blob' or not path.endswith('.mixin'):
+            continue
+        if any(part.startswith('.') for part in path.split('/')[:-1]):
+            continue
+        paths.append(path)
+        objects.append(object_name)
+    if not objects:
+        return []
+
+    # read the content of all files with a single process
+    output = _git(
+        clone_path, 'cat-file', '--batch', timeout=timeout,
+        input=''.join(o + '\n' for o in objects).encode())
+    mixin_files = []
+    offset = 0
+    for path in paths:
+        header_end = output.index(b'\n', offset)
+        size = int(output[offset:header_end].split(b' ')[2])
+        content = output[header_end + 1:header_end + 1 + size]
+        # the content is followed by a newline
+        offset = header_end + 1 + size + 1
+        mixin_files.append((path, content.decode('utf-8')))
+    return mixin_files
+
+
+def _git(clone_path, *args, timeout, input=None):  # noqa: A002
+    git = shutil.which('git')
+    if git is None:
+        raise RuntimeError(
+            'Could not find the git executable to fetch the repository')
+    env = dict(os.environ)
+    # fail instead of waiting for credentials
+    env['GIT_TERMINAL_PROMPT'] = '0'
+    cmd = [git, '--git-dir', str(clone_path)] + list(args)
+    try:
+        result = subprocess.run(
+            cmd, input=input, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            env=env, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(
+            "The git command '{cmd}' timed out".format(cmd=' '.join(args)))
+    if result.returncode:
+        stderr = result.stderr.decode(errors='replace').strip()
+        raise RuntimeError(
+            "The git command '{cmd}' failed: {stderr}".format(
+                cmd=' '.join(args), stderr=stderr))
+    return result.stdout
@@ -0,0 +1,414 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+# The networking modules are only imported when the server is being
+# queried or started.
+
+from collections import OrderedDict
+import os
+from pathlib import Path
+import sys
+import time
+
+from colcon_core.location import get_config_path
+from colcon_core.logging import colcon_logger
+import colcon_mixin.mixin
+from colcon_mixin.mixin import COLCON_MIXIN_INDEX_SERVER
+from colcon_mixin.mixin import get_mixin_locations
+from colcon_mixin.mixin import get_mixins
+from colcon_mixin.mixin import invalidate_mixin_locations
+from colcon_mixin.mixin import MixinIndex
+
+logger = colcon_logger.getChild(__name__)
+
+"""The version of the protocol between the client and the server"""
+PROTOCOL_VERSION = 1
+
+"""The idle timeout in seconds of a server started on demand"""
+ON_DEMAND_IDLE_TIMEOUT = 60 * 60
+
+
+def get_index_server_socket_path(*, create=False):
+    """
+    Get the path of the Unix domain socket of the mixin index server.
+
+    The socket is located in the runtime directory of the user and its name
+    depends on the mixin locations, so each configuration has its own server.
+    Without a runtime directory a private directory in the temporary
+    directory is being used, which is only created when a server is started.
+
+    :param bool create: The flag if the private directory should be created
+      if it doesn't exist
+    :returns: The path, None if Unix domain sockets aren't supported or no
+      private directory is available
+    :rtype: Path
+    """
+    import socket
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir or not os.path.isdir(runtime_dir):
+        import tempfile
+        uid = os.getuid()
+        runtime_dir = os.path.join(
+            tempfile.gettempdir(), 'colcon-mixin-{uid}'.format_map(locals()))
+        try:
+            if create:
+                os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+            stat = os.stat(runtime_dir)
+        except OSError:
+            # without the directory no server can be running
+            return None
+        # the directory must not be accessible by other users
+        if stat.st_uid != uid or stat.st_mode & 0o077:
+            return None
+
+    import hashlib
+    locations = get_mixin_locations()
+    key = hashlib.sha256('\0'.join(
+        str(path) for path in (
+            (locations.mixin_path_absolute, ) +
+            locations.additional_paths + locations.shared_paths)
+    ).encode()).hexdigest()[:16]
+    return Path(runtime_dir) / 'colcon-mixin-{key}.sock'.format_map(locals())
+
+
+def create_index_snapshot(mixins_by_verb):
+    """
+    Create a snapshot of the mixin index which can be encoded as JSON.
+
+    :param mixins_by_verb: The mixin index or a nested dictionary of mixins
+      grouped by the verb
+    :returns: The dictionary mapping the dot separated verb to a dictionary
+      mapping the mixin names to a dictionary with the `args` and the
+      `origins` of the mixin, the first origin being the one in effect
+    :rtype: dict
+    """
+    get_origin = getattr(mixins_by_verb, 'get_origin', None)
+    snapshot = OrderedDict()
+    for verb in sorted(mixins_by_verb.keys()):
+        mixins = snapshot['.'.join(verb)] = OrderedDict()
+        for name in sorted(mixins_by_verb[verb].keys()):
+            origin = get_origin(verb, name) if get_origin else None
+            mixins[name] = {
+                'args': OrderedDict(mixins_by_verb[verb][name].items()),
+                'origins': [
+                    str(o) for o in origin.get_chain()] if origin else [],
+            }
+    return snapshot
+
+
+def get_index_snapshot():
+    """
+    Get the snapshot of the mixin index.
+
+    The snapshot is requested from the mixin index server if it is running,
+    otherwise the mixins are being loaded directly.
+
+    :returns: The snapshot as returned by :func:`create_index_snapshot`
+    :rtype: dict
+    """
+    snapshot = query_index_server('snapshot')
+    if snapshot is None:
+        snapshot = create_index_snapshot(get_mixins())
+    return snapshot
+
+
+def get_served_mixins():
+    """
+    Get the mixins from the mixin index server.
+
+    The origins of the mixins aren't available.
+
+    :returns: The mixin index, None if the server isn't running
+    :rtype: MixinIndex
+    """
+    snapshot = query_index_server('snapshot')
+    if snapshot is None:
+        return None
+    index = MixinIndex()
+    for verb, mixins in snapshot.items():
+        for name, mixin in mixins.items():
+            index.set_mixin(tuple(verb.split('.')), name, mixin['args'])
+    return index
+
+
+def query_index_server(method, *, timeout=1.0, start_on_demand=True):
+    """
+    Query the mixin index server.
+
+    If the server isn't running and the environment variable
+    `COLCON_MIXIN_INDEX_SERVER` is set it is being started in the background
+    for subsequent queries.
+
+    :param str method: The method, either `ping` or `snapshot`
+    :param float timeout: The timeout for connecting and receiving the result
+    :param bool start_on_demand: The flag if the server should be started if
+      it isn't running and the environment variable is set
+    :returns: The result, None if the server isn't running or failed to
+      respond
+    """
+    start_on_demand = start_on_demand and \
+        os.environ.get(COLCON_MIXIN_INDEX_SERVER.name) == '1'
+    socket_path = get_index_server_socket_path()
+    if socket_path is None:
+        if start_on_demand:
+            start_index_server()
+        return None
+    import json
+    import socket
+    request = {'version': PROTOCOL_VERSION, 'method': method}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(str(socket_path))
+            s.sendall(json.dumps(request).encode() + b'\n')
+            with s.makefile('rb') as h:
+                response = json.loads(h.readline().decode())
+    except (FileNotFoundError, ConnectionRefusedError):
+        if start_on_demand:
+            start_index_server()
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug(
+            "Failed to query the mixin index server '%s': %s" %
+            (socket_path, e))
+        return None
+    if 'error' in response:
+        logger.debug(
+            "The mixin index server '%s' failed: %s" %
+            (socket_path, response['error']))
+        return None
+    return response.get('result')
+
+
+def start_index_server():
+    """Start the mixin index server in the background."""
+    if get_index_server_socket_path(create=True) is None:
+        return
+    import subprocess
+    env = dict(os.environ)
+    # the server must use the same configuration path
+    env['COLCON_HOME'] = str(get_config_path())
+    # the server must not start another server itself
+    env.pop(COLCON_MIXIN_INDEX_SERVER.name, None)
+    try:
+        subprocess.Popen(
+            [
+                sys.executable, '-m', 'colcon_mixin.mixin.index_server',
+                '--idle-timeout', str(ON_DEMAND_IDLE_TIMEOUT)],
+            env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        logger.debug('Failed to start the mixin index server: %s' % e)
+
+
+class _ServedIndex:
+    """The snapshot of the mixin index which is reloaded when it changes."""
+
+    __slots__ = ('poll_interval', 'snapshot', '_state', '_last_poll')
+
+    def __init__(self, poll_interval):  # noqa: D107
+        self.poll_interval = poll_interval
+        self.snapshot = None
+        self._state = None
+        self._last_poll = None
+
+    def get_snapshot(self):
+        now = time.monotonic()
+        if (
+            self._last_poll is None or
+            now - self._last_poll >= self.poll_interval
+        ):
+            self._last_poll = now
+            state = _get_locations_state()
+            if state != self._state:
+                self._state = state
+                self.snapshot = _load_snapshot()
+        return self.snapshot
+
+
+def _get_locations_state():
+    # the modification times of all directories and mixin files, a changed
+    # directory mtime indicates added, removed or renamed files
+    invalidate_mixin_locations()
+    locations = get_mixin_locations()
+    state = []
+    for location in (
+        locations.shared_paths + (locations.mixin_path, ) +
+        locations.additional_paths
+    ):
+        for dirpath, dirnames, filenames in os.walk(
+            str(location), followlinks=True
+        ):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            try:
+                state.append((dirpath, os.stat(dirpath).st_mtime_ns))
+                for filename in sorted(filenames):
+                    if filename.endswith('.mixin'):
+                        stat = os.stat(os.path.join(dirpath, filename))
+                        state.append(
+                            (filename, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+    return state
+
+
+def _load_snapshot():
+    colcon_mixin.mixin.mixins_by_verb = None
+    return create_index_snapshot(get_mixins())
+
+
+def _create_index_server(socket_path, index, idle_timeout):
+    import json
+    import socketserver
+
+    class IndexRequestHandler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline().decode())
+                if request.get('version') != PROTOCOL_VERSION:
+                    raise ValueError('Unsupported protocol version')
+                method = request.get('method')
+                if method == 'ping':
+                    response = {'result': 'pong'}
+                elif method == 'snapshot':
+                    response = {'result': index.get_snapshot()}
+                else:
+                    raise ValueError(
+                        "Unknown method '{method}'".format_map(locals()))
+            except Exception as e:  # noqa: B902
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+
+    class IndexServer(socketserver.UnixStreamServer):
+
+        idle = False
+
+        def handle_timeout(self):
+            self.idle = True
+
+    server = IndexServer(str(socket_path), IndexRequestHandler)
+    server.timeout = idle_timeout
+    return server
+
+
+def serve_mixin_index(*, poll_interval=1.0, idle_timeout=3600):
+    """
+    Serve the mixin index over a Unix domain socket.
+
+    The mixin directories are being polled for changes at most once per
+    poll interval when a request is being handled.
+
+    :param float poll_interval: The minimum number of seconds between
+      checking the mixin directories for changes
+    :param float idle_timeout: The number of seconds without a request after
+      which the server exits, None to never exit
+    :returns: False if another server is already running, otherwise True
+    :rtype: bool
+    :raises RuntimeError: if Unix domain sockets aren't supported
+    """
+    socket_path = get_index_server_socket_path(create=True)
+    if socket_path is None:
+        raise RuntimeError(
+            'Unix domain sockets or a private runtime directory are not '
+            'available')
+    lock = _lock_index_server(socket_path)
+    if lock is None:
+        return False
+    try:
+        return _serve_mixin_index(socket_path, poll_interval, idle_timeout)
+    finally:
+        lock.close()
+
+
+def _lock_index_server(socket_path):
+    # the lock is held by the serving process until it exits, so only a
+    # single server can bind the socket and a socket left behind by a server
+    # which didn't exit cleanly can be removed safely
+    lock_path = socket_path.with_name(socket_path.name + '.lock')
+    try:
+        import fcntl
+    except ImportError:
+        # without file locks only a socket refusing connections is stale,
+        # a server which is busy e.g. reloading the index might time out
+        if not _is_socket_stale(socket_path):
+            return None
+        return open(str(lock_path), 'a')
+    lock = open(str(lock_path), 'a')
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        # another server is running or starting
+        lock.close()
+        return None
+    return lock
+
+
+def _is_socket_stale(socket_path):
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(1.0)
+        try:
+            s.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return True
+        except OSError:
+            return False
+    return False
+
+
+def _serve_mixin_index(socket_path, poll_interval, idle_timeout):
+    # remove the socket of a server which didn't exit cleanly
+    try:
+        os.remove(str(socket_path))
+    except FileNotFoundError:
+        pass
+
+    index = _ServedIndex(poll_interval)
+    try:
+        server = _create_index_server(socket_path, index, idle_timeout)
+    except OSError as e:
+        logger.debug(
+            "Failed to bind the mixin index server to '%s': %s" %
+            (socket_path, e))
+        return False
+    inode = os.stat(str(socket_path)).st_ino
+    try:
+        # load the index after binding the socket, clients connecting in the
+        # meantime wait for it or time out but never start another server
+        index.get_snapshot()
+        while not server.idle:
+            server.handle_request()
+    finally:
+        server.server_close()
+        # only remove the socket if it hasn't been replaced by another server
+        try:
+            if os.stat(str(socket_path)).st_ino == inode:
+                os.remove(str(socket_path))
+        except OSError:
+            pass
+    return True
+
+
+def main(argv=None):
+    """
+    Serve the mixin index when being started on demand.
+
+    :param list argv: The command line arguments
+    """
+    import argparse
+    from colcon_core.location import set_default_config_path
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--idle-timeout', type=float)
+    args = parser.parse_args(argv)
+    # same as colcon itself, the client passes its configuration path
+    set_default_config_path(
+        path=(Path('~') / '.colcon').expanduser(), env_var='COLCON_HOME')
+    serve_mixin_index(idle_timeout=args.idle_timeout)
+
+
+if __name__ == '__main__':
+    main()
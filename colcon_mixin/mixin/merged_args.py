@@ -0,0 +1,195 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from collections import OrderedDict
+import os
+from pathlib import Path
+
+from colcon_core.environment_variable import EnvironmentVariable
+from colcon_core.logging import colcon_logger
+
+logger = colcon_logger.getChild(__name__)
+
+"""Environment variable to persist merged mixin arguments across invocations"""
+COLCON_MIXIN_ARGS_CACHE = EnvironmentVariable(
+    'COLCON_MIXIN_ARGS_CACHE',
+    'Provide a file to persist the merged arguments of used combinations of '
+    'mixins across invocations')
+
+"""The version of the format of the persisted cache file"""
+CACHE_FORMAT_VERSION = 5
+
+_merged_args_cache = None
+
+
+def get_merged_args_key(verb, mixin_names, fingerprint, schema_fingerprint):
+    """
+    Get the cache key for a stack of mixins.
+
+    :param tuple verb: The verb
+    :param mixin_names: The ordered names of the selected mixins
+    :param str fingerprint: The fingerprint of the mixin index
+    :param str schema_fingerprint: The fingerprint of the arguments of the verb
+      the mixin arguments are being validated against
+    :rtype: str
+    """
+    import hashlib
+    h = hashlib.sha256()
+    for part in (
+        '.'.join(verb), '\0'.join(mixin_names), fingerprint,
+        schema_fingerprint,
+    ):
+        h.update(part.encode('utf-8'))
+        h.update(b'\1')
+    return h.hexdigest()
+
+
+def merge_mixin_args(mixins, destinations):
+    """
+    Merge the arguments of a stack of mixins.
+
+    The result is equivalent to applying the mixins one after another:
+    the first mixin providing a value for a destination replaces the default
+    value, later mixins prepend their values to lists and are skipped for
+    other types.
+    The arguments of the mixins must have been validated before, see
+    :func:`colcon_mixin.mixin.schema.normalize_mixin_args`.
+
+    :param mixins: The ordered arguments of the selected mixins
+    :param dict destinations: The mapping of argument keys to destinations
+    :returns: The list of merged arguments, each being a list of the mixin
+      key, the destination and the value
+    :rtype: list
+    """
+    merged = OrderedDict()
+    for mixin_args in mixins:
+        for mixin_key, mixin_value in mixin_args.items():
+            arg_key = destinations[mixin_key]
+            if arg_key not in merged or merged[arg_key][2] is None:
+                merged[arg_key] = [mixin_key, arg_key, mixin_value]
+            elif isinstance(merged[arg_key][2], list):
+                merged[arg_key][2] = mixin_value + merged[arg_key][2]
+    return list(merged.values())
+
+
+class MergedArgsCache:
+    """
+    A least recently used cache of merged mixin arguments.
+
+    The entries are kept in memory and optionally persisted in a JSON file to
+    be reused across invocations.
+    """
+
+    def __init__(self, *, maxsize=128, path=None):
+        """
+        Construct a MergedArgsCache.
+
+        :param int maxsize: The maximum number of entries
+        :param Path path: The path of the file to persist the entries in
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self._entries = OrderedDict()
+        self._loaded = path is None
+
+    def get(self, key):
+        """
+        Get the merged arguments for a key.
+
+        :param str key: The cache key
+        :returns: The merged arguments or None if the key isn't cached
+        """
+        self._load()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """
+        Store the merged arguments for a key.
+
+        The least recently used entries are evicted when the maximum size is
+        exceeded.
+
+        :param str key: The cache key
+        :param list entry: The merged arguments
+        """
+        self._load()
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        self._save()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            content = self.path.read_text()
+        except FileNotFoundError:
+            return
+        except OSError as e:  # noqa: F841
+            logger.debug(
+                "Failed to read mixin cache '{self.path}': {e}"
+                .format_map(locals()))
+            return
+        import json
+        try:
+            data = json.loads(content)
+        except ValueError as e:  # noqa: F841
+            logger.debug(
+                "Ignoring mixin cache '{self.path}' since it failed to parse: "
+                '{e}'.format_map(locals()))
+            return
+        if (
+            not isinstance(data, dict) or
+            data.get('version') != CACHE_FORMAT_VERSION
+        ):
+            return
+        for key, entry in data.get('entries', []):
+            self._entries[key] = entry
+
+    def _save(self):
+        if self.path is None:
+            return
+        import json
+        entries = []
+        for key, entry in self._entries.items():
+            try:
+                json.dumps(entry)
+            except (TypeError, ValueError):
+                # skip entries with values which can't be represented in JSON
+                continue
+            entries.append([key, entry])
+        data = {'version': CACHE_FORMAT_VERSION, 'entries': entries}
+        # write a temporary file and rename it to replace the cache atomically
+        temp_path = self.path.with_name(
+            '.{self.path.name}.{pid}'.format(self=self, pid=os.getpid()))
+        try:
+            os.makedirs(str(self.path.parent), exist_ok=True)
+            with temp_path.open('w') as h:
+                json.dump(data, h)
+            os.replace(str(temp_path), str(self.path))
+        except OSError as e:  # noqa: F841
+            logger.debug(
+                "Failed to write mixin cache '{self.path}': {e}"
+                .format_map(locals()))
+
+
+def get_merged_args_cache():
+    """
+    Get the cache of merged mixin arguments.
+
+    The cache is being created on the first call and persisted in the file
+    specified by the environment variable `COLCON_MIXIN_ARGS_CACHE` if set.
+
+    :rtype: MergedArgsCache
+    """
+    global _merged_args_cache
+    if _merged_args_cache is None:
+        path = os.environ.get(COLCON_MIXIN_ARGS_CACHE.name)
+        _merged_args_cache = MergedArgsCache(
+            path=Path(path) if path else None)
+    return _merged_args_cache
@@ -0,0 +1,124 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+
+"""The supported formats of the metrics file."""
+METRICS_FORMATS = ('json', 'prometheus')
+
+_PROMETHEUS_PREFIX = 'colcon_mixin_update_'
+
+# the metrics of each fetched URL: name, key, help
+_URL_METRICS = (
+    ('url_duration_seconds', 'duration',
+     'Total time spent fetching the URL including retries'),
+    ('url_connect_seconds', 'connect_time',
+     'Time until the response headers have been received including the '
+     'name resolution'),
+    ('url_transfer_seconds', 'transfer_time',
+     'Time spent transferring the content'),
+    ('url_bytes', 'bytes', 'Size of the fetched content'),
+    ('url_retries', 'retries', 'Number of retries'),
+)
+
+
+def format_metrics(metrics, metrics_format):
+    """
+    Format the metrics of an update.
+
+    :param dict metrics: The metrics of the update
+    :param str metrics_format: The format, one of :data:`METRICS_FORMATS`
+    :rtype: str
+    """
+    if metrics_format == 'json':
+        import json
+        return json.dumps(metrics, indent=2) + '\n'
+    if metrics_format == 'prometheus':
+        return _format_prometheus(metrics)
+    raise ValueError(
+        "Unsupported metrics format '{metrics_format}'".format_map(locals()))
+
+
+def write_metrics_file(path, metrics, metrics_format):
+    """
+    Write the metrics of an update to a file.
+
+    The file is being replaced atomically so that concurrent readers, e.g. a
+    metrics collector, never see a partially written file.
+
+    :param Path path: The path of the file
+    :param dict metrics: The metrics of the update
+    :param str metrics_format: The format, one of :data:`METRICS_FORMATS`
+    """
+    content = format_metrics(metrics, metrics_format)
+    temp_path = path.with_name(
+        '.{path.name}.{pid}'.format(path=path, pid=os.getpid()))
+    with temp_path.open('w') as h:
+        h.write(content)
+    os.replace(str(temp_path), str(path))
+
+
+def _format_prometheus(metrics):
+    lines = []
+
+    def add_metric(name, help_, samples):
+        name = _PROMETHEUS_PREFIX + name
+        lines.append('# HELP {name} {help_}'.format_map(locals()))
+        lines.append('# TYPE {name} gauge'.format_map(locals()))
+        for labels, value in samples:
+            if value is None:
+                continue
+            label_str = ','.join(
+                '{0}="{1}"'.format(k, _escape_label_value(v))
+                for k, v in labels)
+            if label_str:
+                label_str = '{' + label_str + '}'
+            lines.append('{name}{label_str} {value}'.format_map(locals()))
+
+    repositories = metrics.get('repositories', [])
+    add_metric(
+        'timestamp_seconds', 'Time when the update started',
+        [((), metrics.get('timestamp'))])
+    add_metric(
+        'duration_seconds', 'Time spent for the whole update',
+        [((), metrics.get('duration'))])
+    add_metric(
+        'return_code', 'Return code of the update',
+        [((), metrics.get('return_code'))])
+    add_metric(
+        'repository_success',
+        'Whether the repository has been updated or skipped successfully',
+        [
+            ((('repository', r['name']), ), int(r['status'] != 'failed'))
+            for r in repositories])
+    add_metric(
+        'repository_duration_seconds', 'Time spent updating the repository',
+        [
+            ((('repository', r['name']), ), r.get('duration'))
+            for r in repositories])
+    add_metric(
+        'repository_files', 'Number of mixin files by their modification',
+        [
+            ((('repository', r['name']), ('modification', modification)),
+             count)
+            for r in repositories
+            for modification, count in r.get('files', {}).items()])
+    for name, key, help_ in _URL_METRICS:
+        add_metric(name, help_, [
+            ((('repository', r['name']), ('url', u['url'])), u.get(key))
+            for r in repositories
+            for u in r.get('urls', [])])
+    add_metric(
+        'obsolete_files',
+        'Number of mixin files of unregistered repositories renamed to '
+        '*.obsolete',
+        [((), metrics.get('obsolete_files'))])
+    add_metric(
+        'pruned_files', 'Number of removed obsolete mixin files',
+        [((), metrics.get('pruned_files'))])
+    return '\n'.join(lines) + '\n'
+
+
+def _escape_label_value(value):
+    return str(value) \
+        .replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -2,6 +2,9 @@
 # Licensed under the Apache License, Version 2.0
 
 import argparse
+from collections import OrderedDict
+import copy
+import functools
 import os
 from pathlib import Path
 import sys
@@ -24,6 +27,16 @@ from colcon_core.logging import colcon_logger
 from colcon_core.plugin_system import satisfies_version
 from colcon_mixin.mixin import add_mixins
 from colcon_mixin.mixin import get_mixins
+from colcon_mixin.mixin import MixinIndex
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.mixin.completer import mixin_files_completer
+from colcon_mixin.mixin.merged_args import get_merged_args_cache
+from colcon_mixin.mixin.merged_args import get_merged_args_key
+from colcon_mixin.mixin.merged_args import merge_mixin_args
+from colcon_mixin.mixin.schema import format_mixin_error
+from colcon_mixin.mixin.schema import get_schema_fingerprint
+from colcon_mixin.mixin.schema import get_verb_schema
+from colcon_mixin.mixin.schema import normalize_mixin_args
 
 logger = colcon_logger.getChild(__name__)
 
@@ -64,6 +77,90 @@ else:
     VERB_BLACKLIST = VERB_BLOCKLIST
 
 
+class _VerbTree:
+    """
+    The "leaf" verbs of a parser hierarchy and if they match the blocklist.
+
+    The verbs are collected incrementally while parsers are being added.
+    """
+
+    __slots__ = ('parsers', 'blocked', '_pending', '_blocklist', '_trie')
+
+    def __init__(self):  # noqa: D107
+        # mapping of all "leaf" verbs to parsers
+        self.parsers = {}
+        # mapping of all "leaf" verbs to the flag if they match the blocklist
+        self.blocked = {}
+        # "leaf" verbs which haven't been returned by pop_pending() yet
+        self._pending = {}
+        self._blocklist = None
+        self._trie = None
+
+    def add_parser(self, verb, parser):
+        """
+        Add a parser.
+
+        The parent verb isn't a "leaf" verb anymore.
+
+        :param tuple verb: The verb
+        :param parser: The parser
+        """
+        parent_verb = verb[:-1]
+        for d in (self.parsers, self.blocked, self._pending):
+            d.pop(parent_verb, None)
+        self.update_blocklist()
+        self.parsers[verb] = parser
+        self.blocked[verb] = self._is_blocked(verb)
+        self._pending[verb] = parser
+
+    def update_blocklist(self):
+        """Update the blocklist decisions if the blocklist has changed."""
+        blocklist = frozenset(VERB_BLOCKLIST)
+        if blocklist == self._blocklist:
+            return
+        self._blocklist = blocklist
+        self._trie = _get_prefix_trie(blocklist)
+        for verb, parser in self.parsers.items():
+            self.blocked[verb] = self._is_blocked(verb)
+            # reconsider all verbs since some might not be blocked anymore
+            self._pending[verb] = parser
+
+    def pop_pending(self):
+        """
+        Get the "leaf" verbs added since the last call.
+
+        :returns: The mapping of verbs to parsers
+        :rtype: dict
+        """
+        pending = self._pending
+        self._pending = {}
+        return pending
+
+    def _is_blocked(self, verb):
+        # match all prefixes of the verb against the blocklist
+        # e.g. verb=(a,b,c) it checks against (a), (a,b), (a,b,c)
+        node = self._trie
+        for name in verb:
+            node = node.get(name)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+
+def _get_prefix_trie(verbs):
+    # nested dictionaries keyed by the verb names, the key None marks the end
+    # of a verb
+    trie = {}
+    for verb in verbs:
+        node = trie
+        for name in verb:
+            node = node.setdefault(name, {})
+        node[None] = True
+    return trie
+
+
 class MixinArgumentDecorator(
     DestinationCollectorDecorator, ActionCollectorDecorator
 ):
@@ -76,101 +173,132 @@ class MixinArgumentDecorator(
             parser,
             _have_args=set(),
             _mixin_actions=set(),
-            _parsers={},
-            _subparsers=[])
+            _verb=(),
+            _verb_tree=_VerbTree(),
+            _wrapped_defaults=_WrappedDefaults())
 
     def add_parser(self, *args, **kwargs):
-        """Collect association of parsers to their name."""
+        """Collect association of parsers to their verb."""
         parser = super().add_parser(*args, **kwargs)
-        self._parsers[args[0]] = parser
+        parser._verb = self._verb + (args[0], )
+        parser._verb_tree = self._verb_tree
+        parser._wrapped_defaults = self._wrapped_defaults
+        self._verb_tree.add_parser(parser._verb, parser)
         return parser
 
     def add_subparsers(self, *args, **kwargs):
-        """Collect all subparsers."""
+        """Pass the verb and verb tree to the subparsers."""
         subparser = super().add_subparsers(*args, **kwargs)
-        self._subparsers.append(subparser)
+        subparser._verb = self._verb
+        subparser._verb_tree = self._verb_tree
+        subparser._wrapped_defaults = self._wrapped_defaults
         return subparser
 
+    def add_argument_group(self, *args, **kwargs):
+        """Pass the record of wrapped default values to the group."""
+        group = super().add_argument_group(*args, **kwargs)
+        group._wrapped_defaults = self._wrapped_defaults
+        return group
+
+    def add_mutually_exclusive_group(self, *args, **kwargs):
+        """Pass the record of wrapped default values to the group."""
+        group = super().add_mutually_exclusive_group(*args, **kwargs)
+        group._wrapped_defaults = self._wrapped_defaults
+        return group
+
     def add_argument(self, *args, **kwargs):
         """Wrap default value in a custom class."""
+        wrapped_defaults = self._wrapped_defaults
+        wrapped = False
         if 'default' in kwargs:
             default_value = kwargs['default']
-            kwargs['default'] = _custom_wrap_default_value(default_value)
+            kwargs['default'], wrapped = wrapped_defaults.wrap(default_value)
             type_value = kwargs.get('type')
             if isinstance(default_value, str) and callable(type_value):
                 kwargs['type'] = _custom_wrap_type(type_value)
+                # the converted default value stays wrapped
+                wrapped = False
         # For store_`bool`, the default is the negation
         elif kwargs.get('action') == 'store_true':
-            kwargs['default'] = _custom_wrap_default_value(False)
+            kwargs['default'], wrapped = wrapped_defaults.wrap(False)
         elif kwargs.get('action') == 'store_false':
-            kwargs['default'] = _custom_wrap_default_value(True)
-        return super().add_argument(*args, **kwargs)
+            kwargs['default'], wrapped = wrapped_defaults.wrap(True)
+        action = super().add_argument(*args, **kwargs)
+        if wrapped:
+            wrapped_defaults.destinations.add(action.dest)
+        return action
 
     def set_defaults(self, **kwargs):
         """Wrap default values in a custom class."""
-        return self._parser.set_defaults(
-            **{k: _custom_wrap_default_value(v) for (k, v) in kwargs.items()})
+        wrapped_defaults = self._wrapped_defaults
+        defaults = {}
+        for k, v in kwargs.items():
+            defaults[k], wrapped = wrapped_defaults.wrap(v)
+            if wrapped:
+                wrapped_defaults.destinations.add(k)
+        return self._parser.set_defaults(**defaults)
 
     def parse_known_args(self, *args, **kwargs):
         """Unwrap default values."""
         known_args, remaining_args = self._parser.parse_known_args(
             *args, **kwargs)
         # undo default value wrapping injected in the add_argument() method
-        for k, v in known_args.__dict__.items():
-            if is_default_value(v):
-                setattr(known_args, k, _custom_unwrap_default_value(v))
+        self._wrapped_defaults.unwrap(known_args)
         return (known_args, remaining_args)
 
     def parse_args(self, *args, **kwargs):
         """Add mixin argument for each parser."""
         # mapping of all "leaf" verbs to parsers
-        def collect_parsers_by_verb(root, parsers, parent_verbs=()):
-            found_any = False
-            for sp in root._subparsers:
-                for name, p in sp._parsers.items():
-                    verbs = parent_verbs + (name, )
-                    found_children = collect_parsers_by_verb(p, parsers, verbs)
-                    # only add verbs which don't have subverbs
-                    if not found_children:
-                        parsers[verbs] = p
-                        found_any = True
-            return found_any
-        parsers = {}
-        collect_parsers_by_verb(self, parsers)
-
-        mixins_by_verb = get_mixins()
-
-        # add mixin arguments to these parsers
-        # doing this here instead of in the add_parser() method makes sure
-        # the arguments are documented at the very end of the help message
+        verb_tree = self._verb_tree
+        verb_tree.update_blocklist()
+        parsers = verb_tree.parsers
+
+        mixins_by_verb = None
+        if '_ARGCOMPLETE' in os.environ:
+            # when completing only the mixin names are needed which might be
+            # provided by the mixin index server without loading all mixins
+            from colcon_mixin.mixin.index_server import get_served_mixins
+            mixins_by_verb = get_served_mixins()
+        if mixins_by_verb is None:
+            mixins_by_verb = get_mixins()
+
+        # add mixin arguments to the parsers which have been added since the
+        # last call, doing this here instead of in the add_parser() method
+        # makes sure the arguments are documented at the very end of the help
+        # message
         groups = {}
-        for k, p in parsers.items():
-            # match all slices starting from index 0 of k against the blocklist
-            # e.g. k=(a,b,c) it checks against (a), (a,b), (a,b,c)
-            k_prefixes = {k[0:index] for index in range(1, len(k) + 1)}
-            if not k_prefixes & VERB_BLOCKLIST and p not in self._have_args:
+        new_parsers = verb_tree.pop_pending()
+        for k, p in new_parsers.items():
+            if not verb_tree.blocked[k] and p not in self._have_args:
                 groups[p] = self._add_mixin_argument_group(p)
                 self._have_args.add(p)
 
         # add dummy --mixin argument to prevent parse_known_args to interpret
         # --mixin arguments as --mixin-files
         mixin_arguments = {}
-        for verb, p in parsers.items():
+        for verb, p in new_parsers.items():
             if p in groups:
                 mixin_arguments[verb] = self._add_mixin_argument(
                     p, groups[p], verb)
 
-        parsers_to_suppress = [self._parser] + list(parsers.values())
-        omit = self._mixin_actions
-        with SuppressUsageOutput(parsers_to_suppress):
-            with SuppressTypeConversions(parsers_to_suppress, omit):
-                with SuppressRequiredActions(parsers_to_suppress, omit):
-                    known_args, _ = self._parser.parse_known_args(
-                        *args, **kwargs)
-
-        for mixin_file in (getattr(known_args, 'mixin_files', None) or []):
-            # add mixins from explicitly provided file
-            add_mixins(Path(mixin_file), mixins_by_verb)
+        # without any mixins and without any arguments which might select
+        # mixins or provide mixin files the speculative parsing is skipped
+        fast_path = not mixins_by_verb and \
+            not self._may_request_mixins(args, kwargs)
+        if not fast_path:
+            parsers_to_suppress = [self._parser] + list(parsers.values())
+            omit = self._mixin_actions
+            with SuppressUsageOutput(parsers_to_suppress):
+                with SuppressTypeConversions(parsers_to_suppress, omit):
+                    with SuppressRequiredActions(parsers_to_suppress, omit):
+                        known_args, _ = self._parser.parse_known_args(
+                            *args, **kwargs)
+
+            for mixin_file in (
+                getattr(known_args, 'mixin_files', None) or []
+            ):
+                # add mixins from explicitly provided file
+                add_mixins(Path(mixin_file), mixins_by_verb)
 
         # update the --mixin argument help and completer with available mixins
         for verb, argument in mixin_arguments.items():
@@ -178,6 +306,11 @@ class MixinArgumentDecorator(
 
         args = self._parser.parse_args(*args, **kwargs)
 
+        if fast_path:
+            # mixin files might still be provided by a default value
+            for mixin_file in (getattr(args, 'mixin_files', None) or []):
+                add_mixins(Path(mixin_file), mixins_by_verb)
+
         # update args based on selected mixins
         if 'mixin_verb' in args:
             mixins = mixins_by_verb.get(args.mixin_verb, {})
@@ -188,17 +321,49 @@ class MixinArgumentDecorator(
                         "Mixin '{mixin}' is not available for '{context}'"
                         .format_map(locals()))
                 mixin_args = mixins[mixin]
-                logger.debug(
-                    "Using mixin '{mixin}': {mixin_args}".format_map(locals()))
-                self._update_args(args, mixin_args, '.'.join(args.mixin_verb))
+                origin = None
+                if isinstance(mixins_by_verb, MixinIndex):
+                    origin = mixins_by_verb.get_origin(
+                        args.mixin_verb, mixin)
+                if origin is None:
+                    logger.debug(
+                        "Using mixin '{mixin}': {mixin_args}"
+                        .format_map(locals()))
+                else:
+                    chain = ' <- '.join(map(str, origin.get_chain()))
+                    logger.debug(
+                        "Using mixin '{mixin}' from {chain}: {mixin_args}"
+                        .format_map(locals()))
+            if args.mixin:
+                merged_args = self._get_merged_args(
+                    args.mixin_verb, args.mixin, mixins_by_verb)
+                self._update_args(args, merged_args)
 
         # undo default value wrapping injected in the add_argument() method
-        for k, v in args.__dict__.items():
-            if is_default_value(v):
-                setattr(args, k, _custom_unwrap_default_value(v))
+        self._wrapped_defaults.unwrap(args)
 
         return args
 
+    def _may_request_mixins(self, args, kwargs):
+        """Check if the command line arguments might refer to mixins."""
+        argv = args[0] if args else kwargs.get('args')
+        if argv is None:
+            argv = sys.argv[1:]
+        fromfile_prefix_chars = self._parser.fromfile_prefix_chars or ''
+        for token in argv:
+            if token == '--':
+                break
+            # arguments read from files aren't known yet
+            if token[:1] and token[:1] in fromfile_prefix_chars:
+                return True
+            # argparse also accepts unambiguous abbreviations of long options
+            option = token.split('=', 1)[0]
+            if len(option) > 2 and any(
+                o.startswith(option) for o in ('--mixin', '--mixin-files')
+            ):
+                return True
+        return False
+
     def _add_mixin_argument_group(self, parser):
         group = parser.add_argument_group(
             title='Mixin predefined sets of command line parameters')
@@ -208,12 +373,7 @@ class MixinArgumentDecorator(
             type=_argparse_existing_file,
             help='Additional files providing mixins')
         self._mixin_actions.add(argument)
-        try:
-            from argcomplete.completers import FilesCompleter
-        except ImportError:
-            pass
-        else:
-            argument.completer = FilesCompleter(['mixin'])
+        argument.completer = mixin_files_completer
 
         return group
 
@@ -243,24 +403,42 @@ class MixinArgumentDecorator(
         else:
             descriptions = 'No mixins are available for this verb'
         argument.help = descriptions
-
-        try:
-            from argcomplete.completers import ChoicesCompleter
-        except ImportError:
-            pass
+        argument.completer = get_choices_completer(mixins.keys)
+
+    def _get_merged_args(self, verb, mixin_names, mixins_by_verb):
+        schema = get_verb_schema(self, verb) or OrderedDict()
+        schema_fingerprint = get_schema_fingerprint(schema)
+        # each mixin is only being validated once, invalid arguments are
+        # reported at that time and dropped
+        if isinstance(mixins_by_verb, MixinIndex):
+            mixins = [
+                mixins_by_verb.get_valid_args(
+                    verb, name, schema, schema_fingerprint)
+                for name in mixin_names]
         else:
-            argument.completer = ChoicesCompleter(mixins.keys())
-
-    def _update_args(self, args, mixin_args, context):
-        destinations = self.get_destinations()
-        for mixin_key, mixin_value in mixin_args.items():
-            if mixin_key not in destinations:
-                logger.warning(
-                    "Mixin key '{mixin_key}' is not a valid argument for "
-                    "'{context}'".format_map(locals()))
-                continue
-
-            arg_key = destinations[mixin_key]
+            mixins = [
+                _get_valid_args(verb, name, mixins_by_verb[verb][name], schema)
+                for name in mixin_names]
+        destinations = OrderedDict(
+            (key, action.dest) for key, action in schema.items())
+
+        # only indices providing a fingerprint of their content can be cached
+        fingerprint = getattr(mixins_by_verb, 'fingerprint', None)
+        if fingerprint is None:
+            return merge_mixin_args(mixins, destinations)
+        cache = get_merged_args_cache()
+        key = get_merged_args_key(
+            verb, mixin_names, fingerprint, schema_fingerprint)
+        merged_args = cache.get(key)
+        if merged_args is None:
+            merged_args = merge_mixin_args(mixins, destinations)
+            cache.put(key, merged_args)
+        return merged_args
+
+    def _update_args(self, args, merged_args):
+        for mixin_key, arg_key, mixin_value in merged_args:
+            # avoid that modifications of the arguments affect cached values
+            mixin_value = copy.deepcopy(mixin_value)
             arg_value = getattr(args, arg_key)
             if arg_value is None or is_default_value(arg_value):
                 logger.debug(
@@ -281,36 +459,77 @@ class MixinArgumentDecorator(
                     .format_map(locals()))
 
 
+def _get_valid_args(verb, name, mixin_args, schema):
+    args, errors = normalize_mixin_args(mixin_args, schema)
+    for mixin_key, reason in errors:
+        logger.warning(
+            format_mixin_error('.'.join(verb), name, mixin_key, reason))
+    return args
+
+
+class _WrappedDefaults:
+    """
+    The record of default values which have been wrapped.
+
+    Only the values of the recorded destinations need to be unwrapped after
+    parsing.
+    Default values which have already been wrapped by someone else are
+    remembered to not unwrap them.
+    """
+
+    __slots__ = ('destinations', '_foreign_values')
+
+    def __init__(self):  # noqa: D107
+        # destinations with a default value wrapped by this decorator
+        self.destinations = set()
+        # mapping of ids to default values wrapped by someone else, the values
+        # are kept to ensure the ids stay unique
+        self._foreign_values = {}
+
+    def wrap(self, value):
+        """
+        Wrap a default value.
+
+        :param value: The default value
+        :returns: The wrapped value and a flag if it has been wrapped by this
+          call
+        :rtype: tuple
+        """
+        if is_default_value(value):
+            # avoid double wrapping and remember the value to not unwrap it
+            self._foreign_values[id(value)] = value
+            return value, False
+        wrapped_value = wrap_default_value(value)
+        return wrapped_value, wrapped_value is not value
+
+    def unwrap(self, args):
+        """
+        Unwrap the default values of the recorded destinations.
+
+        :param args: The namespace of parsed arguments
+        """
+        values = args.__dict__
+        for dest in self.destinations:
+            value = values.get(dest)
+            if (
+                is_default_value(value) and
+                id(value) not in self._foreign_values
+            ):
+                values[dest] = unwrap_default_value(value)
+
+
 def _custom_wrap_type(original_type):
+    # keep a reference to the original type to identify the argument type
+    @functools.wraps(original_type)
     def _impl(value):
         is_default = is_default_value(value)
         res = original_type(value)
         if is_default:
-            res = _custom_wrap_default_value(value)
+            res = value
         return res
     return _impl
 
 
-def _custom_wrap_default_value(value):
-    try:
-        value = wrap_default_value(value)
-    except ValueError:
-        # avoid double wrapping and mark those default value to not unwrap them
-        value._mixin_argument_already_default_value = True
-    return value
-
-
-def _custom_unwrap_default_value(value):
-    assert is_default_value(value)
-    try:
-        delattr(value, '_mixin_argument_already_default_value')
-        # don't unwrap default values which haven't been wrapped by
-        # _custom_wrap_default_value
-    except AttributeError:
-        value = unwrap_default_value(value)
-    return value
-
-
 def _argparse_existing_file(path):
     if not os.path.exists(path):
         raise argparse.ArgumentTypeError(
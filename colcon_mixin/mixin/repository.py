@@ -2,15 +2,14 @@
 # Licensed under the Apache License, Version 2.0
 
 import os
-import socket
+import shutil
 import time
-from urllib.error import HTTPError
-from urllib.error import URLError
-from urllib.request import urlopen
 
 from colcon_core.location import get_config_path
 from colcon_core.logging import colcon_logger
+from colcon_mixin.mixin import COLCON_MIXIN_GC_THRESHOLD
 from colcon_mixin.mixin import get_mixin_files
+from colcon_mixin.mixin import get_mixin_locations
 from colcon_mixin.mixin import get_mixin_path
 import yaml
 
@@ -51,6 +50,113 @@ def set_repositories(repositories):
         h.write(data)
 
 
+def get_repository_url(repository):
+    """
+    Get the index URL of a registered repository.
+
+    A repository is either described by the URL of its index or by a
+    dictionary with the URL under the key `url` and optional settings, e.g.
+    `max-age`.
+
+    :param repository: The value describing the repository
+    :rtype: str
+    """
+    if isinstance(repository, dict):
+        return repository.get('url')
+    return repository
+
+
+def get_repository_max_age(repository):
+    """
+    Get the maximum age of a registered repository before it is updated.
+
+    :param repository: The value describing the repository
+    :returns: The maximum age in seconds or None if it isn't configured
+    :rtype: float
+    :raises ValueError: if the configured value isn't a valid duration
+    """
+    if not isinstance(repository, dict) or \
+            repository.get('max-age') is None:
+        return None
+    return parse_duration(repository['max-age'])
+
+
+"""The name of the file storing metadata within a repository directory."""
+REPOSITORY_METADATA_FILENAME = '.metadata.yaml'
+
+
+def get_repository_metadata(*, repository_name):
+    """
+    Get the metadata stored by the last successful update of a repository.
+
+    :param str repository_name: The repository name
+    :returns: The metadata, e.g. the index `url`, the time of the
+      `last_update` in seconds since the epoch, the manifest of the mixin
+      `files` and the names of the kept `obsolete_files`
+    :rtype: dict
+    """
+    path = get_mixin_path() / repository_name / REPOSITORY_METADATA_FILENAME
+    try:
+        content = path.read_text()
+    except OSError:
+        return {}
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        logger.warning(
+            "Ignoring repository metadata '%s' since it failed to parse: %s" %
+            (path, e))
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def get_repository_manifest(*, repository_name, metadata=None):
+    """
+    Get the manifest of the mixin files of a repository.
+
+    The manifest is being written by the last successful update and lists
+    the mixin files owned by the repository.
+
+    :param str repository_name: The repository name
+    :param dict metadata: The metadata of the repository if it has already
+      been read, to avoid reading it again
+    :returns: The list of manifest entries, each being a dictionary with the
+      `name` of the file, the `sha256` hash of its content, the `url` it
+      has been fetched from and optionally the `etag` of the response, or
+      None if the repository doesn't have a manifest
+    :rtype: list
+    """
+    if metadata is None:
+        metadata = get_repository_metadata(repository_name=repository_name)
+    files = metadata.get('files')
+    if not isinstance(files, list) or not all(
+        isinstance(entry, dict) and isinstance(entry.get('name'), str)
+        for entry in files
+    ):
+        return None
+    return files
+
+
+def set_repository_metadata(*, repository_name, metadata, staged=False):
+    """
+    Persist the metadata of a repository.
+
+    :param str repository_name: The repository name
+    :param dict metadata: The metadata
+    :param bool staged: The flag if the metadata should be written into the
+      staged version of the repository
+    """
+    if staged:
+        path = get_repository_staging_path(repository_name=repository_name)
+    else:
+        path = get_mixin_path() / repository_name
+    os.makedirs(str(path), exist_ok=True)
+    get_mixin_locations().invalidate(path)
+    data = yaml.dump(metadata, default_flow_style=False)
+    with (path / REPOSITORY_METADATA_FILENAME).open('w') as h:
+        h.write(data)
+
+
 def get_repository_mixin_files(*, repository_name):
     """
     Get the configuration files for a specific repository.
@@ -61,7 +167,485 @@ def get_repository_mixin_files(*, repository_name):
     return get_mixin_files(get_mixin_path() / repository_name)
 
 
-def load_url(url, retry=2, retry_period=1, timeout=10):
+def get_repository_staging_path(*, repository_name):
+    """
+    Get the path where the next version of a repository is being staged.
+
+    The directory starts with a dot and is therefore ignored when crawling
+    the mixin path.
+
+    :param str repository_name: The repository name
+    :rtype: Path
+    """
+    return get_mixin_path() / '.{repository_name}.staging'.format_map(
+        locals())
+
+
+def get_repository_previous_path(*, repository_name):
+    """
+    Get the path where the previous version of a repository is being kept.
+
+    The directory starts with a dot and is therefore ignored when crawling
+    the mixin path.
+
+    :param str repository_name: The repository name
+    :rtype: Path
+    """
+    path = get_mixin_path() / repository_name
+    if os.path.islink(str(path)):
+        return _get_inactive_version_path(path)
+    return get_mixin_path() / '.{repository_name}.previous'.format_map(
+        locals())
+
+
+def _get_version_paths(path):
+    # the two directories the symbolic link of a repository alternates between
+    return tuple(
+        path.with_name('.{name}.{i}'.format(name=path.name, i=i))
+        for i in range(2))
+
+
+def _get_inactive_version_path(path):
+    version_paths = _get_version_paths(path)
+    if os.path.islink(str(path)) and \
+            os.readlink(str(path)) == version_paths[0].name:
+        return version_paths[1]
+    return version_paths[0]
+
+
+def commit_staged_repository(*, repository_name):
+    """
+    Replace a repository with the staged version.
+
+    The current version is being kept as the previous version which can be
+    restored using :func:`rollback_repository`.
+
+    The directory of a repository is a symbolic link to one of two hidden
+    directories, the staged version is being moved into the one not in use
+    and the symbolic link is being replaced atomically.
+    A concurrent reader therefore either sees the current or the staged
+    version.
+    If symbolic links aren't supported the directory is being renamed away
+    before the staged version is being renamed into its place, so a
+    concurrent reader might briefly see no mixins of the repository.
+    The same gap happens once when a directory from before the use of
+    symbolic links is being replaced.
+
+    :param str repository_name: The repository name
+    """
+    path = get_mixin_path() / repository_name
+    staging_path = get_repository_staging_path(
+        repository_name=repository_name)
+    version_path = _get_inactive_version_path(path)
+    if os.path.lexists(str(version_path)):
+        shutil.rmtree(str(version_path))
+    os.rename(str(staging_path), str(version_path))
+    if not _switch_repository_version(path, version_path):
+        previous_path = get_repository_previous_path(
+            repository_name=repository_name)
+        if previous_path.exists():
+            shutil.rmtree(str(previous_path))
+        # each rename is atomic but the repository is missing between them
+        if path.exists():
+            os.rename(str(path), str(previous_path))
+        os.rename(str(version_path), str(path))
+    get_mixin_locations().invalidate()
+
+
+def _switch_repository_version(path, version_path):
+    # replace the symbolic link of the repository atomically, returns False
+    # if symbolic links aren't supported
+    link_path = path.with_name('.{path.name}.link'.format_map(locals()))
+    if os.path.lexists(str(link_path)):
+        os.remove(str(link_path))
+    try:
+        os.symlink(
+            version_path.name, str(link_path), target_is_directory=True)
+    except (NotImplementedError, OSError):
+        return False
+    if os.path.isdir(str(path)) and not os.path.islink(str(path)):
+        # a directory can't be replaced by a symbolic link, move it to the
+        # other version instead which leaves the repository briefly missing
+        version_paths = _get_version_paths(path)
+        other_path = version_paths[1] \
+            if version_path == version_paths[0] else version_paths[0]
+        if os.path.lexists(str(other_path)):
+            shutil.rmtree(str(other_path))
+        os.rename(str(path), str(other_path))
+        previous_path = path.with_name(
+            '.{path.name}.previous'.format_map(locals()))
+        if previous_path.exists():
+            shutil.rmtree(str(previous_path))
+    os.replace(str(link_path), str(path))
+    return True
+
+
+def discard_staged_repository(*, repository_name):
+    """
+    Remove the staged version of a repository.
+
+    :param str repository_name: The repository name
+    """
+    staging_path = get_repository_staging_path(
+        repository_name=repository_name)
+    if staging_path.exists():
+        shutil.rmtree(str(staging_path))
+        get_mixin_locations().invalidate(staging_path)
+
+
+def rollback_repository(*, repository_name):
+    """
+    Restore the previous version of a repository.
+
+    The current version becomes the previous version, so calling this function
+    again reverts the rollback.
+    Like :func:`commit_staged_repository` the symbolic link of the repository
+    is being replaced atomically.
+    Only if symbolic links aren't supported the directories are being swapped
+    using multiple renames, so the repository is briefly missing.
+
+    :param str repository_name: The repository name
+    :returns: False if there is no previous version, otherwise True
+    :rtype: bool
+    """
+    path = get_mixin_path() / repository_name
+    previous_path = get_repository_previous_path(
+        repository_name=repository_name)
+    if not previous_path.is_dir():
+        return False
+    if os.path.islink(str(path)):
+        _switch_repository_version(path, previous_path)
+        get_mixin_locations().invalidate()
+        return True
+    # use the staging path as a temporary location for the current version
+    discard_staged_repository(repository_name=repository_name)
+    staging_path = get_repository_staging_path(
+        repository_name=repository_name)
+    if path.exists():
+        os.rename(str(path), str(staging_path))
+    os.rename(str(previous_path), str(path))
+    if staging_path.exists():
+        os.rename(str(staging_path), str(previous_path))
+    get_mixin_locations().invalidate()
+    return True
+
+
+def get_mixin_files_by_repository(repository_names):
+    """
+    Get the mixin files grouped by the repository.
+
+    The mixin files of a registered repository with a manifest are taken from
+    the manifest without crawling the directory of the repository.
+    Any other mixin files in that directory, e.g. added manually, aren't
+    listed, the next update renames them like obsolete mixin files.
+    Only the directories of registered repositories without a manifest and of
+    unregistered repositories are being crawled.
+
+    :param repository_names: The names of the registered repositories
+    :returns: The mapping of repository names to the list of their mixin
+      files, the files not associated with any of the repositories are listed
+      under the key None
+    :rtype: dict
+    """
+    repository_names = set(repository_names)
+    mixin_path = get_mixin_path()
+    files_by_repository = {
+        name: _get_repository_files(mixin_path, name)
+        for name in repository_names}
+    files_by_repository[None] = get_unowned_mixin_files(repository_names)
+    return files_by_repository
+
+
+def get_unowned_mixin_files(repository_names):
+    """
+    Get the mixin files not associated with any registered repository.
+
+    These are the mixin files directly in the mixin path and the mixin files
+    in the directories of unregistered repositories.
+    The directories of registered repositories aren't being read.
+
+    :param repository_names: The names of the registered repositories
+    :rtype: list
+    """
+    unowned_files = []
+    mixin_path = get_mixin_path()
+    if not get_mixin_locations().is_dir(mixin_path):
+        return unowned_files
+    with os.scandir(str(mixin_path)) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    # same order as crawling the mixin path: files before directories
+    for entry in entries:
+        if entry.name.endswith('.mixin') and entry.is_file():
+            unowned_files.append(os.path.join(str(mixin_path), entry.name))
+    for entry in entries:
+        # directories starting with a dot are being skipped when crawling
+        if entry.name.startswith('.') or entry.name in repository_names:
+            continue
+        if entry.is_dir():
+            unowned_files += get_mixin_files(mixin_path / entry.name)
+    return unowned_files
+
+
+def _get_repository_files(mixin_path, dirname):
+    manifest = get_repository_manifest(repository_name=dirname)
+    if manifest is None:
+        return get_mixin_files(mixin_path / dirname)
+    return sorted(
+        os.path.join(str(mixin_path), dirname, entry['name'])
+        for entry in manifest)
+
+
+"""The suffix of mixin files which have been retired by an update."""
+OBSOLETE_SUFFIX = '.obsolete'
+
+
+def get_obsolete_files_by_repository():
+    """
+    Get the obsolete mixin files grouped by the repository.
+
+    The obsolete mixin files are being ignored when loading the mixins but
+    still need to be listed when crawling the mixin path.
+    The hidden directories of the staged and previous versions of the
+    repositories are being skipped.
+
+    :returns: The mapping of repository directory names to the list of
+      their obsolete mixin files, obsolete files directly in the mixin path
+      are listed under the key None
+    :rtype: dict
+    """
+    mixin_path = get_mixin_path()
+    files_by_repository = {}
+    if not get_mixin_locations().is_dir(mixin_path):
+        return files_by_repository
+    for dirpath, dirnames, filenames in os.walk(
+        str(mixin_path), followlinks=True
+    ):
+        # skip subdirectories starting with a dot
+        dirnames[:] = filter(lambda d: not d.startswith('.'), dirnames)
+        dirnames.sort()
+
+        relpath = os.path.relpath(dirpath, str(mixin_path))
+        name = None if relpath == os.curdir else relpath.split(os.sep)[0]
+        for filename in sorted(filenames):
+            if filename.endswith(OBSOLETE_SUFFIX):
+                files_by_repository.setdefault(name, []).append(
+                    os.path.join(dirpath, filename))
+    return files_by_repository
+
+
+def prune_obsolete_files(
+    files_by_repository, *, max_age=None, keep=None, dry_run=False
+):
+    """
+    Remove obsolete mixin files.
+
+    A file is only being removed if it satisfies all passed retention
+    policies.
+    The time when a file became obsolete is the modification time of the
+    obsolete file.
+
+    :param dict files_by_repository: The obsolete mixin files grouped by the
+      repository, as returned by :func:`get_obsolete_files_by_repository`
+    :param float max_age: Only remove files which became obsolete more than
+      this number of seconds ago
+    :param int keep: Keep this number of the most recently obsoleted files
+      of each repository
+    :param bool dry_run: Only determine the files without removing them
+    :returns: The paths of the removed files
+    :rtype: list
+    """
+    now = time.time()
+    pruned_files = []
+    for name in sorted(files_by_repository.keys(), key=lambda n: n or ''):
+        files = []
+        for path in files_by_repository[name]:
+            try:
+                files.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                pass
+        # most recently obsoleted files first
+        files.sort(reverse=True)
+        if keep is not None:
+            files = files[keep:]
+        for mtime, path in files:
+            if max_age is not None and now - mtime <= max_age:
+                continue
+            if not dry_run:
+                os.remove(path)
+            pruned_files.append(path)
+    return sorted(pruned_files)
+
+
+def get_gc_threshold():
+    """
+    Get the number of obsolete mixin files which triggers pruning them.
+
+    The threshold is specified by the environment variable
+    `COLCON_MIXIN_GC_THRESHOLD`.
+
+    :returns: The threshold, None if not set or invalid
+    :rtype: int
+    """
+    value = os.environ.get(COLCON_MIXIN_GC_THRESHOLD.name)
+    if not value:
+        return None
+    try:
+        threshold = int(value)
+    except ValueError:
+        threshold = -1
+    if threshold < 0:
+        logger.warning(
+            "Ignoring invalid value '%s' of the environment variable '%s', "
+            'it must be a non-negative integer' %
+            (value, COLCON_MIXIN_GC_THRESHOLD.name))
+        return None
+    return threshold
+
+
+def parse_duration(value):
+    """
+    Parse a duration.
+
+    The duration is a number followed by an optional unit: `s` (seconds,
+    the default), `m` (minutes), `h` (hours), `d` (days) or `w` (weeks).
+
+    :param str value: The duration, e.g. `90s`, `30m` or `1d`
+    :returns: The duration in seconds
+    :rtype: float
+    :raises ValueError: if the value isn't a valid duration
+    """
+    value = str(value).strip()
+    factor = _DURATION_UNITS.get(value[-1:].lower())
+    if factor is not None:
+        value = value[:-1]
+    else:
+        factor = 1
+    seconds = float(value) * factor
+    if seconds < 0:
+        raise ValueError('The duration must not be negative')
+    return seconds
+
+
+def argparse_duration(value):
+    """
+    Parse a duration passed as a command line argument.
+
+    The function can be used as the `type` of an argparse argument.
+
+    :param str value: The duration as described in :func:`parse_duration`
+    :returns: The duration in seconds
+    :rtype: float
+    :raises argparse.ArgumentTypeError: if the value isn't a valid duration
+    """
+    try:
+        return parse_duration(value)
+    except ValueError:
+        from argparse import ArgumentTypeError
+        raise ArgumentTypeError('must be a valid duration')
+
+
+_DURATION_UNITS = {
+    's': 1,
+    'm': 60,
+    'h': 60 * 60,
+    'd': 24 * 60 * 60,
+    'w': 7 * 24 * 60 * 60,
+}
+
+
+"""The encodings supported for the content of inline bundle entries."""
+BUNDLE_ENCODINGS = ('identity', 'base64', 'gzip+base64')
+
+
+def create_bundle_entry(content, *, encoding='gzip+base64'):
+    """
+    Create an entry for the inline `bundle` of a repository index.
+
+    :param str content: The content of the mixin file
+    :param str encoding: The encoding of the content, one of
+      :data:`BUNDLE_ENCODINGS`
+    :rtype: dict
+    """
+    import base64
+    import gzip
+    import hashlib
+
+    data = content.encode('utf-8')
+    entry = {'sha256': hashlib.sha256(data).hexdigest()}
+    if encoding == 'identity':
+        entry['content'] = content
+        return entry
+    if encoding == 'gzip+base64':
+        data = gzip.compress(data)
+    elif encoding != 'base64':
+        raise ValueError(
+            "Unsupported encoding '{encoding}'".format_map(locals()))
+    entry['encoding'] = encoding
+    entry['content'] = base64.b64encode(data).decode('ascii')
+    return entry
+
+
+def decode_bundle_entry(entry):
+    """
+    Decode an entry of the inline `bundle` of a repository index.
+
+    An entry is either the content of the mixin file as a string or a
+    dictionary with the `content`, an optional `encoding` (see
+    :data:`BUNDLE_ENCODINGS`, default: `identity`) and an optional `sha256`
+    hash of the decoded content.
+
+    :param entry: The bundle entry
+    :returns: The content of the mixin file
+    :rtype: str
+    :raises ValueError: if the entry is invalid or the hash doesn't match
+    """
+    import base64
+    import binascii
+    import gzip
+    import hashlib
+    import zlib
+
+    if isinstance(entry, str):
+        return entry
+    if not isinstance(entry, dict) or not isinstance(
+        entry.get('content'), str
+    ):
+        raise ValueError(
+            'The bundle entry should be a string or a dictionary with a '
+            "'content' string")
+    encoding = entry.get('encoding') or 'identity'
+    if encoding not in BUNDLE_ENCODINGS:
+        raise ValueError(
+            "Unsupported encoding '{encoding}'".format_map(locals()))
+    if encoding == 'identity':
+        data = entry['content'].encode('utf-8')
+    else:
+        try:
+            data = base64.b64decode(entry['content'], validate=True)
+            if encoding == 'gzip+base64':
+                data = gzip.decompress(data)
+        except (binascii.Error, OSError, EOFError, zlib.error) as e:
+            raise ValueError(
+                'Failed to decode the {encoding} content: {e}'
+                .format(encoding=encoding, e=e))
+    expected_hash = entry.get('sha256')
+    if expected_hash is not None:
+        actual_hash = hashlib.sha256(data).hexdigest()
+        if actual_hash != str(expected_hash).lower():
+            raise ValueError(
+                "The sha256 hash '{actual_hash}' of the content doesn't "
+                "match the expected hash '{expected_hash}'"
+                .format_map(locals()))
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError as e:  # noqa: F841
+        raise ValueError(
+            'The content is not valid UTF-8: {e}'.format_map(locals()))
+
+
+def load_url(
+    url, retry=2, retry_period=1, timeout=10, *, metrics=None, etags=None
+):
     """
     Load a URL.
 
@@ -69,32 +653,71 @@ def load_url(url, retry=2, retry_period=1, timeout=10):
     :param int retry_period: The period to wait before the first retry. Every
       subsequent retry will double the period.
     :param int timeout: The timeout for each request
+    :param dict metrics: An optional dictionary to record the number of
+      `retries`, the `connect_time` until the response headers have been
+      received (including the name resolution), the `transfer_time` of the
+      content and the number of `bytes` of the last attempt
+    :param dict etags: An optional dictionary mapping URLs to entity tags.
+      If the URL has an entity tag a conditional request is being made.
+      The entity tag of the response is being stored for the URL.
 
+    :returns: The content, or None if the content of a conditional request
+      hasn't been modified
     :rtype: str
     """
+    # only import the networking modules when they are actually needed
+    import socket
+    from urllib.error import HTTPError
+    from urllib.error import URLError
+    from urllib.request import Request
+    from urllib.request import urlopen
+
+    if metrics is not None:
+        metrics.setdefault('retries', 0)
+    headers = {}
+    if etags is not None and etags.get(url):
+        headers['If-None-Match'] = etags[url]
+    start = time.monotonic()
     try:
-        h = urlopen(url, timeout=timeout)
+        h = urlopen(Request(url, headers=headers), timeout=timeout)
     except HTTPError as e:
+        if e.code == 304 and headers:
+            if e.headers.get('ETag'):
+                etags[url] = e.headers['ETag']
+            if metrics is not None:
+                metrics['connect_time'] = time.monotonic() - start
+                metrics['bytes'] = 0
+            return None
         if e.code == 503 and retry:
-            time.sleep(retry_period)
-            return load_url(
-                url, retry=retry - 1, retry_period=retry_period * 2,
-                timeout=timeout)
+            return _retry_load_url(
+                url, retry, retry_period, timeout, metrics, etags)
         e.msg += ' (%s)' % url
         raise
     except URLError as e:
         if isinstance(e.reason, socket.timeout) and retry:
-            time.sleep(retry_period)
-            return load_url(
-                url, retry=retry - 1, retry_period=retry_period * 2,
-                timeout=timeout)
+            return _retry_load_url(
+                url, retry, retry_period, timeout, metrics, etags)
         raise URLError(str(e) + ' (%s)' % url)
     except socket.timeout as e:
         if retry:
-            time.sleep(retry_period)
-            return load_url(
-                url, retry=retry - 1, retry_period=retry_period * 2,
-                timeout=timeout)
+            return _retry_load_url(
+                url, retry, retry_period, timeout, metrics, etags)
         raise socket.timeout(str(e) + ' (%s)' % url)
+    connected = time.monotonic()
     content = h.read()
+    if etags is not None:
+        etags[url] = h.headers.get('ETag')
+    if metrics is not None:
+        metrics['connect_time'] = connected - start
+        metrics['transfer_time'] = time.monotonic() - connected
+        metrics['bytes'] = len(content)
     return content.decode('utf-8')
+
+
+def _retry_load_url(url, retry, retry_period, timeout, metrics, etags):
+    if metrics is not None:
+        metrics['retries'] += 1
+    time.sleep(retry_period)
+    return load_url(
+        url, retry=retry - 1, retry_period=retry_period * 2,
+        timeout=timeout, metrics=metrics, etags=etags)
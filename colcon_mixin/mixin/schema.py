@@ -0,0 +1,270 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+from collections import OrderedDict
+import os
+
+
+def get_verb_schemas(parser):
+    """
+    Get the arguments accepted by each "leaf" verb.
+
+    The arguments of a verb include the optional arguments of all parent
+    parsers.
+
+    :param parser: The argument parser
+    :returns: The mapping of verb tuples to ordered dictionaries mapping the
+      argument keys (the option strings without leading dashes) to the
+      argparse actions
+    :rtype: dict
+    """
+    schemas = {}
+    _collect_verb_schemas(parser, (), OrderedDict(), schemas)
+    return schemas
+
+
+def get_verb_schema(parser, verb):
+    """
+    Get the arguments accepted by a specific verb.
+
+    :param parser: The argument parser
+    :param tuple verb: The verb
+    :returns: The ordered dictionary mapping the argument keys to the argparse
+      actions, or None if the verb doesn't exist
+    :rtype: OrderedDict
+    """
+    schema = OrderedDict()
+    for name in verb + (None, ):
+        subparser = None
+        for action in parser._actions:
+            if isinstance(action, argparse._SubParsersAction):
+                subparser = action.choices.get(name, subparser)
+                continue
+            for option_string in action.option_strings:
+                schema[option_string.lstrip('-')] = action
+        if name is None:
+            break
+        if subparser is None:
+            return None
+        parser = subparser
+    return schema
+
+
+def _collect_verb_schemas(parser, verb, parent_schema, schemas):
+    schema = OrderedDict(parent_schema)
+    subparsers = []
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            subparsers.append(action)
+            continue
+        for option_string in action.option_strings:
+            schema[option_string.lstrip('-')] = action
+
+    found_children = False
+    for action in subparsers:
+        for name, subparser in action.choices.items():
+            _collect_verb_schemas(subparser, verb + (name, ), schema, schemas)
+            found_children = True
+    # only add verbs which don't have subverbs
+    if verb and not found_children:
+        schemas[verb] = schema
+
+
+def get_schema_fingerprint(schema):
+    """
+    Get a fingerprint identifying the arguments of a verb.
+
+    The fingerprint is stable across processes, the types of the arguments
+    are identified by their qualified names rather than their `repr`.
+
+    :param dict schema: The mapping of argument keys to argparse actions
+    :rtype: str
+    """
+    import hashlib
+    h = hashlib.sha256()
+    for key, action in schema.items():
+        h.update(
+            '{key}={action.dest}:{action.nargs}:{type_name}:{choices}\0'
+            .format(
+                key=key, action=action,
+                type_name=_get_type_fingerprint(action.type),
+                choices=sorted(map(str, action.choices or ())))
+            .encode('utf-8'))
+    return h.hexdigest()
+
+
+def _get_type_fingerprint(type_):
+    import functools
+    # look through wrappers like the one wrapping the default values
+    while hasattr(type_, '__wrapped__'):
+        type_ = type_.__wrapped__
+    if type_ is None:
+        return 'None'
+    if isinstance(type_, functools.partial):
+        parts = [_get_type_fingerprint(type_.func)]
+        parts += map(_get_type_fingerprint, type_.args)
+        parts += [
+            '{k}={v}'.format(k=k, v=_get_type_fingerprint(v))
+            for k, v in sorted(type_.keywords.items())]
+        return 'partial({parts})'.format(parts=', '.join(parts))
+    if isinstance(type_, os.PathLike):
+        type_ = os.fspath(type_)
+    if isinstance(type_, (str, int, float, bool)):
+        return repr(type_)
+    if not hasattr(type_, '__qualname__'):
+        # the repr of other instances might contain a memory address
+        type_ = type(type_)
+    return '{module}.{name}'.format(
+        module=getattr(type_, '__module__', None), name=type_.__qualname__)
+
+
+def normalize_mixin_args(mixin_args, schema):
+    """
+    Validate the arguments of a mixin.
+
+    Each key must be an argument of the verb.
+    Arguments accepting multiple values must be lists and flags must be
+    booleans, other values are being dropped since they can't be combined
+    with the command line arguments.
+    String values are being checked using the type of the argument and
+    against its choices.
+    Like in previous versions the values are kept as they are written in the
+    mixin file, the type of the argument isn't applied to them, so a value
+    failing these checks is being reported but still used.
+
+    :param dict mixin_args: The arguments of the mixin
+    :param dict schema: The mapping of argument keys to argparse actions
+    :returns: The ordered dictionary of valid arguments and the list of
+      errors, each being a tuple of the mixin key and the reason or None if
+      the key isn't a valid argument
+    :rtype: tuple
+    """
+    normalized = OrderedDict()
+    errors = []
+    for mixin_key, mixin_value in mixin_args.items():
+        if mixin_key not in schema:
+            errors.append((mixin_key, None))
+            continue
+        action = schema[mixin_key]
+        try:
+            values = _get_checked_values(action, mixin_value)
+        except ValueError as e:
+            errors.append((mixin_key, str(e)))
+            continue
+        normalized[mixin_key] = mixin_value
+        try:
+            for value in values:
+                _check_value(action, value)
+        except ValueError as e:
+            errors.append((mixin_key, str(e)))
+    return normalized, errors
+
+
+def _get_checked_values(action, value):
+    # check the structure of the value and return the individual values which
+    # need to satisfy the type and the choices of the argument
+    if value is None:
+        return []
+    if isinstance(
+        action, (argparse._StoreTrueAction, argparse._StoreFalseAction)
+    ):
+        if not isinstance(value, bool):
+            raise ValueError(
+                'expected a boolean but got: {value!r}'.format_map(locals()))
+        return []
+    if isinstance(action, argparse._CountAction):
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(
+                'expected an integer but got: {value!r}'.format_map(locals()))
+        return []
+    if isinstance(
+        action, (argparse._StoreConstAction, argparse._AppendConstAction)
+    ):
+        return []
+
+    if (
+        isinstance(action, argparse._AppendAction) or
+        action.nargs in ('*', '+', argparse.REMAINDER) or
+        isinstance(action.nargs, int)
+    ):
+        if not isinstance(value, list):
+            raise ValueError(
+                'expected a list but got: {value!r}'.format_map(locals()))
+        return value
+
+    if isinstance(value, (list, dict)):
+        raise ValueError(
+            'expected a single value but got: {value!r}'.format_map(locals()))
+    return [value]
+
+
+def _check_value(action, value):
+    # argparse checks the choices after converting the value
+    if isinstance(value, str) and callable(action.type):
+        try:
+            value = action.type(value)
+        except (argparse.ArgumentTypeError, TypeError, ValueError) as e:
+            raise ValueError(
+                'invalid value {value!r}: {e}'.format(value=value, e=e))
+    if action.choices is not None and value not in action.choices:
+        raise ValueError(
+            'invalid choice {value!r}, choose from: {choices}'.format(
+                value=value, choices=', '.join(map(str, action.choices))))
+
+
+def validate_mixin_data(data, schemas):
+    """
+    Validate the content of a mixin file.
+
+    Mixins for verbs which aren't known are being ignored.
+
+    :param data: The parsed content of the mixin file
+    :param dict schemas: The mapping of verb tuples to the arguments accepted
+      by the verb
+    :returns: The list of error messages
+    :rtype: list
+    """
+    if data is None:
+        return []
+    if not isinstance(data, dict):
+        return ['The content should be a dictionary but it is: {data!r}'
+                .format_map(locals())]
+    messages = []
+    for verb, mixins in data.items():
+        schema = schemas.get(tuple(str(verb).split('.')))
+        if schema is None:
+            continue
+        if not isinstance(mixins or {}, dict):
+            messages.append(
+                "The mixins for '{verb}' should be a dictionary"
+                .format_map(locals()))
+            continue
+        for name, mixin_args in (mixins or {}).items():
+            if not isinstance(mixin_args or {}, dict):
+                messages.append(
+                    "Mixin '{name}' for '{verb}' should be a dictionary"
+                    .format_map(locals()))
+                continue
+            _, errors = normalize_mixin_args(mixin_args or {}, schema)
+            for mixin_key, reason in errors:
+                messages.append(
+                    format_mixin_error(verb, name, mixin_key, reason))
+    return messages
+
+
+def format_mixin_error(verb, name, mixin_key, reason):
+    """
+    Format an error of validating the arguments of a mixin.
+
+    :param str verb: The verb
+    :param str name: The name of the mixin
+    :param str mixin_key: The mixin key
+    :param str reason: The reason or None if the key isn't a valid argument
+    :rtype: str
+    """
+    if reason is None:
+        return "Mixin '{name}' for '{verb}': key '{mixin_key}' is not a " \
+            'valid argument'.format_map(locals())
+    return "Mixin '{name}' for '{verb}': key '{mixin_key}' has an invalid " \
+        'value, {reason}'.format_map(locals())
@@ -0,0 +1,196 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import importlib.util
+import marshal
+import mmap
+import os
+from pathlib import Path
+
+from colcon_core.logging import colcon_logger
+from colcon_mixin.mixin import add_mixin_data
+from colcon_mixin.mixin import add_mixins
+from colcon_mixin.mixin import get_content_digest
+from colcon_mixin.mixin import get_mixin_files
+from colcon_mixin.mixin import load_mixin_content
+
+logger = colcon_logger.getChild(__name__)
+
+"""The name of the precompiled index within a shared mixin directory."""
+SHARED_INDEX_FILENAME = 'mixin_index.marshal'
+
+"""The version of the format of the precompiled index"""
+SHARED_INDEX_FORMAT_VERSION = 4
+
+# the marshal format depends on the Python version
+_HEADER = b'colcon-mixin-index\0' + \
+    bytes([SHARED_INDEX_FORMAT_VERSION]) + importlib.util.MAGIC_NUMBER
+
+
+def compile_shared_index(path):
+    """
+    Precompile the index of the mixin files in a shared directory.
+
+    The index contains the parsed content of each mixin file and the line
+    numbers of its mixins as well as the directories which have been crawled
+    to detect if it is outdated.
+    The paths are relative to the shared directory, so the index stays valid
+    independent of how the directory is being referenced.
+    The file is being replaced atomically so concurrent readers either see
+    the previous or the new index.
+
+    :param Path path: The shared directory
+    :returns: The path of the precompiled index
+    :rtype: Path
+    :raises ValueError: if the content of a mixin file can't be stored in the
+      index
+    """
+    import yaml
+
+    directories, mixin_files = _get_relative_mixin_paths(path)
+    entries = []
+    for mixin_file in mixin_files:
+        with (path / mixin_file).open('r') as h:
+            content = h.read()
+        try:
+            data, lines = load_mixin_content(content)
+            error = None
+        except yaml.YAMLError as e:
+            data, lines = None, None
+            error = str(e)
+        entries.append((
+            mixin_file, get_content_digest(content), data, lines, error))
+    try:
+        payload = marshal.dumps((directories, entries))
+    except ValueError as e:  # noqa: F841
+        raise ValueError(
+            "Failed to compile the mixin index of '{path}': {e}"
+            .format_map(locals()))
+
+    index_path = path / SHARED_INDEX_FILENAME
+    temp_path = index_path.with_name(
+        '.{index_path.name}.{pid}'.format(
+            index_path=index_path, pid=os.getpid()))
+    with temp_path.open('wb') as h:
+        h.write(_HEADER)
+        h.write(payload)
+    os.replace(str(temp_path), str(index_path))
+    # replacing the file modifies the shared directory, the index must not be
+    # older than that
+    os.utime(str(index_path))
+    return index_path
+
+
+def load_shared_index(path):
+    """
+    Load the precompiled index of a shared directory.
+
+    The file is being memory-mapped and unmarshaled without copying it.
+    Since unmarshaling untrusted data isn't safe the file must be owned by
+    the current user or root and must not be writable by anyone else.
+
+    The index is outdated if any of the crawled directories has been
+    modified after the index has been compiled, e.g. by adding, removing or
+    replacing a mixin file.
+    Only the directories are being checked, a mixin file modified in place
+    requires compiling the index again.
+
+    :param Path path: The shared directory
+    :returns: The entries of the index, None if the index doesn't exist, has
+      an incompatible format, isn't trusted or is outdated
+    :rtype: list
+    """
+    index_path = path / SHARED_INDEX_FILENAME
+    try:
+        with index_path.open('rb') as h:
+            stat = os.fstat(h.fileno())
+            reason = _get_untrusted_reason(stat)
+            if reason is not None:
+                logger.warning(
+                    "Ignoring the mixin index '%s' since it %s" %
+                    (index_path, reason))
+                return None
+            with mmap.mmap(h.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                if m[:len(_HEADER)] != _HEADER:
+                    logger.info(
+                        "Ignoring the mixin index '%s' with an incompatible "
+                        'format' % index_path)
+                    return None
+                with memoryview(m) as view:
+                    directories, entries = marshal.loads(
+                        view[len(_HEADER):])
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        # mapping an empty file raises a ValueError
+        logger.info(
+            "Ignoring the mixin index '%s': %s" % (index_path, e))
+        return None
+
+    # the index is only valid if no mixin files have been added, removed or
+    # replaced since
+    for directory in directories:
+        try:
+            mtime_ns = os.stat(str(path / directory)).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns is None or mtime_ns > stat.st_mtime_ns:
+            logger.warning(
+                "Ignoring the outdated mixin index '%s' since the directory "
+                "'%s' has been modified" % (index_path, path / directory))
+            return None
+    return entries
+
+
+def _get_untrusted_reason(stat):
+    if not hasattr(os, 'getuid'):
+        # the ownership and permissions can't be checked the same way
+        return None
+    if stat.st_uid not in (0, os.getuid()):
+        return 'is owned by another user'
+    if stat.st_mode & 0o022:
+        return 'is writable by other users'
+    return None
+
+
+def add_shared_mixins(path, mixins_by_verb):
+    """
+    Add the mixins from a shared directory to the collection.
+
+    If the directory doesn't contain a valid precompiled index the mixin files
+    are being parsed instead.
+
+    :param Path path: The shared directory
+    :param mixins_by_verb: The mixin index or a nested dictionary of mixins
+      grouped by the verb
+    """
+    entries = load_shared_index(path)
+    if entries is None:
+        for mixin_file in get_mixin_files(path):
+            add_mixins(Path(mixin_file), mixins_by_verb)
+        return
+
+    for mixin_file, digest, data, lines, error in entries:
+        mixin_path = path / mixin_file
+        if error is not None:
+            logger.warning(
+                "Skipping mixin file '%s' since it failed to parse: %s" %
+                (mixin_path.absolute(), error))
+            continue
+        add_mixin_data(
+            mixin_path, data, mixins_by_verb, digest=digest, lines=lines)
+
+
+def _get_relative_mixin_paths(path):
+    # the directories being crawled the same way as get_mixin_files() does
+    # and the mixin files within them
+    directories = []
+    mixin_files = []
+    for dirpath, dirnames, filenames in os.walk(str(path), followlinks=True):
+        dirnames[:] = filter(lambda d: not d.startswith('.'), dirnames)
+        dirnames.sort()
+
+        directories.append(os.path.relpath(dirpath, str(path)))
+        for filename in sorted(filenames):
+            if filename.endswith('.mixin'):
+                mixin_files.append(os.path.relpath(
+                    os.path.join(dirpath, filename), str(path)))
+    return directories, mixin_files
@@ -4,6 +4,9 @@
 from argparse import ArgumentTypeError
 
 from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin.git_repository import is_git_url
+from colcon_mixin.mixin.git_repository import parse_git_url
+from colcon_mixin.mixin.repository import argparse_duration
 from colcon_mixin.mixin.repository import get_repositories
 from colcon_mixin.mixin.repository import set_repositories
 from colcon_mixin.subverb import MixinSubverbExtensionPoint
@@ -25,14 +28,28 @@ class AddMixinSubverb(MixinSubverbExtensionPoint):
         parser.add_argument(
             'url',
             type=_url_string,
-            help='The url of a mixin repository index')
+            help='The url of a mixin repository index or of a git repository '
+                 'prefixed with git+ and an optional #ref suffix, e.g. '
+                 'git+https://host/repo.git#main')
+        parser.add_argument(
+            '--max-age',
+            type=argparse_duration, metavar='DURATION',
+            help='Skip updating the repository if the last successful update '
+                 'is more recent than this duration, a number with an '
+                 'optional unit s, m, h, d or w')
 
     def main(self, *, context):  # noqa: D102
         repos = get_repositories()
         if context.args.name in repos.keys():
             return "A repository with the name '{context.args.name}' " \
                 'already exists'.format_map(locals())
-        repos[context.args.name] = context.args.url
+        if context.args.max_age is None:
+            repos[context.args.name] = context.args.url
+        else:
+            repos[context.args.name] = {
+                'url': context.args.url,
+                'max-age': context.args.max_age,
+            }
         set_repositories(repos)
 
 
@@ -49,4 +66,9 @@ def _non_empty_string_without_pathsep(value):
 def _url_string(value):
     if '://' not in value:
         raise ArgumentTypeError("must contain '://'")
+    if is_git_url(value):
+        try:
+            parse_git_url(value)
+        except ValueError as e:
+            raise ArgumentTypeError(str(e))
     return value
@@ -0,0 +1,54 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from pathlib import Path
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin import get_shared_mixin_paths
+from colcon_mixin.mixin.shared_index import compile_shared_index
+from colcon_mixin.subverb import MixinSubverbExtensionPoint
+
+
+class CompileMixinSubverb(MixinSubverbExtensionPoint):
+    """Precompile the index of shared mixin directories."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(
+            MixinSubverbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.description += '\n\n' \
+            'The index is being ignored once mixin files have been added, ' \
+            'removed or replaced in the shared directories. ' \
+            'A mixin file modified in place is not detected, the index ' \
+            'needs to be compiled again. ' \
+            'The index is only being used if it is owned by the current ' \
+            'user or root and not writable by other users.'
+        parser.add_argument(
+            'paths',
+            nargs='*', metavar='PATH',
+            help='The shared directories containing mixin files (default: '
+                 'the directories listed in COLCON_MIXIN_SHARED_PATH)')
+
+    def main(self, *, context):  # noqa: D102
+        paths = [Path(p) for p in context.args.paths] or \
+            get_shared_mixin_paths()
+        if not paths:
+            return 'No shared directories have been passed or set in ' \
+                'COLCON_MIXIN_SHARED_PATH'
+
+        rc = 0
+        for path in paths:
+            if not path.is_dir():
+                print("'{path}' is not a directory".format_map(locals()))
+                rc = 1
+                continue
+            try:
+                index_path = compile_shared_index(path)
+            except (OSError, ValueError) as e:
+                print(str(e))
+                rc = 1
+                continue
+            print('compiled {index_path}'.format_map(locals()))
+        return rc
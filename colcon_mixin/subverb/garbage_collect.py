@@ -0,0 +1,93 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from argparse import ArgumentTypeError
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.mixin.repository import argparse_duration
+from colcon_mixin.mixin.repository import get_obsolete_files_by_repository
+from colcon_mixin.mixin.repository import get_repositories
+from colcon_mixin.mixin.repository import prune_obsolete_files
+from colcon_mixin.subverb import MixinSubverbExtensionPoint
+
+
+class GarbageCollectMixinSubverb(MixinSubverbExtensionPoint):
+    """Remove obsolete mixin files."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(
+            MixinSubverbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.description += '\n\n' \
+            'An update renames mixin files which have been removed from ' \
+            'the repository index to *.obsolete. ' \
+            'Without any retention policy all obsolete mixin files are ' \
+            'being removed, otherwise only the ones satisfying all ' \
+            'policies. ' \
+            'The previous version of each repository kept for a rollback ' \
+            'is not affected.'
+        argument = parser.add_argument(
+            'name',
+            nargs='?',
+            help='Only remove the obsolete mixin files of a specific '
+                 'repository')
+        argument.completer = get_choices_completer(
+            lambda: get_repositories().keys())
+        parser.add_argument(
+            '--max-age',
+            type=argparse_duration, metavar='DURATION',
+            help='Only remove files which became obsolete longer ago than '
+                 'this duration, a number with an optional unit s, m, h, d '
+                 'or w')
+        parser.add_argument(
+            '--keep',
+            type=_non_negative_int, metavar='N',
+            help='Keep the N most recently obsoleted files of each '
+                 'repository')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only show the files which would be removed')
+
+    def main(self, *, context):  # noqa: D102
+        repos = get_repositories()
+        if context.args.name and context.args.name not in repos.keys():
+            return "Passed repository name '{context.args.name}' is unknown" \
+                .format_map(locals())
+
+        files_by_repository = get_obsolete_files_by_repository()
+        if context.args.name:
+            files_by_repository = {
+                context.args.name:
+                files_by_repository.get(context.args.name, [])}
+
+        pruned_files = prune_obsolete_files(
+            files_by_repository, max_age=context.args.max_age,
+            keep=context.args.keep, dry_run=context.args.dry_run)
+        for path in pruned_files:
+            if context.args.dry_run:
+                print('would remove {path}'.format_map(locals()))
+            else:
+                print('removed {path}'.format_map(locals()))
+
+        count = len(pruned_files)
+        if context.args.dry_run:
+            print('{count} obsolete mixin files would be removed'
+                  .format_map(locals()))
+        else:
+            remaining = sum(
+                len(files) for files in files_by_repository.values()) - count
+            print('removed {count} obsolete mixin files, {remaining} kept'
+                  .format_map(locals()))
+
+
+def _non_negative_int(value):
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise ArgumentTypeError('must be a non-negative integer')
+    return value
@@ -1,11 +1,21 @@
 # Copyright 2016-2018 Dirk Thomas
 # Licensed under the Apache License, Version 2.0
 
+from collections import OrderedDict
+import datetime
+import json
+import os
+import time
+
 from colcon_core.plugin_system import satisfies_version
-from colcon_mixin.mixin import get_mixin_files
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.mixin.repository import argparse_duration
+from colcon_mixin.mixin.repository import get_mixin_files_by_repository
 from colcon_mixin.mixin.repository import get_repositories
-from colcon_mixin.mixin.repository import get_repository_mixin_files
+from colcon_mixin.mixin.repository import get_repository_metadata
+from colcon_mixin.mixin.repository import get_repository_url
 from colcon_mixin.subverb import MixinSubverbExtensionPoint
+import yaml
 
 
 class ListMixinSubverb(MixinSubverbExtensionPoint):
@@ -21,14 +31,24 @@ class ListMixinSubverb(MixinSubverbExtensionPoint):
             'name',
             nargs='?',
             help='Only list the information for a specific repository')
-        try:
-            from argcomplete.completers import ChoicesCompleter
-        except ImportError:
-            pass
-        else:
-            repos = get_repositories()
-            argument.completer = \
-                ChoicesCompleter(repos.keys())
+        argument.completer = get_choices_completer(
+            lambda: get_repositories().keys())
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Show statistics for each repository (number of files, '
+                 'number of mixins per verb, total size, time of the last '
+                 'update and stale files)')
+        parser.add_argument(
+            '--stale-after',
+            type=argparse_duration, default=7 * 24 * 60 * 60,
+            metavar='DURATION',
+            help='The age after which a mixin file is considered stale, a '
+                 'number with an optional unit s, m, h, d or w (default: 7d)')
+        parser.add_argument(
+            '--format',
+            choices=('text', 'json'), default='text',
+            help='The output format (default: text)')
 
     def main(self, *, context):  # noqa: D102
         repos = get_repositories()
@@ -36,21 +56,95 @@ class ListMixinSubverb(MixinSubverbExtensionPoint):
             return "Passed repository name '{context.args.name}' is unknown" \
                 .format_map(locals())
 
-        mixin_files_from_repos = set()
+        # group the files by repository, only directories of repositories
+        # without a manifest are being crawled
+        files_by_repo = get_mixin_files_by_repository(repos.keys())
+
+        now = time.time()
+        repositories = []
         for name in sorted(repos.keys()):
             if context.args.name and context.args.name != name:
                 continue
-            url = repos[name]
-            print('{name}: {url}'.format_map(locals()))
-            mixin_files = get_repository_mixin_files(
-                repository_name=name)
-            for path in sorted(mixin_files):
+            repository = OrderedDict()
+            repository['name'] = name
+            repository['url'] = get_repository_url(repos[name])
+            repository['files'] = sorted(files_by_repo[name])
+            if context.args.stats:
+                repository['stats'] = _get_stats(
+                    repository['files'], now, context.args.stale_after)
+                # prefer the time of the last successful update if available
+                metadata = get_repository_metadata(repository_name=name)
+                if metadata.get('last_update') is not None:
+                    repository['stats']['last_update'] = \
+                        metadata['last_update']
+            repositories.append(repository)
+        files_without_repo = sorted(files_by_repo[None])
+
+        if context.args.format == 'json':
+            data = OrderedDict()
+            data['repositories'] = repositories
+            data['files_without_repository'] = files_without_repo
+            print(json.dumps(data, indent=2))
+            return
+
+        for repository in repositories:
+            print('{name}: {url}'.format_map(repository))
+            for path in repository['files']:
                 print('- {path}'.format_map(locals()))
-                mixin_files_from_repos.add(path)
+            if 'stats' in repository:
+                _print_stats(repository['stats'])
 
-        mixin_files = get_mixin_files()
-        mixin_files_without_repo = set(mixin_files) - mixin_files_from_repos
-        if mixin_files_without_repo:
+        if files_without_repo:
             print('mixin files not associated with a repository')
-            for path in sorted(mixin_files_without_repo):
+            for path in files_without_repo:
                 print('- {path}'.format_map(locals()))
+
+
+def _get_stats(paths, now, stale_after):
+    stats = OrderedDict()
+    stats['file_count'] = len(paths)
+    stats['mixin_count_by_verb'] = OrderedDict()
+    stats['total_bytes'] = 0
+    stats['last_update'] = None
+    stats['stale_files'] = []
+    mixin_count_by_verb = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            with open(path, 'r') as h:
+                content = h.read()
+        except OSError:
+            continue
+        stats['total_bytes'] += stat.st_size
+        stats['last_update'] = max(stats['last_update'] or 0, stat.st_mtime)
+        if now - stat.st_mtime > stale_after:
+            stats['stale_files'].append(path)
+        try:
+            data = yaml.safe_load(content)
+        except yaml.YAMLError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        for verb, mixins in data.items():
+            if isinstance(mixins, dict):
+                mixin_count_by_verb[verb] = \
+                    mixin_count_by_verb.get(verb, 0) + len(mixins)
+    for verb in sorted(mixin_count_by_verb.keys()):
+        stats['mixin_count_by_verb'][verb] = mixin_count_by_verb[verb]
+    return stats
+
+
+def _print_stats(stats):
+    print('  files: {file_count}, bytes: {total_bytes}'.format_map(stats))
+    mixin_counts = ', '.join(
+        '{verb}: {count}'.format_map(locals())
+        for verb, count in stats['mixin_count_by_verb'].items()) or '-'
+    print('  mixins: {mixin_counts}'.format_map(locals()))
+    last_update = stats['last_update']
+    if last_update is not None:
+        last_update = datetime.datetime.fromtimestamp(last_update) \
+            .isoformat(sep=' ', timespec='seconds')
+    print('  last update: {last_update}'.format_map(locals()))
+    print('  stale files: {count}'.format(count=len(stats['stale_files'])))
+    for path in stats['stale_files']:
+        print('  - {path}'.format_map(locals()))
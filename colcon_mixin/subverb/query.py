@@ -0,0 +1,42 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin import get_mixins
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.subverb import MixinSubverbExtensionPoint
+
+
+class QueryMixinSubverb(MixinSubverbExtensionPoint):
+    """Find the mixins setting a specific argument."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(
+            MixinSubverbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.add_argument(
+            '--arg', required=True, metavar='KEY',
+            help='The argument, e.g. cmake-args or =--parallel-workers')
+        argument = parser.add_argument(
+            '--verb',
+            help='Only query the mixins for a specific verb')
+        argument.completer = get_choices_completer(
+            lambda: ('.'.join(verb) for verb in get_mixins().keys()))
+
+    def main(self, *, context):  # noqa: D102
+        key = context.args.arg.lstrip('-')
+        verb = tuple(context.args.verb.split('.')) \
+            if context.args.verb else None
+        mixins_by_verb = get_mixins().get_mixins_by_arg(key, verb=verb)
+        if not mixins_by_verb:
+            return "No mixins set the argument '{key}'".format_map(locals())
+
+        for verb in sorted(mixins_by_verb.keys()):
+            verb_space = ' '.join(verb)
+            print('{verb_space}:'.format_map(locals()))
+            mixins = mixins_by_verb[verb]
+            for mixin_name in sorted(mixins.keys()):
+                source = mixins[mixin_name]
+                print('- {mixin_name}: {source}'.format_map(locals()))
@@ -2,6 +2,7 @@
 # Licensed under the Apache License, Version 2.0
 
 from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin.completer import get_choices_completer
 from colcon_mixin.mixin.repository import get_repositories
 from colcon_mixin.mixin.repository import set_repositories
 from colcon_mixin.subverb import MixinSubverbExtensionPoint
@@ -19,14 +20,8 @@ class RemoveMixinSubverb(MixinSubverbExtensionPoint):
         argument = parser.add_argument(
             'name',
             help='The unique name identifying the repository')
-        try:
-            from argcomplete.completers import ChoicesCompleter
-        except ImportError:
-            pass
-        else:
-            repos = get_repositories()
-            argument.completer = \
-                ChoicesCompleter(repos.keys())
+        argument.completer = get_choices_completer(
+            lambda: get_repositories().keys())
 
     def main(self, *, context):  # noqa: D102
         repos = get_repositories()
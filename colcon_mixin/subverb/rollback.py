@@ -0,0 +1,55 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin import get_mixin_path
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.mixin.repository import get_repositories
+from colcon_mixin.mixin.repository import rollback_repository
+from colcon_mixin.subverb import MixinSubverbExtensionPoint
+
+
+class RollbackMixinSubverb(MixinSubverbExtensionPoint):
+    """Restore the mixin from before the last update."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(
+            MixinSubverbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.description += '\n\n' \
+            'Each update keeps the previous mixin files of a repository. ' \
+            'Rolling back swaps them with the current mixin files, so ' \
+            'rolling back again restores the updated mixin files. ' \
+            'Like an update the symbolic link of the repository directory ' \
+            'is being replaced atomically, where symbolic links are not ' \
+            'supported the directory is briefly missing while it is being ' \
+            'swapped.'
+        argument = parser.add_argument(
+            'name',
+            nargs='?',
+            help='Only roll back the mixin from a specific repository')
+        argument.completer = get_choices_completer(
+            lambda: get_repositories().keys())
+
+    def main(self, *, context):  # noqa: D102
+        repos = get_repositories()
+        if context.args.name and context.args.name not in repos.keys():
+            return "Passed repository name '{context.args.name}' is unknown" \
+                .format_map(locals())
+
+        rc = 0
+        for name in sorted(repos.keys()):
+            if context.args.name and context.args.name != name:
+                continue
+            path = get_mixin_path() / name
+            if not rollback_repository(repository_name=name):
+                print(
+                    "No previous mixin files of the repository '{name}' "
+                    'available'.format_map(locals()))
+                if context.args.name:
+                    rc = 1
+                continue
+            print('rolled back {name}: {path}'.format_map(locals()))
+        return rc
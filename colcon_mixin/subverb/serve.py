@@ -0,0 +1,49 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_mixin.mixin.index_server import get_index_server_socket_path
+from colcon_mixin.mixin.index_server import serve_mixin_index
+from colcon_mixin.mixin.repository import argparse_duration
+from colcon_mixin.subverb import MixinSubverbExtensionPoint
+
+
+class ServeMixinSubverb(MixinSubverbExtensionPoint):
+    """Serve the mixin index to other colcon processes."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(
+            MixinSubverbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.description += '\n\n' \
+            'The resident process keeps the parsed mixins in memory and ' \
+            'serves them over a Unix domain socket. ' \
+            'Shell completion and the show subverb query it first and ' \
+            'fall back to loading the mixins directly. ' \
+            'Setting the environment variable COLCON_MIXIN_INDEX_SERVER ' \
+            'to 1 starts the server on demand instead.'
+        parser.add_argument(
+            '--poll-interval',
+            type=argparse_duration, default=1.0, metavar='DURATION',
+            help='The minimum time between checking the mixin directories '
+                 'for changes (default: 1s)')
+        parser.add_argument(
+            '--idle-timeout',
+            type=argparse_duration, default=60 * 60, metavar='DURATION',
+            help='Exit after not receiving any request for this duration, '
+                 '0 to never exit (default: 1h)')
+
+    def main(self, *, context):  # noqa: D102
+        socket_path = get_index_server_socket_path(create=True)
+        if socket_path is None:
+            return 'Unix domain sockets or a private runtime directory are ' \
+                'not available'
+        print('serving the mixin index on {socket_path}'.format_map(locals()))
+        if not serve_mixin_index(
+            poll_interval=context.args.poll_interval,
+            idle_timeout=context.args.idle_timeout or None,
+        ):
+            return 'The mixin index is already being served on ' \
+                '{socket_path}'.format_map(locals())
@@ -2,17 +2,17 @@
 # Licensed under the Apache License, Version 2.0
 
 from colcon_core.plugin_system import satisfies_version
-from colcon_mixin.mixin import get_mixins
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.mixin.index_server import get_index_snapshot
 from colcon_mixin.subverb import MixinSubverbExtensionPoint
 
 
-def _get_mixin_name_completer(verb_key, mixins_by_verb):
+def _get_mixin_name_completer(verb_key, get_snapshot):
     def mixin_name_completer(prefix, **kwargs):
         """Callable returning a list of mixin names."""
         args = kwargs.get('parsed_args', {})
         verb = getattr(args, verb_key)
-        key = tuple(verb.split('.'))
-        return mixins_by_verb.get(key, {}).keys()
+        return get_snapshot().get(verb, {}).keys()
     return mixin_name_completer
 
 
@@ -25,40 +25,43 @@ class ShowMixinSubverb(MixinSubverbExtensionPoint):
             MixinSubverbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
 
     def add_arguments(self, *, parser):  # noqa: D102
-        self.mixins_by_verb = get_mixins()
+        self._snapshot = None
         argument = parser.add_argument(
             'verb', nargs='?',
             help='Only show the mixins for a specific verb')
-        try:
-            from argcomplete.completers import ChoicesCompleter
-        except ImportError:
-            pass
-        else:
-            argument.completer = \
-                ChoicesCompleter(self.mixins_by_verb.keys())
+        argument.completer = get_choices_completer(
+            lambda: self._get_snapshot().keys())
         argument = parser.add_argument(
             'mixin_name', nargs='?',
             help='Only show a specific mixin for a specific verb')
         argument.completer = _get_mixin_name_completer(
-            'verb', self.mixins_by_verb)
+            'verb', self._get_snapshot)
+        parser.add_argument(
+            '--origin', action='store_true',
+            help='Show the file and line defining each mixin as well as the '
+                 'definitions it overrides')
+
+    def _get_snapshot(self):
+        # the mixins are only needed when completing or showing them
+        if self._snapshot is None:
+            self._snapshot = get_index_snapshot()
+        return self._snapshot
 
     def main(self, *, context):  # noqa: D102
-        if (
-            context.args.verb and
-            tuple(context.args.verb.split('.')) not in self.mixins_by_verb
-        ):
+        snapshot = self._get_snapshot()
+        if context.args.verb and context.args.verb not in snapshot:
             return "Passed verb name '{context.args.verb}' has no mixins" \
                 .format_map(locals())
 
-        for verb in sorted(self.mixins_by_verb.keys()):
+        for verb in sorted(snapshot.keys()):
             if context.args.verb:
-                if context.args.verb != '.'.join(verb):
+                if context.args.verb != verb:
                     continue
             else:
-                verb_space = ' '.join(verb)
+                verb_space = verb.replace('.', ' ')
                 print('{verb_space}:'.format_map(locals()))
 
-            mixins = self.mixins_by_verb[verb]
+            mixins = snapshot[verb]
             for mixin_name in sorted(mixins.keys()):
                 if context.args.mixin_name:
                     if context.args.mixin_name != mixin_name:
@@ -70,9 +73,19 @@ class ShowMixinSubverb(MixinSubverbExtensionPoint):
 
                 else:
                     print('- {mixin_name}'.format_map(locals()))
-                mixin_value = mixins[mixin_name]
+                mixin_value = mixins[mixin_name]['args']
+                indent = '  ' if context.args.mixin_name is None else ''
                 for arg_key, arg_value in mixin_value.items():
-                    indent = '  ' if context.args.mixin_name is None else ''
                     print(
                         '{indent}{arg_key}: {arg_value}'
                         .format_map(locals()))
+                if context.args.origin:
+                    origins = mixins[mixin_name]['origins']
+                    if not origins:
+                        continue
+                    origin = origins[0]
+                    print('{indent}origin: {origin}'.format_map(locals()))
+                    for overridden in origins[1:]:
+                        print(
+                            '{indent}overrides: {overridden}'
+                            .format_map(locals()))
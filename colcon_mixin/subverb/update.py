@@ -1,15 +1,48 @@
 # Copyright 2016-2018 Dirk Thomas
 # Licensed under the Apache License, Version 2.0
 
+from collections import OrderedDict
 import os
+from pathlib import Path
+import shutil
 import sys
+import time
 
+from colcon_core.command import add_subparsers
+from colcon_core.command import create_parser
 from colcon_core.plugin_system import satisfies_version
+from colcon_core.verb import get_verb_extensions
+from colcon_mixin.mixin import get_content_digest
 from colcon_mixin.mixin import get_mixin_files
+from colcon_mixin.mixin import get_mixin_locations
 from colcon_mixin.mixin import get_mixin_path
+from colcon_mixin.mixin.completer import get_choices_completer
+from colcon_mixin.mixin.git_repository import fetch_git_repository
+from colcon_mixin.mixin.git_repository import get_git_mixin_files
+from colcon_mixin.mixin.git_repository import is_git_url
+from colcon_mixin.mixin.metrics import METRICS_FORMATS
+from colcon_mixin.mixin.metrics import write_metrics_file
+from colcon_mixin.mixin.repository import argparse_duration
+from colcon_mixin.mixin.repository import commit_staged_repository
+from colcon_mixin.mixin.repository import decode_bundle_entry
+from colcon_mixin.mixin.repository import discard_staged_repository
+from colcon_mixin.mixin.repository import get_gc_threshold
+from colcon_mixin.mixin.repository import get_obsolete_files_by_repository
 from colcon_mixin.mixin.repository import get_repositories
+from colcon_mixin.mixin.repository import get_repository_manifest
+from colcon_mixin.mixin.repository import get_repository_max_age
+from colcon_mixin.mixin.repository import get_repository_metadata
 from colcon_mixin.mixin.repository import get_repository_mixin_files
+from colcon_mixin.mixin.repository import get_repository_staging_path
+from colcon_mixin.mixin.repository import get_repository_url
+from colcon_mixin.mixin.repository import get_unowned_mixin_files
 from colcon_mixin.mixin.repository import load_url
+from colcon_mixin.mixin.repository import OBSOLETE_SUFFIX
+from colcon_mixin.mixin.repository import prune_obsolete_files
+from colcon_mixin.mixin.repository import REPOSITORY_METADATA_FILENAME
+from colcon_mixin.mixin.repository import set_repository_metadata
+from colcon_mixin.mixin.schema import get_verb_schemas
+from colcon_mixin.mixin.schema import validate_mixin_data
 from colcon_mixin.subverb import MixinSubverbExtensionPoint
 import yaml
 
@@ -25,24 +58,60 @@ class UpdateMixinSubverb(MixinSubverbExtensionPoint):
     def add_arguments(self, *, parser):  # noqa: D102
         parser.description += '\n\n' \
             'For each repository all mixin files are being fetched. ' \
+            'The mixin files of a repository are only replaced if all of ' \
+            'them have been fetched successfully. ' \
+            'Mixin files which are unchanged since the last update are not ' \
+            'being downloaded again if the server supports conditional ' \
+            'requests using an ETag. ' \
+            'The directory of a repository is a symbolic link which is ' \
+            'being replaced atomically, where symbolic links are not ' \
+            'supported the directory is briefly missing while it is being ' \
+            'replaced. ' \
+            'Mixin files in the directory of a repository which are not ' \
+            'listed in the manifest of the previous update, e.g. added ' \
+            'manually, are being renamed like obsolete mixin files. ' \
             'The status if each mixin file is indicated by the following ' \
             'symbols:\n' \
             '  + added new mixin file\n' \
             '  * updated the existing mixin file\n' \
             '  . existing mixin file was already the same\n' \
-            '  - renamed obsolete mixin file'
+            '  - renamed obsolete mixin file\n' \
+            '  x removed obsolete mixin file\n\n' \
+            'If the environment variable COLCON_MIXIN_GC_THRESHOLD is set ' \
+            'and there are more obsolete mixin files at the end of the ' \
+            'update all of them are being removed.'
         argument = parser.add_argument(
             'name',
             nargs='?',
             help='Only update the mixin from a specific repository')
-        try:
-            from argcomplete.completers import ChoicesCompleter
-        except ImportError:
-            pass
-        else:
-            repos = get_repositories()
-            argument.completer = \
-                ChoicesCompleter(repos.keys())
+        argument.completer = get_choices_completer(
+            lambda: get_repositories().keys())
+        parser.add_argument(
+            '--validate', action='store_true',
+            help='Validate the mixins against the arguments of the available '
+                 'verbs and keep the previous mixin files of a repository if '
+                 'any of them is invalid')
+        parser.add_argument(
+            '--max-age',
+            type=argparse_duration, metavar='DURATION',
+            help='Skip repositories which have been updated successfully '
+                 'within this duration, a number with an optional unit s, m, '
+                 'h, d or w (default: the max-age of each repository, '
+                 'otherwise always update)')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Update all repositories independent of their age')
+        parser.add_argument(
+            '--metrics-file',
+            type=Path, metavar='PATH',
+            help='Write metrics about the update to a file, e.g. the time '
+                 'and number of bytes of each fetched URL and the number of '
+                 'modified mixin files of each repository')
+        parser.add_argument(
+            '--metrics-format',
+            choices=METRICS_FORMATS, default='json',
+            help='The format of the metrics file, Prometheus uses the text '
+                 'exposition format (default: json)')
 
     def main(self, *, context):  # noqa: D102
         repos = get_repositories()
@@ -50,62 +119,125 @@ class UpdateMixinSubverb(MixinSubverbExtensionPoint):
             return "Passed repository name '{context.args.name}' is unknown" \
                 .format_map(locals())
 
+        schemas = _get_verb_schemas() if context.args.validate else None
+
+        start = time.monotonic()
+        metrics = OrderedDict()
+        metrics['timestamp'] = time.time()
+        metrics['repositories'] = []
+        repository_metrics = None
+
         # IDEA fetch all resources in parallel
         rc = 0
         for name in sorted(repos.keys()):
             if context.args.name and context.args.name != name:
                 continue
 
-            # fetch the repository index
-            index_url = repos[name]
-            print('fetching {name}: {index_url} ...'.format_map(locals()))
-            try:
-                content = load_url(index_url)
-            except Exception as e:  # noqa: B902
-                print(' ', str(e), file=sys.stderr)
+            # the repository loop has many exit points, the duration of the
+            # previous repository ends when the next one starts
+            _finish_repository_metrics(repository_metrics)
+            index_url = get_repository_url(repos[name])
+            repository_metrics = _create_repository_metrics(name, index_url)
+            metrics['repositories'].append(repository_metrics)
+            if not index_url:
+                print("  The repository '{name}' has no url"
+                      .format_map(locals()), file=sys.stderr)
                 rc = 1
                 continue
 
-            # parse the repository index
+            # the metadata of the last successful update
+            metadata = get_repository_metadata(repository_name=name)
+
+            # skip the repository without any network I/O if it is fresh
+            if not context.args.force:
+                max_age = context.args.max_age
+                if max_age is None:
+                    try:
+                        max_age = get_repository_max_age(repos[name])
+                    except ValueError as e:  # noqa: F841
+                        print("  The max-age of the repository '{name}' is "
+                              'invalid: {e}'.format_map(locals()),
+                              file=sys.stderr)
+                        rc = 1
+                        continue
+                age = _get_repository_age(metadata, index_url)
+                if max_age is not None and age is not None and age < max_age:
+                    print('skipping {name}: updated {age:.0f}s ago'
+                          .format_map(locals()))
+                    repository_metrics['status'] = 'skipped'
+                    continue
+
+            # fetch the repository index or the git repository
+            print('fetching {name}: {index_url} ...'.format_map(locals()))
             try:
-                data = yaml.safe_load(content)
-            except yaml.YAMLError as e:
+                if is_git_url(index_url):
+                    mixin_sources = _fetch_git_mixin_sources(
+                        name, index_url, repository_metrics)
+                else:
+                    mixin_sources = _fetch_index_mixin_sources(
+                        index_url, repository_metrics)
+            except Exception as e:  # noqa: B902
                 print(' ', str(e), file=sys.stderr)
                 rc = 1
                 continue
-            if not isinstance(data, dict) or 'mixin' not in data.keys():
-                print('  The repository index should be a dictionary with a '
-                      "'mixin' key, but it is: {data}".format_map(locals()))
-                rc = 1
-                continue
 
             # get existing mixin files to remove obsolete ones later
-            mixin_files_before = get_repository_mixin_files(
+            destination_basepath = get_mixin_path() / name
+            previous_manifest = get_repository_manifest(
+                repository_name=name, metadata=metadata)
+            if previous_manifest is not None:
+                mixin_files_before = [
+                    str(destination_basepath / entry['name'])
+                    for entry in previous_manifest]
+            else:
+                mixin_files_before = get_repository_mixin_files(
+                    repository_name=name)
+
+            # stage all mixin files referenced in the index in a separate
+            # directory and only replace the repository if all succeeded
+            discard_staged_repository(repository_name=name)
+            staging_basepath = get_repository_staging_path(
                 repository_name=name)
+            os.makedirs(str(staging_basepath))
+            failed = False
+
+            # the entity tags of the previously fetched mixin files which
+            # are still the same locally
+            previous_entries = {
+                entry['name']: entry for entry in previous_manifest or ()}
+            etags = {}
 
-            # fetch all mixin files referenced in the index
-            mixin_urls = data['mixin']
             mixin_basenames = set()
-            for mixin_url in mixin_urls:
-                # if mixin URL is relative prefix the dirname of the index
-                if (
-                    '://' not in mixin_url and
-                    not os.path.isabs(mixin_url)
-                ):
-                    mixin_url = \
-                        os.path.dirname(index_url) + '/' + mixin_url
-
-                # fetch the mixin file
-                print('  fetching {mixin_url} ...'.format_map(locals()))
-                try:
-                    content = load_url(mixin_url)
-                except Exception as e:  # noqa: B902
-                    print('  -', str(e), file=sys.stderr)
-                    rc = 1
-                    continue
+            manifest = OrderedDict()
+            for mixin_basename, mixin_url, entry in mixin_sources:
+                if mixin_url is None:
+                    # decode the mixin file from the bundle
+                    print('  unpacking {mixin_basename} ...'
+                          .format_map(locals()))
+                    try:
+                        content = _decode_bundle_entry(mixin_basename, entry)
+                    except ValueError as e:
+                        print('  -', str(e), file=sys.stderr)
+                        failed = True
+                        continue
+                else:
+                    # fetch the mixin file
+                    print('  fetching {mixin_url} ...'.format_map(locals()))
+                    previous_content = _get_previous_content(
+                        destination_basepath, previous_entries.get(
+                            mixin_basename), mixin_url, etags)
+                    try:
+                        content = _load_url(
+                            mixin_url, repository_metrics, etags=etags)
+                    except Exception as e:  # noqa: B902
+                        print('  -', str(e), file=sys.stderr)
+                        failed = True
+                        continue
+                    if content is None:
+                        # the mixin file hasn't been modified
+                        content = previous_content
 
                 # save the mixin file
-                mixin_basename = os.path.basename(mixin_url)
                 if mixin_basename in mixin_basenames:
                     print('  Multiple mixin files with the same basename '
                           "'{mixin_basename}'".format_map(locals()),
@@ -113,8 +245,14 @@ class UpdateMixinSubverb(MixinSubverbExtensionPoint):
                 else:
                     mixin_basenames.add(mixin_basename)
 
-                destination_basepath = get_mixin_path() / name
-                os.makedirs(str(destination_basepath), exist_ok=True)
+                if schemas is not None:
+                    messages = _validate_mixin_content(content, schemas)
+                    if messages:
+                        for message in messages:
+                            print('  !', message, file=sys.stderr)
+                        failed = True
+                        continue
+
                 destination_path = destination_basepath / mixin_basename
                 if not destination_path.exists():
                     mod = '+'
@@ -125,23 +263,322 @@ class UpdateMixinSubverb(MixinSubverbExtensionPoint):
                         # IDEA show the diff if the file already exists
                         mod = '*'
                 print(' ', mod, str(destination_path))
-                with destination_path.open('w') as h:
+                repository_metrics['files'][_MODIFICATIONS[mod]] += 1
+                with (staging_basepath / mixin_basename).open('w') as h:
                     h.write(content)
+                manifest[mixin_basename] = {
+                    'name': mixin_basename,
+                    'sha256': get_content_digest(content),
+                    'url': mixin_url or index_url,
+                }
+                if mixin_url is not None and etags.get(mixin_url):
+                    manifest[mixin_basename]['etag'] = etags[mixin_url]
 
-            # remove / rename obsolete mixin files
-            for mixin_file in mixin_files_before:
-                if os.path.basename(mixin_file) not in mixin_basenames:
-                    os.rename(mixin_file, mixin_file + '.obsolete')
-                    print('  - {mixin_file} -> *.obsolete'
-                          .format_map(locals()))
+            if failed:
+                discard_staged_repository(repository_name=name)
+                print('  Keeping the previous mixin files of the repository '
+                      "'{name}'".format_map(locals()), file=sys.stderr)
+                rc = 1
+                continue
+
+            # carry over the previously obsoleted files and rename obsolete
+            # mixin files
+            obsolete_files = {
+                os.path.relpath(mixin_file, str(destination_basepath))
+                for mixin_file in mixin_files_before
+                if os.path.basename(mixin_file) not in mixin_basenames}
+            if previous_manifest is not None:
+                # mixin files added manually to the directory of the
+                # repository are being loaded but they aren't listed in the
+                # manifest, rename them like obsolete mixin files
+                obsolete_files.update(
+                    relpath for relpath in _get_unlisted_mixin_files(
+                        destination_basepath, previous_manifest)
+                    if relpath not in mixin_basenames)
+            if previous_manifest is not None:
+                # trust the manifest instead of crawling the repository
+                carry_over_files = obsolete_files.union(
+                    _get_obsolete_filenames(metadata))
+            else:
+                # without a manifest all other files are being kept
+                carry_over_files = _get_relative_paths(destination_basepath)
+            obsolete_filenames = _carry_over_files(
+                destination_basepath, staging_basepath, carry_over_files,
+                mixin_basenames, obsolete_files)
+            set_repository_metadata(
+                repository_name=name, metadata={
+                    'url': index_url,
+                    'last_update': time.time(),
+                    'files': list(manifest.values()),
+                    'obsolete_files': obsolete_filenames,
+                }, staged=True)
+            commit_staged_repository(repository_name=name)
+            repository_metrics['status'] = 'updated'
+            for relpath in sorted(obsolete_files):
+                mixin_file = destination_basepath / relpath
+                print('  - {mixin_file} -> *.obsolete'.format_map(locals()))
+                repository_metrics['files']['obsolete'] += 1
+        _finish_repository_metrics(repository_metrics)
 
         # remove / rename mixin files from obsolete repositories
-        obsolete_files = set(get_mixin_files())
-        for name in repos.keys():
-            obsolete_files -= set(get_repository_mixin_files(
-                repository_name=name))
+        obsolete_files = get_unowned_mixin_files(repos.keys())
         for mixin_file in sorted(obsolete_files):
-            os.rename(mixin_file, mixin_file + '.obsolete')
+            os.rename(mixin_file, mixin_file + OBSOLETE_SUFFIX)
+            # the modification time indicates when the file became obsolete
+            os.utime(mixin_file + OBSOLETE_SUFFIX)
             print('  - {mixin_file} -> *.obsolete'.format_map(locals()))
+        metrics['obsolete_files'] = len(obsolete_files)
+        metrics['pruned_files'] = 0
+
+        # prune the obsolete mixin files if there are too many of them
+        threshold = get_gc_threshold()
+        if threshold is not None:
+            files_by_repository = get_obsolete_files_by_repository()
+            count = sum(len(files) for files in files_by_repository.values())
+            if count > threshold:
+                pruned_files = prune_obsolete_files(files_by_repository)
+                for mixin_file in pruned_files:
+                    print('  x {mixin_file}'.format_map(locals()))
+                metrics['pruned_files'] = len(pruned_files)
+
+        if context.args.metrics_file:
+            metrics['duration'] = time.monotonic() - start
+            metrics['return_code'] = rc
+            try:
+                write_metrics_file(
+                    context.args.metrics_file, metrics,
+                    context.args.metrics_format)
+            except OSError as e:  # noqa: F841
+                print('  Failed to write the metrics file: {e}'
+                      .format_map(locals()), file=sys.stderr)
+                rc = 1
 
         return rc
+
+
+def _get_relative_paths(basepath):
+    relative_paths = set()
+    if not get_mixin_locations().is_dir(basepath):
+        return relative_paths
+    for dirpath, _, filenames in os.walk(str(basepath)):
+        for filename in filenames:
+            relative_paths.add(os.path.relpath(
+                os.path.join(dirpath, filename), str(basepath)))
+    return relative_paths
+
+
+def _get_unlisted_mixin_files(basepath, manifest):
+    listed_files = {entry['name'] for entry in manifest}
+    return [
+        relpath for relpath in (
+            os.path.relpath(mixin_file, str(basepath))
+            for mixin_file in get_mixin_files(basepath))
+        if relpath not in listed_files]
+
+
+def _get_obsolete_filenames(metadata):
+    # the obsolete files kept by the last successful update
+    filenames = metadata.get('obsolete_files')
+    if not isinstance(filenames, list):
+        return set()
+    return {f for f in filenames if isinstance(f, str)}
+
+
+def _carry_over_files(
+    source_basepath, destination_basepath, relative_paths, skip_files,
+    obsolete_files
+):
+    # handle obsolete files last so that they replace existing *.obsolete files
+    relative_paths = sorted(
+        relative_paths,
+        key=lambda relpath: (relpath in obsolete_files, relpath))
+    obsolete_filenames = set()
+    for relpath in relative_paths:
+        if relpath in skip_files or relpath == REPOSITORY_METADATA_FILENAME:
+            continue
+        source_path = os.path.join(str(source_basepath), relpath)
+        if not os.path.isfile(source_path):
+            # e.g. obsolete files which have been pruned in the meantime
+            continue
+        destination_relpath = relpath
+        if relpath in obsolete_files:
+            destination_relpath += OBSOLETE_SUFFIX
+        if destination_relpath.endswith(OBSOLETE_SUFFIX):
+            obsolete_filenames.add(destination_relpath)
+        destination_path = os.path.join(
+            str(destination_basepath), destination_relpath)
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        if os.path.lexists(destination_path):
+            os.remove(destination_path)
+        if relpath in obsolete_files:
+            # a new file whose modification time indicates when it became
+            # obsolete
+            shutil.copyfile(source_path, destination_path)
+            continue
+        # the files are never modified in place so they can be shared
+        try:
+            os.link(source_path, destination_path)
+        except OSError:
+            shutil.copy2(source_path, destination_path)
+    return sorted(obsolete_filenames)
+
+
+# the keys of the counted mixin files by the symbol of their modification
+_MODIFICATIONS = {
+    '+': 'added',
+    '*': 'updated',
+    '.': 'unchanged',
+    '-': 'obsolete',
+}
+
+
+def _create_repository_metrics(name, index_url):
+    repository_metrics = OrderedDict()
+    repository_metrics['name'] = name
+    repository_metrics['url'] = index_url
+    repository_metrics['status'] = 'failed'
+    repository_metrics['start'] = time.monotonic()
+    repository_metrics['files'] = OrderedDict(
+        (key, 0) for key in _MODIFICATIONS.values())
+    repository_metrics['urls'] = []
+    return repository_metrics
+
+
+def _finish_repository_metrics(repository_metrics):
+    if repository_metrics is not None and 'start' in repository_metrics:
+        repository_metrics['duration'] = \
+            time.monotonic() - repository_metrics.pop('start')
+
+
+def _get_previous_content(basepath, manifest_entry, url, etags):
+    # the content of the mixin file from the previous update if it has been
+    # fetched from the same URL with an entity tag and is unchanged locally,
+    # the entity tag is being added to make a conditional request
+    etags.pop(url, None)
+    if (
+        manifest_entry is None or manifest_entry.get('url') != url or
+        not manifest_entry.get('etag')
+    ):
+        return None
+    try:
+        content = (basepath / manifest_entry['name']).read_text()
+    except OSError:
+        return None
+    if get_content_digest(content) != manifest_entry.get('sha256'):
+        return None
+    etags[url] = manifest_entry['etag']
+    return content
+
+
+def _load_url(url, repository_metrics, *, etags=None):
+    url_metrics = OrderedDict()
+    url_metrics['url'] = url
+    repository_metrics['urls'].append(url_metrics)
+    start = time.monotonic()
+    try:
+        return load_url(url, metrics=url_metrics, etags=etags)
+    except Exception as e:  # noqa: B902
+        url_metrics['error'] = str(e)
+        raise
+    finally:
+        url_metrics['duration'] = time.monotonic() - start
+
+
+def _fetch_index_mixin_sources(index_url, repository_metrics):
+    content = _load_url(index_url, repository_metrics)
+
+    # parse the repository index
+    data = yaml.safe_load(content)
+    if not isinstance(data, dict) or not (
+        'mixin' in data.keys() or 'bundle' in data.keys()
+    ):
+        raise ValueError(
+            'The repository index should be a dictionary with a '
+            "'mixin' and / or 'bundle' key, but it is: {data}"
+            .format_map(locals()))
+    if not isinstance(data.get('bundle') or {}, dict):
+        raise ValueError(
+            "The 'bundle' of the repository index should be a dictionary "
+            'mapping basenames to the content')
+
+    # the mixin files inline in the index as well as the URLs of the
+    # mixin files referenced in the index
+    bundle = data.get('bundle') or {}
+    mixin_sources = [
+        (mixin_basename, None, entry)
+        for mixin_basename, entry in bundle.items()]
+    for mixin_url in data.get('mixin') or []:
+        # if mixin URL is relative prefix the dirname of the index
+        if (
+            '://' not in mixin_url and
+            not os.path.isabs(mixin_url)
+        ):
+            mixin_url = os.path.dirname(index_url) + '/' + mixin_url
+        mixin_sources.append(
+            (os.path.basename(mixin_url), mixin_url, None))
+    return mixin_sources
+
+
+def _fetch_git_mixin_sources(name, url, repository_metrics):
+    url_metrics = OrderedDict()
+    url_metrics['url'] = url
+    repository_metrics['urls'].append(url_metrics)
+    start = time.monotonic()
+    try:
+        commit = fetch_git_repository(repository_name=name, url=url)
+        mixin_files = get_git_mixin_files(
+            repository_name=name, commit=commit)
+    except Exception as e:  # noqa: B902
+        url_metrics['error'] = str(e)
+        raise
+    finally:
+        url_metrics['duration'] = time.monotonic() - start
+    url_metrics['commit'] = commit
+    url_metrics['bytes'] = sum(len(content) for _, content in mixin_files)
+
+    # the checked out mixin files are handled like inline bundle entries
+    return [
+        (path.rsplit('/', 1)[-1], None, {'content': content})
+        for path, content in mixin_files]
+
+
+def _get_repository_age(metadata, index_url):
+    # the age is only known if the last update used the same index
+    if metadata.get('url') != index_url:
+        return None
+    last_update = metadata.get('last_update')
+    if not isinstance(last_update, (int, float)):
+        return None
+    return max(time.time() - last_update, 0)
+
+
+def _decode_bundle_entry(mixin_basename, entry):
+    mixin_basename = str(mixin_basename)
+    if (
+        not mixin_basename or mixin_basename.startswith('.') or
+        '/' in mixin_basename or '\\' in mixin_basename
+    ):
+        raise ValueError(
+            "Invalid basename '{mixin_basename}' in the bundle"
+            .format_map(locals()))
+    try:
+        return decode_bundle_entry(entry)
+    except ValueError as e:  # noqa: F841
+        raise ValueError(
+            "Bundle entry '{mixin_basename}': {e}".format_map(locals()))
+
+
+def _get_verb_schemas():
+    # create a parser with the arguments of all available verbs
+    parser = create_parser('colcon_core.environment_variable')
+    add_subparsers(
+        parser, 'colcon', get_verb_extensions(), attribute='verb_name')
+    return get_verb_schemas(parser)
+
+
+def _validate_mixin_content(content, schemas):
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        return [str(e)]
+    return validate_mixin_data(data, schemas)
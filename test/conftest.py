@@ -0,0 +1,165 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+class MixinServer(ThreadingMixIn, HTTPServer):
+    """
+    A local HTTP server serving mixin repository indexes and mixin files.
+
+    The served files, the latency of each response as well as injected
+    failures can be changed while the server is running.
+    Each response contains an ETag header and conditional requests with a
+    matching If-None-Match header are answered with 304 Not Modified.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):  # noqa: D107
+        super().__init__(('127.0.0.1', 0), _MixinRequestHandler)
+        # mapping of URL paths to the content
+        self.files = {}
+        # the delay in seconds before each response
+        self.latency = 0
+        # mapping of URL paths to a list of injected failures, each being
+        # either an HTTP status code or the number of seconds to stall
+        self.failures = {}
+        # list of requested URL paths
+        self.requests = []
+        # list of requested URL paths answered with 304 Not Modified
+        self.not_modified = []
+
+    @property
+    def url(self):  # noqa: D102
+        return 'http://{0}:{1}'.format(*self.server_address)
+
+    def add_repository(self, name, mixin_files, *, index_name='index.yaml'):
+        """Serve a repository index referencing the passed mixin files."""
+        index = 'mixin:\n' + ''.join(
+            '  - {basename}\n'.format_map(locals())
+            for basename in sorted(mixin_files.keys()))
+        self.files['/{name}/{index_name}'.format_map(locals())] = index
+        for basename, content in mixin_files.items():
+            self.files['/{name}/{basename}'.format_map(locals())] = content
+        return '{self.url}/{name}/{index_name}'.format_map(locals())
+
+    def add_bundle_repository(
+        self, name, mixin_files, *, encoding='gzip+base64',
+        index_name='index.yaml'
+    ):
+        """Serve a repository index containing the passed mixin files."""
+        from colcon_mixin.mixin.repository import create_bundle_entry
+        import yaml
+        index = yaml.safe_dump({'bundle': {
+            basename: create_bundle_entry(content, encoding=encoding)
+            for basename, content in mixin_files.items()}})
+        self.files['/{name}/{index_name}'.format_map(locals())] = index
+        return '{self.url}/{name}/{index_name}'.format_map(locals())
+
+
+class _MixinRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # noqa: N802
+        server = self.server
+        server.requests.append(self.path)
+        if server.latency:
+            time.sleep(server.latency)
+
+        failures = server.failures.get(self.path)
+        if failures:
+            failure = failures.pop(0)
+            if isinstance(failure, float):
+                # stall to trigger a timeout of the client
+                time.sleep(failure)
+            else:
+                self.send_error(failure)
+                return
+
+        content = server.files.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        data = content.encode('utf-8')
+        # support conditional requests based on the content
+        etag = '"{0}"'.format(hashlib.sha256(data).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            server.not_modified.append(self.path)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def pytest_collection_modifyitems(config, items):
+    # benchmarks only run when being selected explicitly
+    if 'benchmark' in (config.getoption('markexpr') or ''):
+        return
+    skip_benchmark = pytest.mark.skip(
+        reason="benchmarks only run with '-m benchmark'")
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+@pytest.fixture
+def mixin_server():
+    server = MixinServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@pytest.fixture
+def colcon_home(tmp_path, monkeypatch):
+    from colcon_core.location import set_default_config_path
+    monkeypatch.delenv('COLCON_HOME', raising=False)
+    monkeypatch.delenv('COLCON_MIXIN_PATH', raising=False)
+    monkeypatch.delenv('COLCON_MIXIN_SHARED_PATH', raising=False)
+    monkeypatch.delenv('COLCON_MIXIN_GC_THRESHOLD', raising=False)
+    set_default_config_path(path=tmp_path)
+
+    import colcon_mixin.mixin
+    from colcon_mixin.mixin import repository
+    monkeypatch.setattr(colcon_mixin.mixin, 'mixins_by_verb', None)
+    colcon_mixin.mixin.invalidate_mixin_locations()
+    monkeypatch.setattr(
+        repository, 'mixin_repositories_file',
+        tmp_path / 'mixin_repositories.yaml')
+    yield tmp_path
+    colcon_mixin.mixin.invalidate_mixin_locations()
+
+
+@pytest.fixture
+def run_subverb(colcon_home):
+    def run(name, argv):
+        from colcon_mixin.subverb import get_subverb_extensions
+        extension = get_subverb_extensions()[name]
+        parser = argparse.ArgumentParser(description='')
+        extension.add_arguments(parser=parser)
+        args = parser.parse_args(argv)
+        return extension.main(context=SimpleNamespace(args=args))
+    return run
@@ -0,0 +1,86 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# modules which should only be imported when they are actually needed,
+# colcon itself already imports e.g. socket and subprocess
+FORBIDDEN_MODULES = {
+    'argcomplete', 'hashlib', 'http', 'json', 'socketserver',
+    'urllib.error', 'urllib.request', 'yaml'}
+
+# the modules of this package needed to add the mixin arguments, the modules
+# of the subverbs and e.g. for fetching repositories are only imported when
+# being used
+EXPECTED_PACKAGE_MODULES = {
+    'colcon_mixin',
+    'colcon_mixin.mixin',
+    'colcon_mixin.mixin.completer',
+    'colcon_mixin.mixin.merged_args',
+    'colcon_mixin.mixin.mixin_argument',
+    'colcon_mixin.mixin.schema',
+    'colcon_mixin.subverb',
+    'colcon_mixin.verb',
+    'colcon_mixin.verb.mixin',
+}
+
+MARKER = '-- imported modules --'
+
+# run colcon loading all entry points, e.g. the environment variables, the
+# argument parser decorators and the verbs
+SCRIPT = """\
+import sys
+
+from colcon_core.command import main
+try:
+    from importlib.metadata import distribution
+except ImportError:  # Python < 3.8
+    from importlib_metadata import distribution
+
+# import the modules of all entry points which are loaded by colcon commands
+# independent of the passed arguments
+for entry_point in distribution('colcon-mixin').entry_points:
+    if entry_point.group.startswith('colcon_core.'):
+        __import__(entry_point.value.split(':')[0])
+
+try:
+    main(argv=sys.argv[1:])
+except SystemExit:
+    pass
+sys.stderr.write({marker!r} + '\\n' + '\\n'.join(sys.modules) + '\\n')
+""".format(marker=MARKER)
+
+
+@pytest.mark.parametrize('argv', [['--help'], ['build', '--help']])
+def test_imported_modules(tmp_path, argv):
+    env = dict(os.environ)
+    for name in (
+        'COLCON_MIXIN_PATH', 'COLCON_MIXIN_SHARED_PATH',
+        'COLCON_MIXIN_ARGS_CACHE', 'COLCON_MIXIN_INDEX_SERVER',
+    ):
+        env.pop(name, None)
+    env['COLCON_HOME'] = str(tmp_path / 'home')
+    result = subprocess.run(
+        [sys.executable, '-c', SCRIPT] + argv,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, env=env, cwd=str(tmp_path), check=True)
+    lines = result.stderr.splitlines()
+    assert MARKER in lines
+    modules = lines[lines.index(MARKER) + 1:]
+
+    imported = sorted(
+        module for module in modules
+        if any(
+            module == forbidden or module.startswith(forbidden + '.')
+            for forbidden in FORBIDDEN_MODULES))
+    assert not imported, \
+        'Modules imported without being needed: ' + ', '.join(imported)
+
+    package_modules = {
+        module for module in modules
+        if module == 'colcon_mixin' or module.startswith('colcon_mixin.')}
+    assert package_modules == EXPECTED_PACKAGE_MODULES
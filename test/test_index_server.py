@@ -0,0 +1,244 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'),
+    reason='Unix domain sockets are not supported')
+
+
+@pytest.fixture
+def index_server(colcon_home, tmp_path_factory, monkeypatch):
+    from colcon_mixin.mixin.index_server import query_index_server
+    from colcon_mixin.mixin.index_server import serve_mixin_index
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path_factory.mktemp('run')))
+    monkeypatch.delenv('COLCON_MIXIN_INDEX_SERVER', raising=False)
+    (colcon_home / 'mixin').mkdir()
+    (colcon_home / 'mixin' / 'a.mixin').write_text("""\
+build:
+  debug:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=Debug']
+""")
+    thread = threading.Thread(
+        target=serve_mixin_index,
+        kwargs={'poll_interval': 0, 'idle_timeout': 0.5})
+    thread.start()
+    for _ in range(100):
+        if query_index_server('ping') == 'pong':
+            break
+        time.sleep(0.01)
+    yield colcon_home / 'mixin'
+    thread.join()
+
+
+def test_index_server(index_server):
+    from colcon_mixin.mixin.index_server import get_served_mixins
+    from colcon_mixin.mixin.index_server import query_index_server
+    from colcon_mixin.mixin.index_server import serve_mixin_index
+    snapshot = query_index_server('snapshot')
+    assert snapshot == {'build': {'debug': {
+        'args': {'cmake-args': ['-DCMAKE_BUILD_TYPE=Debug']},
+        'origins': ['{0}:2'.format(index_server / 'a.mixin')],
+    }}}
+    assert query_index_server('unknown') is None
+    # only a single server is running
+    assert not serve_mixin_index()
+
+    # the served index is reloaded when the mixin files change
+    (index_server / 'b.mixin').write_text('test:\n  verbose: {}\n')
+    assert get_served_mixins() == {
+        ('build', ): {
+            'debug': {'cmake-args': ['-DCMAKE_BUILD_TYPE=Debug']}},
+        ('test', ): {'verbose': {}},
+    }
+
+
+def test_show_uses_index_server(
+    index_server, run_subverb, capsys, monkeypatch
+):
+    from colcon_mixin.mixin import index_server as module
+
+    def get_mixins():
+        assert False, 'The mixins should not be loaded by the client'
+    # the server only reloads the mixins if the files change
+    monkeypatch.setattr(module, 'get_mixins', get_mixins)
+
+    capsys.readouterr()
+    assert run_subverb('show', ['build', '--origin']) is None
+    assert capsys.readouterr().out.splitlines() == [
+        '- debug',
+        "  cmake-args: ['-DCMAKE_BUILD_TYPE=Debug']",
+        '  origin: {0}:2'.format(index_server / 'a.mixin'),
+    ]
+
+
+def test_query_without_server(colcon_home, tmp_path_factory, monkeypatch):
+    from colcon_mixin.mixin import index_server
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path_factory.mktemp('run')))
+    started = []
+    monkeypatch.setattr(
+        index_server, 'start_index_server', lambda: started.append(True))
+
+    monkeypatch.delenv('COLCON_MIXIN_INDEX_SERVER', raising=False)
+    assert index_server.query_index_server('ping') is None
+    assert index_server.get_served_mixins() is None
+    assert not started
+
+    # the server is started on demand
+    monkeypatch.setenv('COLCON_MIXIN_INDEX_SERVER', '1')
+    assert index_server.query_index_server('ping') is None
+    assert started
+
+
+def test_socket_path_without_runtime_dir(
+    colcon_home, tmp_path_factory, monkeypatch
+):
+    import os
+    import tempfile
+    from colcon_mixin.mixin import index_server
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.delenv('COLCON_MIXIN_INDEX_SERVER', raising=False)
+    temp_path = str(tmp_path_factory.mktemp('tmp'))
+    monkeypatch.setattr(tempfile, 'tempdir', temp_path)
+    runtime_path = os.path.join(
+        temp_path, 'colcon-mixin-{0}'.format(os.getuid()))
+    started = []
+    monkeypatch.setattr(
+        index_server, 'start_index_server', lambda: started.append(True))
+
+    # querying doesn't create the private directory
+    assert index_server.get_index_server_socket_path() is None
+    assert index_server.query_index_server('ping') is None
+    assert not os.path.exists(runtime_path)
+    assert not started
+
+    # but the server is still started on demand
+    monkeypatch.setenv('COLCON_MIXIN_INDEX_SERVER', '1')
+    assert index_server.query_index_server('ping') is None
+    assert started
+
+    # which creates the private directory
+    socket_path = index_server.get_index_server_socket_path(create=True)
+    assert str(socket_path.parent) == runtime_path
+    assert os.stat(runtime_path).st_mode & 0o777 == 0o700
+    assert index_server.get_index_server_socket_path() == socket_path
+
+
+def test_start_index_server(colcon_home, tmp_path_factory, monkeypatch):
+    from colcon_mixin.mixin import index_server
+    runtime_path = tmp_path_factory.mktemp('run')
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(runtime_path))
+    monkeypatch.setenv('COLCON_MIXIN_INDEX_SERVER', '1')
+    monkeypatch.setattr(index_server, 'ON_DEMAND_IDLE_TIMEOUT', 1)
+    (colcon_home / 'mixin').mkdir()
+    (colcon_home / 'mixin' / 'a.mixin').write_text('build:\n  debug: {}\n')
+
+    # the first query starts the server in a separate process
+    assert index_server.query_index_server('ping') is None
+    monkeypatch.delenv('COLCON_MIXIN_INDEX_SERVER')
+    for _ in range(200):
+        snapshot = index_server.query_index_server('snapshot')
+        if snapshot is not None:
+            break
+        time.sleep(0.05)
+    assert snapshot == {'build': {'debug': {
+        'args': {}, 'origins': [str(colcon_home / 'mixin' / 'a.mixin:2')]}}}
+
+    # the server exits after being idle
+    socket_path = index_server.get_index_server_socket_path()
+    for _ in range(200):
+        if not socket_path.exists():
+            break
+        time.sleep(0.05)
+    assert not socket_path.exists()
+
+
+@pytest.mark.skipif(
+    not os.path.isdir('/proc'), reason='The processes can not be listed')
+def test_start_index_server_once(colcon_home, tmp_path_factory, monkeypatch):
+    from colcon_mixin.mixin import index_server
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path_factory.mktemp('run')))
+    monkeypatch.setenv('COLCON_MIXIN_INDEX_SERVER', '1')
+    monkeypatch.setattr(index_server, 'ON_DEMAND_IDLE_TIMEOUT', 4)
+    # loading many mixin files delays the server
+    (colcon_home / 'mixin').mkdir()
+    for i in range(500):
+        (colcon_home / 'mixin' / '{0}.mixin'.format(i)).write_text(
+            'build:\n  m{0}: {{}}\n'.format(i))
+
+    # each query before the server is ready starts another server
+    for _ in range(5):
+        assert index_server.query_index_server('ping', timeout=0.1) is None
+    monkeypatch.delenv('COLCON_MIXIN_INDEX_SERVER')
+    started_pids = set()
+    for _ in range(200):
+        started_pids.update(_get_index_server_pids(colcon_home))
+        if index_server.query_index_server('ping') == 'pong':
+            break
+        time.sleep(0.05)
+    else:
+        assert False, 'The mixin index server did not start'
+
+    # only a single server keeps running, the others exit right away instead
+    # of starting further servers or waiting for the idle timeout
+    for _ in range(40):
+        pids = _get_index_server_pids(colcon_home)
+        started_pids.update(pids)
+        if len(pids) <= 1:
+            break
+        time.sleep(0.05)
+    assert len(pids) == 1
+    assert len(started_pids) <= 5
+    assert index_server.query_index_server('ping') == 'pong'
+
+    # the server exits after being idle
+    for _ in range(200):
+        if not _get_index_server_pids(colcon_home):
+            break
+        time.sleep(0.05)
+    assert not _get_index_server_pids(colcon_home)
+
+
+def _get_index_server_pids(colcon_home):
+    # the processes of the servers using the passed configuration path
+    pids = []
+    for pid in os.listdir('/proc'):
+        try:
+            with open('/proc/{0}/cmdline'.format(pid), 'rb') as h:
+                cmdline = h.read().split(b'\0')
+            with open('/proc/{0}/environ'.format(pid), 'rb') as h:
+                environ = h.read().split(b'\0')
+        except OSError:
+            continue
+        if (
+            b'colcon_mixin.mixin.index_server' in cmdline and
+            'COLCON_HOME={0}'.format(colcon_home).encode() in environ
+        ):
+            pids.append(int(pid))
+    return pids
+
+
+def test_completion_with_mixin_files(
+    index_server, tmp_path, monkeypatch
+):
+    from colcon_mixin.mixin.mixin_argument import MixinArgumentParserDecorator
+    monkeypatch.setenv('_ARGCOMPLETE', '1')
+    parser = MixinArgumentParserDecorator().decorate_argument_parser(
+        parser=argparse.ArgumentParser(prog='colcon'))
+    subparsers = parser.add_subparsers(dest='verb_name')
+    subparsers.add_parser('build').add_argument('--cmake-args', nargs='*')
+    subparsers.add_parser('test').add_argument('--pytest-args', nargs='*')
+    # the file adds mixins for a verb without any served mixins
+    mixin_file = tmp_path / 'extra.mixin'
+    mixin_file.write_text("test:\n  verbose:\n    pytest-args: ['-v']\n")
+
+    args = parser.parse_args([
+        'test', '--mixin-files', str(mixin_file), '--mixin', 'verbose'])
+    assert args.pytest_args == ['-v']
@@ -0,0 +1,88 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import socket
+from urllib.error import HTTPError
+from urllib.error import URLError
+from urllib.request import Request
+from urllib.request import urlopen
+
+import pytest
+
+
+def test_load_url(colcon_home, mixin_server):
+    from colcon_mixin.mixin.repository import load_url
+    mixin_server.files['/foo.mixin'] = 'build: {}\n'
+    assert load_url(mixin_server.url + '/foo.mixin') == 'build: {}\n'
+
+    with pytest.raises(HTTPError) as e:
+        load_url(mixin_server.url + '/missing.mixin')
+    assert e.value.code == 404
+    assert mixin_server.requests == ['/foo.mixin', '/missing.mixin']
+
+
+def test_load_url_conditional(colcon_home, mixin_server):
+    from colcon_mixin.mixin.repository import load_url
+    mixin_server.files['/foo.mixin'] = 'build: {}\n'
+    url = mixin_server.url + '/foo.mixin'
+    etags = {}
+    assert load_url(url, etags=etags) == 'build: {}\n'
+    etag = etags[url]
+    assert etag
+
+    # the unmodified content isn't being transferred again
+    metrics = {}
+    assert load_url(url, etags=etags, metrics=metrics) is None
+    assert etags == {url: etag}
+    assert metrics['bytes'] == 0
+    assert mixin_server.not_modified == ['/foo.mixin']
+
+    mixin_server.files['/foo.mixin'] = 'test: {}\n'
+    assert load_url(url, etags=etags) == 'test: {}\n'
+    assert etags[url] != etag
+
+
+def test_load_url_retry_unavailable(colcon_home, mixin_server):
+    from colcon_mixin.mixin.repository import load_url
+    mixin_server.files['/foo.mixin'] = 'build: {}\n'
+    mixin_server.failures['/foo.mixin'] = [503, 503]
+    url = mixin_server.url + '/foo.mixin'
+    assert load_url(url, retry_period=0) == 'build: {}\n'
+    assert len(mixin_server.requests) == 3
+
+    mixin_server.failures['/foo.mixin'] = [503, 503]
+    with pytest.raises(HTTPError) as e:
+        load_url(url, retry=1, retry_period=0)
+    assert e.value.code == 503
+
+
+def test_load_url_retry_timeout(colcon_home, mixin_server):
+    from colcon_mixin.mixin.repository import load_url
+    mixin_server.files['/foo.mixin'] = 'build: {}\n'
+    mixin_server.failures['/foo.mixin'] = [0.5]
+    url = mixin_server.url + '/foo.mixin'
+    assert load_url(url, retry_period=0, timeout=0.2) == 'build: {}\n'
+
+    mixin_server.failures['/foo.mixin'] = [0.5, 0.5]
+    with pytest.raises((URLError, socket.timeout)):
+        load_url(url, retry=1, retry_period=0, timeout=0.2)
+
+
+def test_mixin_server_etag(mixin_server):
+    mixin_server.files['/foo.mixin'] = 'build: {}\n'
+    url = mixin_server.url + '/foo.mixin'
+    with urlopen(url) as response:
+        etag = response.headers['ETag']
+    assert etag
+
+    # a conditional request for the same content isn't answered with it
+    with pytest.raises(HTTPError) as e:
+        urlopen(Request(url, headers={'If-None-Match': etag}))
+    assert e.value.code == 304
+    assert e.value.headers['ETag'] == etag
+
+    # but the changed content is
+    mixin_server.files['/foo.mixin'] = 'test: {}\n'
+    with urlopen(Request(url, headers={'If-None-Match': etag})) as response:
+        assert response.read() == b'test: {}\n'
+        assert response.headers['ETag'] != etag
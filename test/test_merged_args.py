@@ -0,0 +1,228 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+DESTINATIONS = {
+    'cmake-args': 'cmake_args',
+    'parallel-workers': 'parallel_workers',
+    'build-base': 'build_base',
+}
+
+
+def test_merge_stacked_lists():
+    from colcon_mixin.mixin.merged_args import merge_mixin_args
+    merged = merge_mixin_args([
+        {'cmake-args': ['-DA=1']},
+        {'cmake-args': ['-DB=2']},
+        {'cmake-args': ['-DC=3']},
+    ], DESTINATIONS)
+    # later mixins prepend their values like when being applied in order
+    assert merged == [
+        ['cmake-args', 'cmake_args', ['-DC=3', '-DB=2', '-DA=1']]]
+
+
+def test_merge_scalars():
+    from colcon_mixin.mixin.merged_args import merge_mixin_args
+    merged = merge_mixin_args([
+        {'parallel-workers': 2, 'build-base': None},
+        {'parallel-workers': 8, 'build-base': 'build'},
+    ], DESTINATIONS)
+    # the first value is kept unless it is null
+    assert merged == [
+        ['parallel-workers', 'parallel_workers', 2],
+        ['build-base', 'build_base', 'build'],
+    ]
+
+
+def test_merged_args_and_explicit_arguments(colcon_home):
+    from colcon_mixin.mixin.mixin_argument import MixinArgumentParserDecorator
+    mixin_path = colcon_home / 'mixin'
+    mixin_path.mkdir()
+    (mixin_path / 'stack.mixin').write_text(
+        'build:\n'
+        '  first:\n'
+        "    cmake-args: ['-DA=1']\n"
+        '    build-base: first\n'
+        '  second:\n'
+        "    cmake-args: ['-DB=2']\n"
+        '    build-base: second\n')
+    parser = MixinArgumentParserDecorator().decorate_argument_parser(
+        parser=argparse.ArgumentParser(prog='colcon'))
+    subparsers = parser.add_subparsers(dest='verb_name')
+    subparser = subparsers.add_parser('build')
+    subparser.add_argument('--cmake-args', nargs='*')
+    subparser.add_argument('--build-base', default='build')
+
+    args = parser.parse_args(['build', '--mixin', 'first', 'second'])
+    assert args.cmake_args == ['-DB=2', '-DA=1']
+    assert args.build_base == 'first'
+
+    # explicitly passed scalars are kept and lists are being extended
+    args = parser.parse_args([
+        'build', '--mixin', 'first', 'second', '--build-base', 'build',
+        '--cmake-args=-DC=3'])
+    assert args.cmake_args == ['-DB=2', '-DA=1', '-DC=3']
+    assert args.build_base == 'build'
+
+
+def test_invalid_arguments_reported_once(colcon_home, monkeypatch):
+    from colcon_mixin.mixin import logger
+    from colcon_mixin.mixin.mixin_argument import MixinArgumentParserDecorator
+    mixin_path = colcon_home / 'mixin'
+    mixin_path.mkdir()
+    (mixin_path / 'invalid.mixin').write_text(
+        'build:\n'
+        '  invalid:\n'
+        '    build-base: build\n'
+        '    unknown: value\n')
+    parser = MixinArgumentParserDecorator().decorate_argument_parser(
+        parser=argparse.ArgumentParser(prog='colcon'))
+    subparsers = parser.add_subparsers(dest='verb_name')
+    subparser = subparsers.add_parser('build')
+    subparser.add_argument('--build-base', default='build')
+
+    warnings = []
+    monkeypatch.setattr(logger, 'warning', warnings.append)
+    for _ in range(3):
+        args = parser.parse_args(['build', '--mixin', 'invalid'])
+        assert args.build_base == 'build'
+        assert 'unknown' not in args
+    # the mixin is only being validated when it is used the first time
+    assert warnings == [
+        "Mixin 'invalid' for 'build': key 'unknown' is not a valid argument"]
+
+
+def test_cache_eviction():
+    from colcon_mixin.mixin.merged_args import MergedArgsCache
+    cache = MergedArgsCache(maxsize=2)
+    cache.put('a', {'args': 'a'})
+    cache.put('b', {'args': 'b'})
+    # accessing an entry makes it the most recently used one
+    assert cache.get('a') == {'args': 'a'}
+    cache.put('c', {'args': 'c'})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'args': 'a'}
+    assert cache.get('c') == {'args': 'c'}
+
+
+def test_cache_file(tmp_path):
+    from colcon_mixin.mixin.merged_args import CACHE_FORMAT_VERSION
+    from colcon_mixin.mixin.merged_args import MergedArgsCache
+    path = tmp_path / 'cache' / 'merged_args.json'
+    cache = MergedArgsCache(maxsize=2, path=path)
+    cache.put('a', [['k', 'k', 1]])
+    # entries which can't be represented in JSON aren't being persisted
+    cache.put('b', [['k', 'k', {1, 2}]])
+    assert json.loads(path.read_text()) == {
+        'version': CACHE_FORMAT_VERSION,
+        'entries': [['a', [['k', 'k', 1]]]],
+    }
+
+    cache = MergedArgsCache(maxsize=2, path=path)
+    assert cache.get('a') == [['k', 'k', 1]]
+    assert cache.get('b') is None
+
+
+def test_cache_file_invalid(tmp_path):
+    from colcon_mixin.mixin.merged_args import CACHE_FORMAT_VERSION
+    from colcon_mixin.mixin.merged_args import MergedArgsCache
+    path = tmp_path / 'merged_args.json'
+
+    # a corrupt file is being ignored and replaced
+    path.write_text('{"version": ')
+    cache = MergedArgsCache(path=path)
+    assert cache.get('a') is None
+    cache.put('b', {'args': []})
+    assert json.loads(path.read_text())['entries'] == [['b', {'args': []}]]
+
+    # a file with another version is being ignored
+    path.write_text(json.dumps({
+        'version': CACHE_FORMAT_VERSION - 1,
+        'entries': [['a', {'args': []}]],
+    }))
+    cache = MergedArgsCache(path=path)
+    assert cache.get('a') is None
+
+    # a directory instead of a file is being ignored
+    path.unlink()
+    path.mkdir()
+    cache = MergedArgsCache(path=path)
+    assert cache.get('a') is None
+    cache.put('a', {'args': []})
+    assert cache.get('a') == {'args': []}
+
+
+PARSE_MIXIN_ARGS = """
+import argparse
+import functools
+import os
+from colcon_core.location import set_default_config_path
+from colcon_mixin.mixin.mixin_argument import MixinArgumentParserDecorator
+
+def resolve_path(value, cwd):
+    return os.path.join(cwd, value)
+
+set_default_config_path(path=os.environ['COLCON_HOME'])
+parser = MixinArgumentParserDecorator().decorate_argument_parser(
+    parser=argparse.ArgumentParser(prog='colcon'))
+subparsers = parser.add_subparsers(dest='verb_name')
+subparser = subparsers.add_parser('build')
+# like the types resolving paths relative to the current working directory
+subparser.add_argument(
+    '--build-base', default='build',
+    type=functools.partial(resolve_path, cwd=os.getcwd()))
+subparser.add_argument(
+    '--test-result-base',
+    type=functools.partial(resolve_path, cwd=os.getcwd()))
+args = parser.parse_args(['build', '--mixin', 'dbg'])
+print(args.build_base, args.test_result_base)
+"""
+
+
+def test_cache_file_across_processes(colcon_home, monkeypatch):
+    import subprocess
+    import sys
+    mixin_path = colcon_home / 'mixin'
+    mixin_path.mkdir()
+    (mixin_path / 'build.mixin').write_text(
+        'build:\n'
+        '  dbg:\n'
+        '    build-base: build-dbg\n'
+        '    test-result-base: test-dbg\n')
+    cache_path = colcon_home / 'merged_args.json'
+    monkeypatch.setenv('COLCON_HOME', str(colcon_home))
+    monkeypatch.setenv('COLCON_MIXIN_ARGS_CACHE', str(cache_path))
+    # make the package importable even if it hasn't been installed
+    repo_path = str(Path(__file__).parents[1])
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(
+        filter(None, [repo_path, os.environ.get('PYTHONPATH')])))
+
+    def run(cwd):
+        result = subprocess.run(
+            [sys.executable, '-c', PARSE_MIXIN_ARGS], cwd=str(cwd),
+            stdout=subprocess.PIPE, check=True, universal_newlines=True)
+        return result.stdout.split()
+
+    ws1 = colcon_home / 'ws1'
+    ws1.mkdir()
+    # the values are used as they are written in the mixin file
+    assert run(ws1) == ['build-dbg', 'test-dbg']
+    data = json.loads(cache_path.read_text())
+    assert len(data['entries']) == 1
+
+    # replace the cached values to detect if another process uses the entry
+    for merged_arg in data['entries'][0][1]:
+        merged_arg[2] = 'cached'
+    cache_path.write_text(json.dumps(data))
+    assert run(ws1) == ['cached', 'cached']
+    assert len(json.loads(cache_path.read_text())['entries']) == 1
+
+    # the types of the arguments resolve paths relative to another directory
+    ws2 = colcon_home / 'ws2'
+    ws2.mkdir()
+    assert run(ws2) == ['build-dbg', 'test-dbg']
+    assert len(json.loads(cache_path.read_text())['entries']) == 2
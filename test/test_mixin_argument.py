@@ -0,0 +1,165 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+
+import pytest
+
+DEBUG_MIXIN = """\
+build:
+  debug:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=Debug']
+"""
+
+
+def _create_parser():
+    from colcon_mixin.mixin.mixin_argument import MixinArgumentParserDecorator
+    root_parser = argparse.ArgumentParser(prog='colcon')
+    parser = MixinArgumentParserDecorator().decorate_argument_parser(
+        parser=root_parser)
+    subparsers = parser.add_subparsers(dest='verb_name')
+    subparser = subparsers.add_parser('build')
+    subparser.add_argument('--cmake-args', nargs='*')
+    subparser.add_argument('--parallel-workers', type=int, default=4)
+    return parser, root_parser
+
+
+def _count_speculative_parses(monkeypatch, root_parser):
+    calls = []
+    parse_known_args = root_parser.parse_known_args
+
+    def counting_parse_known_args(*args, **kwargs):
+        calls.append(args)
+        return parse_known_args(*args, **kwargs)
+    monkeypatch.setattr(
+        root_parser, 'parse_known_args', counting_parse_known_args)
+    return calls
+
+
+def test_fast_path(colcon_home, monkeypatch, capsys):
+    parser, root_parser = _create_parser()
+    calls = _count_speculative_parses(monkeypatch, root_parser)
+    args = parser.parse_args(['build', '--parallel-workers', '2'])
+    assert args.parallel_workers == 2
+    assert args.mixin is None
+    # argparse only calls parse_known_args once from within parse_args
+    assert len(calls) == 1
+
+    # the mixin arguments are still documented
+    with pytest.raises(SystemExit):
+        parser.parse_args(['build', '--help'])
+    output = capsys.readouterr().out
+    assert '--mixin ' in output
+    assert 'No mixins are available for this verb' in output
+
+
+@pytest.mark.parametrize('argv,expected', [
+    (['build'], False),
+    (['build', '--cmake-args', '--mixin'], True),
+    (['build', '--mix', 'debug'], True),
+    (['build', '--mixin-files=debug.mixin'], True),
+    (['build', '--', '--mixin'], False),
+    (['build', '-m'], False),
+])
+def test_may_request_mixins(colcon_home, argv, expected):
+    parser, _ = _create_parser()
+    assert parser._may_request_mixins((argv, ), {}) == expected
+    assert parser._may_request_mixins((), {'args': argv}) == expected
+
+
+def test_mixin_files(colcon_home, tmp_path, monkeypatch):
+    mixin_file = tmp_path / 'debug.mixin'
+    mixin_file.write_text(DEBUG_MIXIN)
+    parser, root_parser = _create_parser()
+    calls = _count_speculative_parses(monkeypatch, root_parser)
+    args = parser.parse_args([
+        'build', '--mixin-files', str(mixin_file), '--mixin', 'debug'])
+    assert len(calls) == 2
+    assert args.cmake_args == ['-DCMAKE_BUILD_TYPE=Debug']
+    assert args.parallel_workers == 4
+
+
+def test_mixin_from_index(colcon_home):
+    mixin_path = colcon_home / 'mixin'
+    mixin_path.mkdir()
+    (mixin_path / 'debug.mixin').write_text(DEBUG_MIXIN)
+    parser, _ = _create_parser()
+    args = parser.parse_args(
+        ['build', '--mixin', 'debug', '--cmake-args', 'x'])
+    assert args.cmake_args == ['-DCMAKE_BUILD_TYPE=Debug', 'x']
+    assert args.parallel_workers == 4
+
+
+def test_default_values(colcon_home):
+    from colcon_core.argument_default import is_default_value
+    from colcon_core.argument_default import wrap_default_value
+    parser, _ = _create_parser()
+    foreign_default = wrap_default_value(['foreign'])
+    subparser = parser._verb_tree.parsers[('build', )]
+    subparser.add_argument('--flag', action='store_true')
+    subparser.add_argument('--items', nargs='*', default=['a'])
+    subparser.add_argument('--foreign', nargs='*', default=foreign_default)
+    subparser.add_argument('--number', type=int, default='1')
+    subparser.set_defaults(name='value', other=None)
+    group = subparser.add_argument_group('group')
+    group.add_argument('--group-flag', action='store_true')
+    group.add_argument('--group-items', nargs='*', default=[])
+    group.add_argument('--group-name', default='abc')
+    exclusive_group = subparser.add_mutually_exclusive_group()
+    exclusive_group.add_argument('--exclusive-flag', action='store_true')
+
+    args = parser.parse_args(['build'])
+    assert type(args.flag) is bool and args.flag is False
+    assert type(args.items) is list and args.items == ['a']
+    assert type(args.name) is str and args.name == 'value'
+    assert args.other is None
+    assert type(args.parallel_workers) is int
+    # default values of arguments added to groups
+    assert type(args.group_flag) is bool and args.group_flag is False
+    assert type(args.group_items) is list and args.group_items == []
+    assert type(args.group_name) is str and args.group_name == 'abc'
+    assert type(args.exclusive_flag) is bool
+    # values wrapped by someone else and string defaults converted by a type
+    # are not being unwrapped
+    assert args.foreign is foreign_default
+    assert is_default_value(args.number)
+
+    args = parser.parse_args(['build', '--flag', '--number', '2'])
+    assert args.flag is True
+    assert args.number == 2
+
+
+def test_unwrap_recorded_destinations_only(colcon_home):
+    parser, root_parser = _create_parser()
+    subparser = parser._verb_tree.parsers[('build', )]
+    for i in range(100):
+        subparser.add_argument('--plain{0}'.format(i))
+    subparser.add_argument('--items', nargs='*', default=['a'])
+    subparser.add_argument('--flag', action='store_true')
+    wrapped_defaults = parser._wrapped_defaults
+    assert wrapped_defaults.destinations == {'items', 'flag'}
+
+    # the namespace still contains the wrapped default values
+    args = root_parser.parse_args(['build'])
+    accessed = []
+
+    class RecordingDict(dict):
+
+        def get(self, key, default=None):
+            accessed.append(key)
+            return super().get(key, default)
+
+        def __getitem__(self, key):
+            accessed.append(key)
+            return super().__getitem__(key)
+
+        def __iter__(self):
+            assert False, 'All destinations should not be visited'
+
+        keys = values = items = __iter__
+    args.__dict__ = RecordingDict(vars(args))
+    wrapped_defaults.unwrap(args)
+    assert sorted(accessed) == ['flag', 'items']
+    assert type(args.items) is list and args.items == ['a']
+    assert type(args.flag) is bool and args.flag is False
+    assert args.plain0 is None
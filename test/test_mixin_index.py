@@ -0,0 +1,30 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+
+def test_shared_values_keep_their_type():
+    from colcon_mixin.mixin import MixinIndex
+    index = MixinIndex()
+    index.set_mixin(('build', ), 'single', {'parallel-workers': 1})
+    index.set_mixin(('build', ), 'symlink', {'symlink-install': True})
+    index.set_mixin(('build', ), 'float', {'value': 1.0})
+    index.set_mixin(('build', ), 'list', {'args': [1, True]})
+    index.set_mixin(('build', ), 'other_list', {'args': [True, 1]})
+
+    mixins = index[('build', )]
+    assert type(mixins['single']['parallel-workers']) is int
+    assert mixins['symlink']['symlink-install'] is True
+    assert type(mixins['float']['value']) is float
+    assert [type(v) for v in mixins['list']['args']] == [int, bool]
+    assert [type(v) for v in mixins['other_list']['args']] == [bool, int]
+
+
+def test_unknown_verb():
+    from colcon_mixin.mixin import MixinIndex
+    index = MixinIndex()
+    index.set_mixin(('build', ), 'debug', {'cmake-args': ['-DA']})
+    assert index[('test', )] == {}
+    assert ('test', ) not in index
+    assert ('build', ) in index
+    assert index.get(('test', )) is None
+    assert list(index.keys()) == [('build', )]
@@ -0,0 +1,161 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import functools
+import os
+
+
+def _get_schema():
+    from colcon_mixin.mixin.schema import get_verb_schema
+    parser = argparse.ArgumentParser(prog='colcon')
+    parser.add_argument('--log-level')
+    subparsers = parser.add_subparsers(dest='verb_name')
+    subparser = subparsers.add_parser('build')
+    subparser.add_argument('--flag', action='store_true')
+    subparser.add_argument('--no-flag', action='store_false')
+    subparser.add_argument('--items', nargs='*')
+    subparser.add_argument('--pair', nargs=2)
+    subparser.add_argument('--append', action='append')
+    subparser.add_argument('--number', type=int)
+    subparser.add_argument('--mode', choices=('fast', 'slow'))
+    subparser.add_argument('--numbers', nargs='+', type=int, choices=(1, 2))
+    subparser.add_argument('--verbose', '-v', action='count')
+    return get_verb_schema(parser, ('build', ))
+
+
+def test_verb_schema():
+    from colcon_mixin.mixin.schema import get_verb_schema
+    schema = _get_schema()
+    # the arguments of the parent parser and all option strings are included
+    assert 'log-level' in schema
+    assert schema['v'] is schema['verbose']
+    assert get_verb_schema(argparse.ArgumentParser(), ('unknown', )) is None
+
+
+def _resolve_path(value, cwd):
+    return os.path.join(cwd, value)
+
+
+def test_schema_fingerprint():
+    from colcon_mixin.mixin.mixin_argument import _custom_wrap_type
+    from colcon_mixin.mixin.schema import get_schema_fingerprint
+
+    def get_fingerprint(type_):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--base', type=type_)
+        return get_schema_fingerprint({'base': parser._actions[-1]})
+
+    # new instances of the same type don't change the fingerprint
+    fingerprint = get_fingerprint(
+        functools.partial(_resolve_path, cwd='/ws1'))
+    assert fingerprint == get_fingerprint(
+        functools.partial(_resolve_path, cwd='/ws1'))
+    # the wrapper for default values doesn't hide the wrapped type
+    assert fingerprint == get_fingerprint(
+        _custom_wrap_type(functools.partial(_resolve_path, cwd='/ws1')))
+    # but the arguments of a partial type are being considered
+    assert fingerprint != get_fingerprint(
+        functools.partial(_resolve_path, cwd='/ws2'))
+    assert fingerprint != get_fingerprint(str)
+
+
+def test_normalize_flags():
+    from colcon_mixin.mixin.schema import normalize_mixin_args
+    schema = _get_schema()
+    assert normalize_mixin_args(
+        {'flag': True, 'no-flag': False, 'verbose': 2}, schema) == (
+        {'flag': True, 'no-flag': False, 'verbose': 2}, [])
+
+    normalized, errors = normalize_mixin_args(
+        {'flag': 'true', 'no-flag': 1, 'verbose': True}, schema)
+    assert normalized == {}
+    assert errors == [
+        ('flag', "expected a boolean but got: 'true'"),
+        ('no-flag', 'expected a boolean but got: 1'),
+        ('verbose', 'expected an integer but got: True'),
+    ]
+
+
+def test_normalize_lists():
+    from colcon_mixin.mixin.schema import normalize_mixin_args
+    schema = _get_schema()
+    assert normalize_mixin_args(
+        {'items': ['a', 'b'], 'pair': ['x', 'y'], 'append': ['z']},
+        schema) == (
+        {'items': ['a', 'b'], 'pair': ['x', 'y'], 'append': ['z']}, [])
+
+    normalized, errors = normalize_mixin_args(
+        {'items': 'a', 'append': 'z', 'number': ['1']}, schema)
+    assert normalized == {}
+    assert errors == [
+        ('items', "expected a list but got: 'a'"),
+        ('append', "expected a list but got: 'z'"),
+        ('number', "expected a single value but got: ['1']"),
+    ]
+
+
+def test_normalize_type_check():
+    from colcon_mixin.mixin.schema import normalize_mixin_args
+    schema = _get_schema()
+    # the values are checked using the type but kept as they are written
+    normalized, errors = normalize_mixin_args(
+        {'number': '42', 'numbers': ['1', 2]}, schema)
+    assert normalized == {'number': '42', 'numbers': ['1', 2]}
+    assert errors == []
+
+    # values failing the check are reported but still used
+    normalized, errors = normalize_mixin_args({'number': 'abc'}, schema)
+    assert normalized == {'number': 'abc'}
+    assert len(errors) == 1
+    assert errors[0][0] == 'number'
+    assert errors[0][1].startswith("invalid value 'abc': ")
+
+    # a null value isn't being checked
+    assert normalize_mixin_args({'number': None}, schema) == (
+        {'number': None}, [])
+
+
+def test_normalize_choices():
+    from colcon_mixin.mixin.schema import normalize_mixin_args
+    schema = _get_schema()
+    assert normalize_mixin_args({'mode': 'fast'}, schema) == (
+        {'mode': 'fast'}, [])
+
+    normalized, errors = normalize_mixin_args(
+        {'mode': 'medium', 'numbers': ['1', '3']}, schema)
+    assert normalized == {'mode': 'medium', 'numbers': ['1', '3']}
+    assert errors == [
+        ('mode', "invalid choice 'medium', choose from: fast, slow"),
+        ('numbers', 'invalid choice 3, choose from: 1, 2'),
+    ]
+
+
+def test_normalize_unknown_keys():
+    from colcon_mixin.mixin.schema import normalize_mixin_args
+    schema = _get_schema()
+    normalized, errors = normalize_mixin_args(
+        {'unknown': True, 'flag': True, 'cmake-args': []}, schema)
+    # the valid arguments are kept in their order
+    assert list(normalized.items()) == [('flag', True)]
+    assert errors == [('unknown', None), ('cmake-args', None)]
+
+
+def test_validate_mixin_data():
+    from colcon_mixin.mixin.schema import validate_mixin_data
+    schemas = {('build', ): _get_schema()}
+    assert validate_mixin_data(None, schemas) == []
+    assert validate_mixin_data({
+        'build': {'fast': {'mode': 'fast'}, 'empty': None},
+        'unknown.verb': {'mixin': {'any': 'value'}},
+    }, schemas) == []
+    assert validate_mixin_data(['build'], schemas) == [
+        "The content should be a dictionary but it is: ['build']"]
+    assert validate_mixin_data({
+        'build': {'broken': ['flag'], 'fast': {'mode': 'x', 'other': 1}},
+    }, schemas) == [
+        "Mixin 'broken' for 'build' should be a dictionary",
+        "Mixin 'fast' for 'build': key 'mode' has an invalid value, "
+        "invalid choice 'x', choose from: fast, slow",
+        "Mixin 'fast' for 'build': key 'other' is not a valid argument",
+    ]
@@ -0,0 +1,181 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+
+DEBUG_MIXIN = """\
+build:
+  debug:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=Debug']
+  release:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=Release']
+"""
+
+USER_MIXIN = """\
+build:
+  debug:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=RelWithDebInfo']
+"""
+
+
+def _get_mixins():
+    import colcon_mixin.mixin
+    colcon_mixin.mixin.mixins_by_verb = None
+    colcon_mixin.mixin.invalidate_mixin_locations()
+    return colcon_mixin.mixin.get_mixins()
+
+
+def test_shared_index(run_subverb, colcon_home, tmp_path, monkeypatch):
+    from colcon_mixin.mixin import shared_index
+    shared_path = tmp_path / 'shared'
+    (shared_path / 'default').mkdir(parents=True)
+    (shared_path / 'default' / 'debug.mixin').write_text(DEBUG_MIXIN)
+    monkeypatch.setenv('COLCON_MIXIN_SHARED_PATH', str(shared_path))
+
+    # without a precompiled index the mixin files are being parsed
+    mixins = _get_mixins()
+    assert mixins[('build', )]['debug'] == {
+        'cmake-args': ['-DCMAKE_BUILD_TYPE=Debug']}
+    fingerprint = mixins.fingerprint
+
+    assert run_subverb('compile', []) == 0
+    assert (shared_path / 'mixin_index.marshal').is_file()
+
+    # the precompiled index is being used without parsing any file
+    def load_mixin_content(content):
+        assert False, 'The mixin file should not be parsed'
+    monkeypatch.setattr(
+        shared_index, 'load_mixin_content', load_mixin_content)
+    import colcon_mixin.mixin
+    monkeypatch.setattr(
+        colcon_mixin.mixin, 'load_mixin_content', load_mixin_content)
+    mixins = _get_mixins()
+    assert mixins[('build', )]['debug'] == {
+        'cmake-args': ['-DCMAKE_BUILD_TYPE=Debug']}
+    assert mixins.fingerprint == fingerprint
+    origin = mixins.get_origin(('build', ), 'release')
+    assert origin.path == str(shared_path / 'default' / 'debug.mixin')
+    assert origin.line == 4
+
+
+def test_shared_index_user_overlay(
+    run_subverb, colcon_home, tmp_path, monkeypatch
+):
+    shared_path = tmp_path / 'shared'
+    shared_path.mkdir()
+    (shared_path / 'debug.mixin').write_text(DEBUG_MIXIN)
+    monkeypatch.setenv('COLCON_MIXIN_SHARED_PATH', str(shared_path))
+    assert run_subverb('compile', [str(shared_path)]) == 0
+
+    user_path = colcon_home / 'mixin'
+    user_path.mkdir()
+    (user_path / 'debug.mixin').write_text(USER_MIXIN)
+
+    import colcon_mixin.mixin
+    warnings = []
+    monkeypatch.setattr(
+        colcon_mixin.mixin.logger, 'warning', warnings.append)
+    mixins = _get_mixins()
+    assert mixins[('build', )]['debug'] == {
+        'cmake-args': ['-DCMAKE_BUILD_TYPE=RelWithDebInfo']}
+    assert mixins[('build', )]['release'] == {
+        'cmake-args': ['-DCMAKE_BUILD_TYPE=Release']}
+    assert len(warnings) == 1
+    assert 'is overwriting another mixin' in warnings[0]
+
+
+def test_shared_index_outdated(
+    run_subverb, colcon_home, tmp_path, monkeypatch
+):
+    from colcon_mixin.mixin.shared_index import load_shared_index
+    shared_path = tmp_path / 'shared'
+    shared_path.mkdir()
+    mixin_file = shared_path / 'debug.mixin'
+    mixin_file.write_text(DEBUG_MIXIN)
+    assert run_subverb('compile', [str(shared_path)]) == 0
+    assert len(load_shared_index(shared_path)) == 1
+
+    # a replaced mixin file invalidates the index
+    temp_file = shared_path / '.debug.mixin.tmp'
+    temp_file.write_text(USER_MIXIN)
+    os.replace(str(temp_file), str(mixin_file))
+    _touch_later(shared_path)
+    assert load_shared_index(shared_path) is None
+    monkeypatch.setenv('COLCON_MIXIN_SHARED_PATH', str(shared_path))
+    assert _get_mixins()[('build', )]['debug'] == {
+        'cmake-args': ['-DCMAKE_BUILD_TYPE=RelWithDebInfo']}
+
+    # an added mixin file invalidates the index
+    assert run_subverb('compile', [str(shared_path)]) == 0
+    assert load_shared_index(shared_path) is not None
+    (shared_path / 'other.mixin').write_text(USER_MIXIN)
+    _touch_later(shared_path)
+    assert load_shared_index(shared_path) is None
+
+    # as well as a mixin file added to a subdirectory
+    (shared_path / 'default').mkdir()
+    assert run_subverb('compile', [str(shared_path)]) == 0
+    assert load_shared_index(shared_path) is not None
+    (shared_path / 'default' / 'other.mixin').write_text(USER_MIXIN)
+    _touch_later(shared_path / 'default')
+    assert load_shared_index(shared_path) is None
+
+    # an index with an incompatible format is being ignored
+    (shared_path / 'mixin_index.marshal').write_bytes(b'invalid')
+    assert load_shared_index(shared_path) is None
+    (shared_path / 'mixin_index.marshal').write_bytes(b'')
+    assert load_shared_index(shared_path) is None
+
+
+def test_shared_index_untrusted(run_subverb, tmp_path):
+    from colcon_mixin.mixin.shared_index import load_shared_index
+    shared_path = tmp_path / 'shared'
+    shared_path.mkdir()
+    (shared_path / 'debug.mixin').write_text(DEBUG_MIXIN)
+    assert run_subverb('compile', [str(shared_path)]) == 0
+    index_path = shared_path / 'mixin_index.marshal'
+    os.chmod(str(index_path), 0o644)
+    assert load_shared_index(shared_path) is not None
+
+    # an index which might have been modified by another user isn't loaded
+    os.chmod(str(index_path), 0o664)
+    assert load_shared_index(shared_path) is None
+    os.chmod(str(index_path), 0o646)
+    assert load_shared_index(shared_path) is None
+
+    os.chmod(str(index_path), 0o644)
+    if os.getuid() == 0:
+        os.chown(str(index_path), 12345, -1)
+        assert load_shared_index(shared_path) is None
+
+
+def _touch_later(path):
+    # make sure the modification is newer than the index independent of the
+    # resolution of the file system timestamps
+    mtime_ns = path.stat().st_mtime_ns + 10 ** 9
+    os.utime(str(path), ns=(mtime_ns, mtime_ns))
+
+
+def test_shared_index_relative_paths(
+    run_subverb, colcon_home, tmp_path, monkeypatch
+):
+    from colcon_mixin.mixin.shared_index import load_shared_index
+    shared_path = tmp_path / 'shared'
+    (shared_path / 'default').mkdir(parents=True)
+    (shared_path / 'default' / 'debug.mixin').write_text(DEBUG_MIXIN)
+    monkeypatch.chdir(str(tmp_path))
+    assert run_subverb('compile', ['shared']) == 0
+
+    # the index is valid independent of how the directory is referenced
+    assert load_shared_index(shared_path) is not None
+    moved_path = tmp_path / 'moved'
+    shared_path.rename(moved_path)
+    assert load_shared_index(moved_path) is not None
+    monkeypatch.setenv('COLCON_MIXIN_SHARED_PATH', str(moved_path))
+    mixins = _get_mixins()
+    origin = mixins.get_origin(('build', ), 'debug')
+    assert origin.path == str(moved_path / 'default' / 'debug.mixin')
+
+
+def test_compile_without_path(run_subverb):
+    assert 'No shared directories' in run_subverb('compile', [])
@@ -0,0 +1,746 @@
+# Copyright 2026 Open Source Robotics Foundation, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import shutil
+import subprocess
+import time
+
+import pytest
+
+DEBUG_MIXIN = """\
+build:
+  debug:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=Debug']
+"""
+
+RELEASE_MIXIN = """\
+build:
+  release:
+    cmake-args: ['-DCMAKE_BUILD_TYPE=Release']
+"""
+
+
+def test_add_list_remove(run_subverb, colcon_home, capsys):
+    from colcon_mixin.mixin.repository import get_repositories
+    assert run_subverb('add', ['default', 'http://localhost/index.yaml']) \
+        is None
+    assert get_repositories() == {'default': 'http://localhost/index.yaml'}
+    assert 'already exists' in run_subverb(
+        'add', ['default', 'http://localhost/other.yaml'])
+
+    capsys.readouterr()
+    assert run_subverb('list', []) is None
+    assert capsys.readouterr().out == \
+        'default: http://localhost/index.yaml\n'
+
+    assert run_subverb('remove', ['default']) is None
+    assert get_repositories() == {}
+    assert "doesn't exist" in run_subverb('remove', ['default'])
+
+
+def test_update(run_subverb, colcon_home, mixin_server, capsys):
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', []) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin']
+    output = capsys.readouterr().out
+    assert '+ {0}'.format(repository_path / 'debug.mixin') in output
+
+    run_subverb('list', [])
+    assert capsys.readouterr().out.splitlines() == [
+        'default: ' + index_url,
+        '- {0}'.format(repository_path / 'debug.mixin'),
+        '- {0}'.format(repository_path / 'release.mixin'),
+    ]
+
+    # remove one mixin file from the index
+    mixin_server.add_repository('default', {'debug.mixin': DEBUG_MIXIN})
+    assert run_subverb('update', ['default']) == 0
+    output = capsys.readouterr().out
+    assert '. {0}'.format(repository_path / 'debug.mixin') in output
+    assert '- {0} -> *.obsolete'.format(
+        repository_path / 'release.mixin') in output
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin.obsolete']
+
+    # restore the previous mixin files
+    assert run_subverb('rollback', ['default']) == 0
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin']
+
+
+def test_rollback(run_subverb, colcon_home, mixin_server, capsys):
+    import os
+    from colcon_mixin.mixin.repository import rollback_repository
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    repository_path = colcon_home / 'mixin' / 'default'
+
+    # without any previous state
+    assert rollback_repository(repository_name='default') is False
+    capsys.readouterr()
+    assert run_subverb('rollback', ['default']) == 1
+    assert 'No previous mixin files' in capsys.readouterr().out
+    assert not os.path.lexists(str(repository_path))
+
+    # the first update doesn't have a previous version either
+    assert run_subverb('update', []) == 0
+    assert rollback_repository(repository_name='default') is False
+    assert _list_files(repository_path) == ['debug.mixin']
+
+    # the symbolic link of the repository is being switched
+    mixin_server.add_repository('default', {'release.mixin': RELEASE_MIXIN})
+    assert run_subverb('update', []) == 0
+    assert os.path.islink(str(repository_path))
+    assert _list_files(repository_path) == [
+        'debug.mixin.obsolete', 'release.mixin']
+    assert rollback_repository(repository_name='default') is True
+    assert os.path.islink(str(repository_path))
+    assert _list_files(repository_path) == ['debug.mixin']
+    # rolling back again reverts the rollback
+    assert rollback_repository(repository_name='default') is True
+    assert _list_files(repository_path) == [
+        'debug.mixin.obsolete', 'release.mixin']
+    assert not (colcon_home / 'mixin' / '.default.staging').exists()
+
+
+def test_rollback_legacy_directory(run_subverb, colcon_home, mixin_server):
+    import os
+    from colcon_mixin.mixin.repository import rollback_repository
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    # the directories of a repository from before using a symbolic link
+    mixin_path = colcon_home / 'mixin'
+    (mixin_path / 'default').mkdir(parents=True)
+    (mixin_path / 'default' / 'release.mixin').write_text(RELEASE_MIXIN)
+    (mixin_path / '.default.previous').mkdir()
+
+    assert run_subverb('update', []) == 0
+    assert os.path.islink(str(mixin_path / 'default'))
+    assert not (mixin_path / '.default.previous').exists()
+    assert rollback_repository(repository_name='default') is True
+    assert _list_files(mixin_path / 'default') == ['release.mixin']
+
+
+def test_rollback_without_symlinks(
+    run_subverb, colcon_home, mixin_server, monkeypatch
+):
+    import os
+    from colcon_mixin.mixin.repository import rollback_repository
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+
+    def symlink(*args, **kwargs):
+        raise NotImplementedError()
+    monkeypatch.setattr(os, 'symlink', symlink)
+
+    # the directories are being renamed instead
+    assert run_subverb('update', []) == 0
+    mixin_server.add_repository('default', {'release.mixin': RELEASE_MIXIN})
+    assert run_subverb('update', []) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert not os.path.islink(str(repository_path))
+    assert (colcon_home / 'mixin' / '.default.previous').is_dir()
+    assert rollback_repository(repository_name='default') is True
+    assert _list_files(repository_path) == ['debug.mixin']
+    assert rollback_repository(repository_name='default') is True
+    assert _list_files(repository_path) == [
+        'debug.mixin.obsolete', 'release.mixin']
+
+
+def test_list_stats_json(run_subverb, colcon_home, mixin_server, capsys):
+    import json
+    import os
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN + '  other:\n    cmake-args: []\n',
+    })
+    run_subverb('add', ['default', index_url])
+    run_subverb('add', ['other', 'http://localhost/index.yaml'])
+    before_update = time.time()
+    assert run_subverb('update', ['default']) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+    debug_path = repository_path / 'debug.mixin'
+    release_path = repository_path / 'release.mixin'
+    mtime = time.time() - 2 * 24 * 60 * 60
+    os.utime(str(debug_path), (mtime, mtime))
+    unowned_path = colcon_home / 'mixin' / 'unowned.mixin'
+    unowned_path.write_text(DEBUG_MIXIN)
+
+    capsys.readouterr()
+    assert run_subverb(
+        'list', ['--stats', '--stale-after', '1d', '--format', 'json']) \
+        is None
+    data = json.loads(capsys.readouterr().out)
+    last_update = data['repositories'][0]['stats'].pop('last_update')
+    assert before_update <= last_update <= time.time()
+    assert data == {
+        'repositories': [{
+            'name': 'default',
+            'url': index_url,
+            'files': [str(debug_path), str(release_path)],
+            'stats': {
+                'file_count': 2,
+                'mixin_count_by_verb': {'build': 3},
+                'total_bytes':
+                    debug_path.stat().st_size + release_path.stat().st_size,
+                'stale_files': [str(debug_path)],
+            },
+        }, {
+            'name': 'other',
+            'url': 'http://localhost/index.yaml',
+            'files': [],
+            'stats': {
+                'file_count': 0,
+                'mixin_count_by_verb': {},
+                'total_bytes': 0,
+                'last_update': None,
+                'stale_files': [],
+            },
+        }],
+        'files_without_repository': [str(unowned_path)],
+    }
+
+    # without statistics and limited to a single repository
+    run_subverb('list', ['other', '--format', 'json'])
+    assert json.loads(capsys.readouterr().out) == {
+        'repositories': [{
+            'name': 'other',
+            'url': 'http://localhost/index.yaml',
+            'files': [],
+        }],
+        'files_without_repository': [str(unowned_path)],
+    }
+
+
+def test_update_manifest(run_subverb, colcon_home, mixin_server, capsys):
+    from colcon_mixin.mixin import get_content_digest
+    from colcon_mixin.mixin.repository import get_repository_manifest
+    from colcon_mixin.mixin.repository import get_repository_metadata
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', []) == 0
+    manifest = get_repository_manifest(repository_name='default')
+    assert manifest == [{
+        'name': 'debug.mixin',
+        'sha256': get_content_digest(DEBUG_MIXIN),
+        'url': mixin_server.url + '/default/debug.mixin',
+        'etag': manifest[0]['etag'],
+    }]
+    assert manifest[0]['etag']
+
+    # the manifest is trusted and mixin files added manually to the
+    # directory of the repository aren't listed
+    repository_path = colcon_home / 'mixin' / 'default'
+    (repository_path / 'manual.mixin').write_text(RELEASE_MIXIN)
+    capsys.readouterr()
+    run_subverb('list', [])
+    assert capsys.readouterr().out.splitlines() == [
+        'default: ' + index_url,
+        '- {0}'.format(repository_path / 'debug.mixin'),
+    ]
+    # but the next update renames them like obsolete mixin files
+    assert run_subverb('update', []) == 0
+    assert '- {0} -> *.obsolete'.format(
+        repository_path / 'manual.mixin') in capsys.readouterr().out
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'manual.mixin.obsolete']
+
+    # the obsolete files are recorded and kept by subsequent updates
+    mixin_server.add_repository('default', {'release.mixin': RELEASE_MIXIN})
+    assert run_subverb('update', []) == 0
+    mixin_server.add_repository('default', {'other.mixin': RELEASE_MIXIN})
+    assert run_subverb('update', []) == 0
+    assert _list_files(repository_path) == [
+        'debug.mixin.obsolete', 'manual.mixin.obsolete', 'other.mixin',
+        'release.mixin.obsolete']
+    assert get_repository_metadata(repository_name='default')[
+        'obsolete_files'] == [
+            'debug.mixin.obsolete', 'manual.mixin.obsolete',
+            'release.mixin.obsolete']
+
+    # the files of removed repositories are obsolete
+    run_subverb('remove', ['default'])
+    capsys.readouterr()
+    assert run_subverb('update', []) == 0
+    assert '- {0} -> *.obsolete'.format(
+        repository_path / 'other.mixin') in capsys.readouterr().out
+    assert _list_files(repository_path) == [
+        'debug.mixin.obsolete', 'manual.mixin.obsolete',
+        'other.mixin.obsolete', 'release.mixin.obsolete']
+
+
+def test_update_not_modified(run_subverb, colcon_home, mixin_server, capsys):
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', []) == 0
+    assert mixin_server.not_modified == []
+
+    # unmodified mixin files aren't being downloaded again
+    capsys.readouterr()
+    assert run_subverb('update', []) == 0
+    assert mixin_server.not_modified == [
+        '/default/debug.mixin', '/default/release.mixin']
+    repository_path = colcon_home / 'mixin' / 'default'
+    output = capsys.readouterr().out
+    assert '. {0}'.format(repository_path / 'debug.mixin') in output
+    assert (repository_path / 'debug.mixin').read_text() == DEBUG_MIXIN
+
+    # a mixin file modified locally is being downloaded unconditionally
+    (repository_path / 'release.mixin').write_text(DEBUG_MIXIN)
+    mixin_server.not_modified.clear()
+    assert run_subverb('update', []) == 0
+    assert mixin_server.not_modified == ['/default/debug.mixin']
+    assert (repository_path / 'release.mixin').read_text() == RELEASE_MIXIN
+
+
+def test_update_failure_keeps_mixin_files(
+    run_subverb, colcon_home, mixin_server, capsys
+):
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', []) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+
+    mixin_server.files['/default/debug.mixin'] = RELEASE_MIXIN
+    mixin_server.failures['/default/release.mixin'] = [404]
+    assert run_subverb('update', []) == 1
+    assert (repository_path / 'debug.mixin').read_text() == DEBUG_MIXIN
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin']
+
+    mixin_server.failures['/default/index.yaml'] = [500]
+    assert run_subverb('update', []) == 1
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin']
+
+
+def test_update_validate_keeps_mixin_files(
+    run_subverb, colcon_home, mixin_server, capsys
+):
+    valid_mixin = 'build:\n  merged:\n    merge-install: true\n'
+    index_url = mixin_server.add_repository('default', {
+        'merged.mixin': valid_mixin,
+        'other.mixin': 'unknown-verb:\n  any:\n    key: value\n',
+    })
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', ['--validate']) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert _list_files(repository_path) == ['merged.mixin', 'other.mixin']
+
+    # an invalid mixin file keeps all previous files of the repository
+    mixin_server.files['/default/merged.mixin'] = \
+        'build:\n  merged:\n    merge-install: "yes"\n    unknown: 1\n'
+    mixin_server.files['/default/other.mixin'] = RELEASE_MIXIN
+    capsys.readouterr()
+    assert run_subverb('update', ['--validate']) == 1
+    err = capsys.readouterr().err
+    assert "key 'merge-install' has an invalid value" in err
+    assert "key 'unknown' is not a valid argument" in err
+    assert 'Keeping the previous mixin files' in err
+    assert _list_files(repository_path) == ['merged.mixin', 'other.mixin']
+    assert (repository_path / 'merged.mixin').read_text() == valid_mixin
+    assert not (colcon_home / 'mixin' / '.default.staging').exists()
+
+    # without validating the files are being updated
+    assert run_subverb('update', []) == 0
+    assert (repository_path / 'other.mixin').read_text() == RELEASE_MIXIN
+
+
+@pytest.mark.parametrize('encoding', ['identity', 'base64', 'gzip+base64'])
+def test_update_bundle(
+    run_subverb, colcon_home, mixin_server, capsys, encoding
+):
+    index_url = mixin_server.add_bundle_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN,
+    }, encoding=encoding)
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', []) == 0
+    # the whole repository is fetched with a single request
+    assert mixin_server.requests == ['/default/index.yaml']
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert _list_files(repository_path) == ['debug.mixin', 'release.mixin']
+    assert (repository_path / 'debug.mixin').read_text() == DEBUG_MIXIN
+
+
+def test_update_bundle_mixed(run_subverb, colcon_home, mixin_server):
+    from colcon_mixin.mixin.repository import create_bundle_entry
+    mixin_server.add_repository('default', {'release.mixin': RELEASE_MIXIN})
+    entry = create_bundle_entry(DEBUG_MIXIN)
+    mixin_server.files['/default/index.yaml'] = \
+        'bundle:\n  debug.mixin: {0}\nmixin:\n  - release.mixin\n'.format(
+            entry)
+    run_subverb('add', ['default', mixin_server.url + '/default/index.yaml'])
+    assert run_subverb('update', []) == 0
+    # relative URLs are still resolved against the index URL
+    assert mixin_server.requests == [
+        '/default/index.yaml', '/default/release.mixin']
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert _list_files(repository_path) == ['debug.mixin', 'release.mixin']
+
+    # a hash mismatch keeps the previous mixin files
+    entry['sha256'] = '0' * 64
+    mixin_server.files['/default/index.yaml'] = \
+        'bundle:\n  debug.mixin: {0}\n'.format(entry)
+    assert run_subverb('update', []) == 1
+    assert _list_files(repository_path) == ['debug.mixin', 'release.mixin']
+
+
+def test_update_max_age(run_subverb, colcon_home, mixin_server, capsys):
+    from colcon_mixin.mixin.repository import get_repositories
+    from colcon_mixin.mixin.repository import get_repository_metadata
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+    })
+    with pytest.raises(SystemExit):
+        run_subverb('add', ['default', index_url, '--max-age', '1y'])
+    assert 'must be a valid duration' in capsys.readouterr().err
+    # the duration is being stored in seconds
+    run_subverb('add', ['default', index_url, '--max-age', '1h'])
+    assert get_repositories() == {
+        'default': {'url': index_url, 'max-age': 3600.0}}
+    assert run_subverb('update', []) == 0
+    metadata = get_repository_metadata(repository_name='default')
+    assert metadata['url'] == index_url
+    assert metadata['last_update'] <= time.time()
+    requests = len(mixin_server.requests)
+
+    # the repository was updated within the max age
+    capsys.readouterr()
+    assert run_subverb('update', []) == 0
+    assert 'skipping default' in capsys.readouterr().out
+    assert len(mixin_server.requests) == requests
+
+    # the command line option overrides the max age of the repository
+    assert run_subverb('update', ['--max-age', '0']) == 0
+    assert len(mixin_server.requests) == requests + 2
+    assert run_subverb('update', ['--force']) == 0
+    assert len(mixin_server.requests) == requests + 4
+
+    # the metadata is carried over across updates
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert _list_files(repository_path) == ['debug.mixin']
+    assert (repository_path / '.metadata.yaml').is_file()
+
+    # a changed url invalidates the age
+    other_url = mixin_server.add_repository('other', {
+        'debug.mixin': DEBUG_MIXIN,
+    })
+    run_subverb('remove', ['default'])
+    run_subverb('add', ['default', other_url, '--max-age', '1h'])
+    assert run_subverb('update', []) == 0
+    assert len(mixin_server.requests) == requests + 6
+    assert get_repository_metadata(repository_name='default')['url'] == \
+        other_url
+
+
+@pytest.mark.skipif(not shutil.which('git'), reason='git is not available')
+def test_update_git(run_subverb, colcon_home, tmp_path_factory, capsys):
+    work_path = tmp_path_factory.mktemp('work')
+    bare_path = tmp_path_factory.mktemp('remote') / 'mixin.git'
+
+    def git(*args, cwd=work_path):
+        subprocess.run(
+            ['git', '-c', 'user.name=test', '-c', 'user.email=test@test',
+             '-c', 'init.defaultBranch=main'] + list(args),
+            cwd=str(cwd), check=True, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL)
+
+    def commit(files):
+        for path in work_path.glob('**/*.mixin'):
+            path.unlink()
+        for relpath, content in files.items():
+            (work_path / relpath).parent.mkdir(parents=True, exist_ok=True)
+            (work_path / relpath).write_text(content)
+        git('add', '--all')
+        git('commit', '--quiet', '--message', 'update')
+        git('push', '--quiet', str(bare_path), 'HEAD:main')
+
+    git('init', '--quiet', '--bare', str(bare_path))
+    git('init', '--quiet')
+    commit({
+        'debug.mixin': DEBUG_MIXIN,
+        'sub/release.mixin': RELEASE_MIXIN,
+        '.hidden/other.mixin': RELEASE_MIXIN,
+        'README': '',
+    })
+
+    url = 'git+file://{0}#main'.format(bare_path.as_posix())
+    run_subverb('add', ['default', url])
+    assert run_subverb('update', []) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+    assert _list_files(repository_path) == ['debug.mixin', 'release.mixin']
+    assert (repository_path / 'release.mixin').read_text() == RELEASE_MIXIN
+    assert (colcon_home / 'mixin' / '.default.git').is_dir()
+
+    # the next update fetches the new commit into the existing clone
+    commit({'debug.mixin': RELEASE_MIXIN.replace('release', 'debug')})
+    capsys.readouterr()
+    assert run_subverb('update', []) == 0
+    output = capsys.readouterr().out
+    assert '* {0}'.format(repository_path / 'debug.mixin') in output
+    assert '- {0} -> *.obsolete'.format(
+        repository_path / 'release.mixin') in output
+
+    # an unknown reference keeps the previous mixin files
+    run_subverb('remove', ['default'])
+    run_subverb('add', ['default', url.replace('#main', '#missing')])
+    assert run_subverb('update', []) == 1
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin.obsolete']
+
+
+@pytest.mark.skipif(not shutil.which('git'), reason='git is not available')
+def test_update_git_options(run_subverb, colcon_home, tmp_path, capsys):
+    from colcon_mixin.mixin.repository import set_repositories
+    marker = tmp_path / 'marker'
+    command = '--upload-pack=touch {0};git-upload-pack'.format(marker)
+    urls = ('git+' + command, 'git+file:///repo.git#' + command)
+    # neither the remote URL nor the reference are passed as options to git
+    for url in urls:
+        set_repositories({'default': url})
+        capsys.readouterr()
+        assert run_subverb('update', []) == 1
+        assert 'must not start with a dash' in capsys.readouterr().err
+    assert not marker.exists()
+
+    # such URLs are already rejected when being added
+    with pytest.raises(SystemExit):
+        run_subverb('add', ['other', urls[1]])
+
+
+def test_update_metrics(run_subverb, colcon_home, mixin_server):
+    import json
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    run_subverb('add', ['other', mixin_server.url + '/missing.yaml'])
+    mixin_server.failures['/default/debug.mixin'] = [503]
+    metrics_file = colcon_home / 'metrics.json'
+    assert run_subverb('update', ['--metrics-file', str(metrics_file)]) == 1
+
+    metrics = json.loads(metrics_file.read_text())
+    assert metrics['return_code'] == 1
+    assert metrics['duration'] > 0
+    default, other = metrics['repositories']
+    assert default['status'] == 'updated'
+    assert default['files'] == {
+        'added': 2, 'updated': 0, 'unchanged': 0, 'obsolete': 0}
+    assert [u['url'] for u in default['urls']] == [
+        index_url,
+        mixin_server.url + '/default/debug.mixin',
+        mixin_server.url + '/default/release.mixin']
+    debug = default['urls'][1]
+    assert debug['retries'] == 1
+    assert debug['bytes'] == len(DEBUG_MIXIN)
+    assert debug['duration'] >= debug['connect_time'] + debug['transfer_time']
+    assert other['status'] == 'failed'
+    assert 'HTTP Error 404' in other['urls'][0]['error']
+
+    metrics_file = colcon_home / 'metrics.prom'
+    assert run_subverb('update', [
+        'default', '--metrics-file', str(metrics_file),
+        '--metrics-format', 'prometheus']) == 0
+    lines = metrics_file.read_text().splitlines()
+    assert 'colcon_mixin_update_return_code 0' in lines
+    assert 'colcon_mixin_update_repository_success{repository="default"} 1' \
+        in lines
+    assert 'colcon_mixin_update_repository_files{repository="default",' \
+        'modification="unchanged"} 2' in lines
+    assert 'colcon_mixin_update_url_retries{{repository="default",' \
+        'url="{0}"}} 0'.format(index_url) in lines
+    assert '# TYPE colcon_mixin_update_url_bytes gauge' in lines
+
+
+def test_gc(run_subverb, colcon_home, capsys):
+    import os
+    mixin_path = colcon_home / 'mixin'
+    repository_path = mixin_path / 'default'
+    repository_path.mkdir(parents=True)
+    run_subverb('add', ['default', 'http://localhost/index.yaml'])
+    now = time.time()
+    for i in range(3):
+        path = repository_path / 'mixin{0}.mixin.obsolete'.format(i)
+        path.write_text(DEBUG_MIXIN)
+        # obsoleted i days ago
+        os.utime(str(path), (now - i * 86400, now - i * 86400))
+    (repository_path / 'current.mixin').write_text(DEBUG_MIXIN)
+    (mixin_path / 'other.mixin.obsolete').write_text(DEBUG_MIXIN)
+    # the previous version of a repository isn't affected
+    (mixin_path / '.default.previous').mkdir()
+    (mixin_path / '.default.previous' / 'a.mixin.obsolete').write_text('')
+
+    capsys.readouterr()
+    assert run_subverb('gc', ['--dry-run']) is None
+    assert '4 obsolete mixin files would be removed' in \
+        capsys.readouterr().out
+    assert len(list(repository_path.iterdir())) == 4
+
+    assert run_subverb('gc', ['default', '--keep', '1', '--max-age', '36h']) \
+        is None
+    assert capsys.readouterr().out.splitlines() == [
+        'removed {0}'.format(repository_path / 'mixin2.mixin.obsolete'),
+        'removed 1 obsolete mixin files, 2 kept',
+    ]
+    assert run_subverb('gc', ['default', '--keep', '1']) is None
+    assert _list_files(repository_path) == [
+        'current.mixin', 'mixin0.mixin.obsolete']
+
+    assert run_subverb('gc', []) is None
+    assert _list_files(repository_path) == ['current.mixin']
+    assert not (mixin_path / 'other.mixin.obsolete').exists()
+    assert (mixin_path / '.default.previous' / 'a.mixin.obsolete').exists()
+
+    assert 'unknown' in run_subverb('gc', ['missing'])
+
+
+def test_update_gc_threshold(
+    run_subverb, colcon_home, mixin_server, capsys, monkeypatch
+):
+    index_url = mixin_server.add_repository('default', {
+        'debug.mixin': DEBUG_MIXIN,
+        'release.mixin': RELEASE_MIXIN,
+    })
+    run_subverb('add', ['default', index_url])
+    assert run_subverb('update', []) == 0
+    repository_path = colcon_home / 'mixin' / 'default'
+
+    monkeypatch.setenv('COLCON_MIXIN_GC_THRESHOLD', '1')
+    mixin_server.add_repository('default', {'debug.mixin': DEBUG_MIXIN})
+    assert run_subverb('update', []) == 0
+    assert _list_files(repository_path) == [
+        'debug.mixin', 'release.mixin.obsolete']
+
+    mixin_server.add_repository('default', {'other.mixin': RELEASE_MIXIN})
+    capsys.readouterr()
+    assert run_subverb('update', []) == 0
+    assert '  x {0}'.format(
+        repository_path / 'release.mixin.obsolete') in capsys.readouterr().out
+    assert _list_files(repository_path) == ['other.mixin']
+
+
+def test_query(run_subverb, colcon_home, capsys):
+    mixin_path = colcon_home / 'mixin'
+    mixin_path.mkdir()
+    (mixin_path / 'a.mixin').write_text(DEBUG_MIXIN + RELEASE_MIXIN[6:] + """\
+test:
+  debug:
+    pytest-args: ['-v']
+""")
+    (mixin_path / 'b.mixin').write_text("""\
+build:
+  release:
+    parallel-workers: 1
+""")
+
+    capsys.readouterr()
+    assert run_subverb('query', ['--arg', 'cmake-args']) is None
+    assert capsys.readouterr().out.splitlines() == [
+        'build:',
+        '- debug: {0}'.format(mixin_path / 'a.mixin'),
+    ]
+
+    # the overwritten release mixin doesn't set cmake-args anymore
+    assert run_subverb(
+        'query', ['--arg=--parallel-workers', '--verb', 'build']) is None
+    assert capsys.readouterr().out.splitlines() == [
+        'build:',
+        '- release: {0}'.format(mixin_path / 'b.mixin'),
+    ]
+
+    assert 'No mixins' in run_subverb(
+        'query', ['--arg', 'pytest-args', '--verb', 'build'])
+
+
+def test_show_origin(run_subverb, colcon_home, capsys):
+    repository_path = colcon_home / 'mixin' / 'default'
+    repository_path.mkdir(parents=True)
+    (repository_path / 'a.mixin').write_text(DEBUG_MIXIN + RELEASE_MIXIN[6:])
+    # files in the mixin path are being loaded before subdirectories
+    (colcon_home / 'mixin' / 'b.mixin').write_text(RELEASE_MIXIN)
+
+    capsys.readouterr()
+    assert run_subverb('show', ['build', 'release', '--origin']) is None
+    assert capsys.readouterr().out.splitlines() == [
+        "cmake-args: ['-DCMAKE_BUILD_TYPE=Release']",
+        "origin: {0}:5 (repository 'default')".format(
+            repository_path / 'a.mixin'),
+        'overrides: {0}:2'.format(colcon_home / 'mixin' / 'b.mixin'),
+    ]
+
+
+def test_mixin_locations(run_subverb, colcon_home, monkeypatch):
+    from colcon_mixin.mixin import get_mixin_locations
+    from colcon_mixin.mixin import get_mixin_path
+    import colcon_mixin.mixin
+    checked_paths = []
+    isdir = colcon_mixin.mixin.os.path.isdir
+
+    def counting_isdir(path):
+        checked_paths.append(path)
+        return isdir(path)
+    monkeypatch.setattr(colcon_mixin.mixin.os.path, 'isdir', counting_isdir)
+
+    assert get_mixin_path() == colcon_home / 'mixin'
+    assert get_mixin_locations() is get_mixin_locations()
+    run_subverb('list', [])
+    run_subverb('list', [])
+    assert checked_paths == [str(colcon_home / 'mixin')]
+
+    # creating the directory requires an explicit invalidation
+    (colcon_home / 'mixin').mkdir()
+    assert not get_mixin_locations().is_dir(colcon_home / 'mixin')
+    get_mixin_locations().invalidate(colcon_home / 'mixin')
+    assert get_mixin_locations().is_dir(colcon_home / 'mixin')
+
+
+def test_update_unknown_repository(run_subverb):
+    assert 'unknown' in run_subverb('update', ['missing'])
+
+
+@pytest.mark.benchmark
+def test_benchmark_update(run_subverb, colcon_home, mixin_server, capsys):
+    mixin_files = {
+        'mixin{0}.mixin'.format(i): DEBUG_MIXIN.replace('debug', str(i))
+        for i in range(20)}
+    for i in range(3):
+        index_url = mixin_server.add_repository(
+            'repo{0}'.format(i), mixin_files)
+        run_subverb('add', ['repo{0}'.format(i), index_url])
+    mixin_server.latency = 0.01
+
+    start = time.monotonic()
+    assert run_subverb('update', []) == 0
+    duration = time.monotonic() - start
+    assert len(mixin_server.requests) == 3 * (1 + len(mixin_files))
+    with capsys.disabled():
+        print(
+            '\nupdate of 3 repositories with {0} mixin files each took '
+            '{1:.3f}s'.format(len(mixin_files), duration))
+
+
+def _list_files(path):
+    # skip hidden files like the repository metadata
+    return sorted(p.name for p in path.iterdir() if not p.name.startswith('.'))